@@ -0,0 +1,123 @@
+"""
+Application Configuration
+Tunable settings loaded from environment variables
+"""
+
+import os
+
+# Clustering
+CLUSTER_WINDOW_HOURS = int(os.getenv("CLUSTER_WINDOW_HOURS", "72"))
+DBSCAN_EPS_KM = float(os.getenv("DBSCAN_EPS", "1.0"))
+DBSCAN_MIN_SAMPLES = int(os.getenv("DBSCAN_MIN_SAMPLES", "2"))
+CLUSTER_WORKERS = int(os.getenv("CLUSTER_WORKERS", str(os.cpu_count() or 1)))
+CLUSTER_PARTITION_THRESHOLD = int(os.getenv("CLUSTER_PARTITION_THRESHOLD", "50000"))
+CLUSTER_TILE_KM = float(os.getenv("CLUSTER_TILE_KM", "10"))
+# Cluster each category on its own; overrides as NAME=eps_km:min_samples, e.g. "ROADS_POTHOLES=0.3:2"
+CLUSTER_BY_CATEGORY = os.getenv("CLUSTER_BY_CATEGORY", "true").lower() == "true"
+DBSCAN_CATEGORY_PARAMS = {
+    name.strip().upper(): (float(params.split(":")[0]), int(params.split(":")[1]))
+    for name, params in (
+        entry.split("=", 1) for entry in os.getenv("DBSCAN_CATEGORY_PARAMS", "").split(",") if entry.strip()
+    )
+}
+
+# Priority scoring: Priority = Frequency x Wf + Sentiment x Ws + Duration x Wd
+PRIORITY_WEIGHT_FREQUENCY = float(os.getenv("PRIORITY_WEIGHT_FREQUENCY", "0.5"))
+PRIORITY_WEIGHT_SENTIMENT = float(os.getenv("PRIORITY_WEIGHT_SENTIMENT", "0.3"))
+PRIORITY_WEIGHT_DURATION = float(os.getenv("PRIORITY_WEIGHT_DURATION", "0.2"))
+PRIORITY_CRITICAL_THRESHOLD = float(os.getenv("PRIORITY_CRITICAL_THRESHOLD", "8"))
+PRIORITY_WARNING_THRESHOLD = float(os.getenv("PRIORITY_WARNING_THRESHOLD", "5"))
+
+# Dashboard snapshot cache
+SNAPSHOT_TTL_SECONDS = float(os.getenv("SNAPSHOT_TTL_SECONDS", "30"))
+
+# Bulk ingestion
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+BULK_MAX_RECORD_BYTES = int(os.getenv("BULK_MAX_RECORD_BYTES", "65536"))
+BULK_MAX_REPORTED_ERRORS = int(os.getenv("BULK_MAX_REPORTED_ERRORS", "1000"))
+
+# Write-behind submissions
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+WRITE_BEHIND_SPILL_DIR = os.getenv("WRITE_BEHIND_SPILL_DIR", "./spill")
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "500"))
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "200"))
+WRITE_BEHIND_FSYNC = os.getenv("WRITE_BEHIND_FSYNC", "false").lower() == "true"
+
+# Live dashboard updates
+LIVE_DEBOUNCE_MS = int(os.getenv("LIVE_DEBOUNCE_MS", "250"))
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "32"))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+
+# Heat map tiles: zoom range served, and 2**TILE_GRID_BITS cells per tile axis
+TILE_MIN_ZOOM = int(os.getenv("TILE_MIN_ZOOM", "8"))
+TILE_MAX_ZOOM = int(os.getenv("TILE_MAX_ZOOM", "16"))
+TILE_GRID_BITS = int(os.getenv("TILE_GRID_BITS", "4"))
+# Rendered tiles kept for repeat requests (least recently used dropped first)
+TILE_CACHE_SIZE = int(os.getenv("TILE_CACHE_SIZE", "4096"))
+
+# Complaint listings: largest page served per request
+COMPLAINTS_PAGE_MAX = int(os.getenv("COMPLAINTS_PAGE_MAX", "500"))
+
+# Metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_LOOP_LAG_INTERVAL_MS = int(os.getenv("METRICS_LOOP_LAG_INTERVAL_MS", "500"))
+
+# Maintenance admin endpoints (rollup rebuild) need this X-Admin-Token; empty disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Request profiling (admin endpoints and X-Profile header need a token)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN", "")
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "20"))
+PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "1"))
+PROFILING_EXCLUDE_PATHS = os.getenv("PROFILING_EXCLUDE_PATHS", "/api/dashboard/stream,/metrics").split(",")
+
+# MongoDB connection pools (MONGO_READ_* apply to the secondary-preferred read handle)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+# zstd and snappy need the zstandard / python-snappy packages
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zlib")
+MONGO_READ_URL = os.getenv("MONGO_READ_URL", "")
+MONGO_READ_SEPARATE_POOL = os.getenv("MONGO_READ_SEPARATE_POOL", "true").lower() == "true"
+MONGO_READ_MAX_POOL_SIZE = int(os.getenv("MONGO_READ_MAX_POOL_SIZE", "50"))
+# -1 disables the bound; otherwise at least 90 seconds
+MONGO_READ_MAX_STALENESS_SECONDS = int(os.getenv("MONGO_READ_MAX_STALENESS_SECONDS", "120"))
+
+# Server mode: production runs API_WORKERS processes sharing state via SHARED_STATE_DIR
+APP_ENV = os.getenv("APP_ENV", "development")
+API_WORKERS = int(os.getenv("API_WORKERS", str(os.cpu_count() or 1)))
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", "")
+SHARED_POLL_MS = int(os.getenv("SHARED_POLL_MS", "500"))
+SHARED_SYNC_MARGIN_SECONDS = float(os.getenv("SHARED_SYNC_MARGIN_SECONDS", "5"))
+
+# Off-loop compute: threads for CPU-bound dashboard work, admitted jobs, per-job timeout
+COMPUTE_THREADS = int(os.getenv("COMPUTE_THREADS", "2"))
+COMPUTE_MAX_PENDING = int(os.getenv("COMPUTE_MAX_PENDING", "4"))
+COMPUTE_TIMEOUT_SECONDS = float(os.getenv("COMPUTE_TIMEOUT_SECONDS", "20"))
+# Single-pass DBSCAN at or above this many points runs in the cluster process pool
+CLUSTER_PROCESS_THRESHOLD = int(os.getenv("CLUSTER_PROCESS_THRESHOLD", "5000"))
+
+# Near-duplicate detection: reports this similar (estimated Jaccard), this close and this recent corroborate
+DUPLICATE_DETECTION_ENABLED = os.getenv("DUPLICATE_DETECTION_ENABLED", "true").lower() == "true"
+DUPLICATE_RADIUS_M = float(os.getenv("DUPLICATE_RADIUS_M", "150"))
+DUPLICATE_SIMILARITY = float(os.getenv("DUPLICATE_SIMILARITY", "0.6"))
+DUPLICATE_WINDOW_HOURS = float(os.getenv("DUPLICATE_WINDOW_HOURS", "24"))
+DUPLICATE_NUM_PERM = int(os.getenv("DUPLICATE_NUM_PERM", "32"))
+DUPLICATE_BANDS = int(os.getenv("DUPLICATE_BANDS", "8"))
+
+# Hourly rollups for statistics and trends; relative change beyond TREND_THRESHOLD is "up"/"down"
+ROLLUPS_ENABLED = os.getenv("ROLLUPS_ENABLED", "true").lower() == "true"
+TREND_THRESHOLD = float(os.getenv("TREND_THRESHOLD", "0.1"))
+
+# Resident complaint window: recent complaints held in memory; the size budget
+# bounds this store only, not the tile, duplicate and clustering indexes
+WINDOW_STORE_ENABLED = os.getenv("WINDOW_STORE_ENABLED", "true").lower() == "true"
+WINDOW_STORE_HOURS = float(os.getenv("WINDOW_STORE_HOURS", str(CLUSTER_WINDOW_HOURS)))
+WINDOW_STORE_MAX_MB = float(os.getenv("WINDOW_STORE_MAX_MB", "256"))
+WINDOW_STORE_CELL_KM = float(os.getenv("WINDOW_STORE_CELL_KM", "0.5"))
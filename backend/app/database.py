@@ -1,28 +1,70 @@
 """
 Database Connection and Configuration
-MongoDB connection handler using motor (async driver)
+MongoDB connection handler using motor (async driver), with a primary
+handle for writes and a secondary-preferred handle for heavy reads
 """
 
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.read_preferences import SecondaryPreferred
+from app import config
+from app.metrics import MongoCommandMetrics
 import os
 
 class MongoDatabase:
     client: AsyncIOMotorClient = None
     db: AsyncIOMotorDatabase = None
+    read_client: AsyncIOMotorClient = None
+    read_db: AsyncIOMotorDatabase = None
 
 mongodb = MongoDatabase()
 
+def _client_options(max_pool_size: int) -> dict:
+    """Pool, compression and timeout settings shared by both clients"""
+    options = {
+        "maxPoolSize": max_pool_size,
+        "minPoolSize": config.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": config.MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "connectTimeoutMS": config.MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": config.MONGO_SOCKET_TIMEOUT_MS,
+        "event_listeners": [MongoCommandMetrics()] if config.METRICS_ENABLED else [],
+    }
+    if config.MONGO_COMPRESSORS:
+        options["compressors"] = config.MONGO_COMPRESSORS
+    return options
+
 async def connect_to_mongo():
-    """Establish MongoDB connection"""
-    mongodb.client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
-    mongodb.db = mongodb.client[os.getenv("DATABASE_NAME", "samadhansetu")]
+    """Establish MongoDB connections"""
+    url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+    database_name = os.getenv("DATABASE_NAME", "samadhansetu")
+
+    mongodb.client = AsyncIOMotorClient(url, **_client_options(config.MONGO_MAX_POOL_SIZE))
+    mongodb.db = mongodb.client[database_name]
+
+    # Dashboard and listing reads tolerate bounded staleness
+    read_preference = SecondaryPreferred(max_staleness=config.MONGO_READ_MAX_STALENESS_SECONDS)
+    if config.MONGO_READ_SEPARATE_POOL:
+        # Own pool, so heavy reads cannot starve submissions of connections
+        mongodb.read_client = AsyncIOMotorClient(
+            config.MONGO_READ_URL or url, **_client_options(config.MONGO_READ_MAX_POOL_SIZE)
+        )
+    else:
+        mongodb.read_client = mongodb.client
+    mongodb.read_db = mongodb.read_client.get_database(database_name, read_preference=read_preference)
     print("[+] Connected to MongoDB")
 
 async def close_mongo_connection():
-    """Close MongoDB connection"""
+    """Close MongoDB connections"""
+    if mongodb.read_client is not None and mongodb.read_client is not mongodb.client:
+        mongodb.read_client.close()
     mongodb.client.close()
     print("[+] Disconnected from MongoDB")
 
 async def get_database() -> AsyncIOMotorDatabase:
-    """Get database instance"""
+    """Get database instance (primary)"""
     return mongodb.db
+
+async def get_read_database() -> AsyncIOMotorDatabase:
+    """Get database instance for reads that may be served by a secondary"""
+    return mongodb.read_db if mongodb.read_db is not None else mongodb.db
@@ -0,0 +1,293 @@
+"""
+Application Metrics
+Minimal in-process counters, gauges and histograms rendered in the
+Prometheus text exposition format, plus the HTTP, MongoDB and event-loop
+collectors that feed them
+"""
+
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+from app import config
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (10, 100, 1000, 10000, 50000, 100000, 500000, 1000000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        # Observed from Motor's worker threads as well as the event loop
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic total per label set"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Last set value per label set"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram. observe() is a bisect and three additions;
+    buckets are stored non-cumulative and summed when rendered.
+    """
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                bucket_labels = _format_labels(self.label_names, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Every metric exposed on /metrics"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+))
+HTTP_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route"]
+))
+MONGO_LATENCY = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time", ["command", "collection"]
+))
+MONGO_DOCUMENTS = registry.register(Counter(
+    "mongodb_documents_total", "Documents returned or written by MongoDB commands", ["command", "collection"]
+))
+MONGO_FAILURES = registry.register(Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands", ["command"]
+))
+DBSCAN_LATENCY = registry.register(Histogram(
+    "dbscan_duration_seconds", "DBSCAN clustering time per call", ["mode"]
+))
+DBSCAN_POINTS = registry.register(Histogram(
+    "dbscan_input_points", "Points per DBSCAN call", ["mode"], buckets=SIZE_BUCKETS
+))
+NLP_LATENCY = registry.register(Histogram(
+    "nlp_analyze_duration_seconds", "Keyword analysis time per complaint",
+    buckets=(0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.001, 0.01)
+))
+LOOP_LAG = registry.register(Histogram(
+    "event_loop_lag_seconds", "Delay of a periodic event loop tick beyond its schedule"
+))
+LOOP_LAG_LAST = registry.register(Gauge(
+    "event_loop_lag_last_seconds", "Most recent event loop lag sample"
+))
+
+
+# id(route) -> include prefix, for FastAPI versions that match the router's own routes
+_ROUTE_PREFIXES: Dict[int, str] = {}
+
+
+def register_router(router, prefix: str):
+    """Label an included router's routes with their full mounted path"""
+    for route in router.routes:
+        _ROUTE_PREFIXES[id(route)] = prefix
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request under its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in scope; unmatched paths share one label
+            route = scope.get("route")
+            template = _ROUTE_PREFIXES.get(id(route), "") + getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_LATENCY.observe(time.perf_counter() - start, method, template)
+            HTTP_REQUESTS.inc(method, template, status)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener recording latency and document counts"""
+
+    def __init__(self):
+        self._collections: Dict[int, str] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[event.request_id] = collection if isinstance(collection, str) else ""
+
+    def succeeded(self, event):
+        collection = self._collections.pop(event.request_id, "")
+        if event.command_name == "getMore":
+            collection = event.reply.get("cursor", {}).get("ns", "").split(".", 1)[-1]
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, event.command_name, collection)
+
+        reply = event.reply
+        if "cursor" in reply:
+            cursor = reply["cursor"]
+            documents = len(cursor.get("firstBatch") or cursor.get("nextBatch") or ())
+        else:
+            documents = reply.get("n", 0)
+        if documents:
+            MONGO_DOCUMENTS.inc(event.command_name, collection, amount=documents)
+
+    def failed(self, event):
+        self._collections.pop(event.request_id, None)
+        MONGO_FAILURES.inc(event.command_name)
+
+
+class EventLoopLagMonitor:
+    """Periodic tick measuring how late the event loop runs it"""
+
+    def __init__(self, interval_ms: int = config.METRICS_LOOP_LAG_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            LOOP_LAG.observe(lag)
+            LOOP_LAG_LAST.set(lag)
+
+
+loop_lag_monitor = EventLoopLagMonitor()
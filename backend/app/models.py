@@ -44,6 +44,9 @@ class Complaint(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     citizen_id: Optional[str] = None
     voice_transcription: bool = False
+    # Near-duplicate reports folded into this complaint
+    corroborations: int = 0
+    last_corroborated_at: Optional[datetime] = None
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -51,6 +54,7 @@ class IncidentCluster(BaseModel):
     """Grouped complaints (cluster of related issues)"""
     id: Optional[str] = Field(None, alias="_id")
     category: CategoryEnum
+    categories: List[CategoryEnum] = []
     location: Location
     complaint_ids: List[str]
     frequency_count: int
@@ -0,0 +1,205 @@
+"""
+On-Demand Request Profiling
+Opt-in cProfile capture of single requests (admin header) or a sampled
+share of traffic, kept in memory as pstats dumps and collapsed stacks
+"""
+
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from app import config
+
+PROFILE_HEADER = b"x-profile"
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, thread_id: int, interval_ms: float):
+        super().__init__(daemon=True)
+        self.target_id = thread_id
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            frame = sys._current_frames().get(self.target_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> Counter:
+        self._halt.set()
+        self.join()
+        return self.stacks
+
+
+class RequestProfile:
+    """One captured request"""
+    __slots__ = ("id", "method", "path", "status", "started_at", "duration", "stats", "stacks")
+
+    def __init__(self, profile_id: int, method: str, path: str):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.status: Optional[int] = None
+        self.started_at = datetime.utcnow()
+        self.duration = 0.0
+        self.stats: Dict = {}
+        self.stacks: Counter = Counter()
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": sum(self.stacks.values()),
+        }
+
+    def pstats_dump(self) -> bytes:
+        """Same bytes as pstats.Stats.dump_stats; load with pstats.Stats(path)"""
+        return marshal.dumps(self.stats)
+
+    def collapsed(self) -> str:
+        """`frame;frame;frame count` lines for flamegraph.pl / speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int = 30, sort: str = "cumulative") -> str:
+        """Human-readable pstats table"""
+        output = io.StringIO()
+        stats = pstats.Stats(stream=output)
+        stats.stats = self.stats
+        stats.get_top_level_stats()
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and keeps the most recent captures.
+
+    cProfile hooks the event loop thread, so a capture also contains work of
+    requests running concurrently; only one capture runs at a time.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = config.PROFILING_ENABLED,
+        sample_rate: float = config.PROFILING_SAMPLE_RATE,
+        admin_token: str = config.PROFILING_ADMIN_TOKEN,
+        max_profiles: int = config.PROFILING_MAX_PROFILES,
+        sample_interval_ms: float = config.PROFILING_SAMPLE_INTERVAL_MS,
+        exclude_paths: List[str] = config.PROFILING_EXCLUDE_PATHS
+    ):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token
+        self.sample_interval_ms = sample_interval_ms
+        self.exclude_paths = set(exclude_paths)
+        self.profiles: Deque[RequestProfile] = deque(maxlen=max_profiles)
+        self._ids = itertools.count(1)
+        self._active = False
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        # Constant-time, so response timing does not reveal the token prefix by prefix
+        return bool(self.admin_token) and token is not None and hmac.compare_digest(
+            token.encode(), self.admin_token.encode()
+        )
+
+    def should_profile(self, path: str, header_token: Optional[str]) -> bool:
+        # Long-lived streams would hold the single capture slot indefinitely
+        if self._active or path in self.exclude_paths:
+            return False
+        if header_token is not None and self.is_admin(header_token):
+            return True
+        return self.enabled and self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def begin(self, method: str, path: str):
+        self._active = True
+        capture = RequestProfile(next(self._ids), method, path)
+        profile = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), self.sample_interval_ms)
+        sampler.start()
+        profile.enable()
+        return capture, profile, sampler, time.perf_counter()
+
+    def end(self, state) -> RequestProfile:
+        capture, profile, sampler, start = state
+        profile.disable()
+        capture.duration = time.perf_counter() - start
+        capture.stacks = sampler.stop()
+        profile.create_stats()
+        capture.stats = profile.stats
+        self.profiles.append(capture)
+        self._active = False
+        return capture
+
+    def get(self, profile_id: int) -> Optional[RequestProfile]:
+        for capture in self.profiles:
+            if capture.id == profile_id:
+                return capture
+        return None
+
+    def summaries(self) -> List[dict]:
+        return [capture.summary() for capture in reversed(self.profiles)]
+
+
+class ProfilingMiddleware:
+    """ASGI middleware wrapping selected requests in a profiler capture"""
+
+    def __init__(self, app, profiler: "RequestProfiler" = None):
+        self.app = app
+        self.profiler = profiler or request_profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header_token = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                header_token = value.decode("latin-1")
+                break
+        if not self.profiler.should_profile(scope["path"], header_token):
+            await self.app(scope, receive, send)
+            return
+
+        state = self.profiler.begin(scope["method"], scope["path"])
+        capture = state[0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                capture.status = message["status"]
+                message = {**message, "headers": [
+                    *message.get("headers", []), (b"x-profile-id", str(capture.id).encode())
+                ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.profiler.end(state)
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,47 @@
+"""
+Fast JSON Responses
+orjson-backed response class that encodes route payloads directly,
+skipping FastAPI's jsonable_encoder pass
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# datetime, date, UUID, Enum (the CategoryEnum/UrgencyLevel str enums) and
+# numpy values are encoded natively by orjson; the rest goes through _default
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode a response payload to JSON bytes"""
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson. Return it from a route (rather
+    than a dict) so FastAPI does not pre-walk the payload.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,107 @@
+"""
+API Routes for Administration
+Runtime profiling controls, captured request profiles and rollup maintenance
+"""
+
+import hmac
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Optional
+from app import config
+from app.database import get_database
+from app.profiling import request_profiler
+from app.services.rollup_service import RollupService
+
+def require_profiling_admin(x_admin_token: Optional[str] = Header(None)):
+    """Reject callers without the configured profiling token"""
+    if not request_profiler.admin_token:
+        raise HTTPException(status_code=404, detail="Profiling admin is not configured")
+    if not request_profiler.is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Reject callers without the configured admin token (maintenance endpoints)"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin API is not configured")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+router = APIRouter()
+_profiling_admin = [Depends(require_profiling_admin)]
+
+def _get_profile(profile_id: int):
+    capture = request_profiler.get(profile_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return capture
+
+@router.get("/profiling", dependencies=_profiling_admin)
+async def get_profiling_settings():
+    """Current sampling settings and captured profiles"""
+    return {
+        "enabled": request_profiler.enabled,
+        "sample_rate": request_profiler.sample_rate,
+        "profiles": request_profiler.summaries()
+    }
+
+@router.put("/profiling", dependencies=_profiling_admin)
+async def update_profiling_settings(
+    enabled: Optional[bool] = None,
+    sample_rate: Optional[float] = None
+):
+    """Turn sampled profiling on or off without a restart"""
+    if sample_rate is not None:
+        if not 0 <= sample_rate <= 1:
+            raise HTTPException(status_code=400, detail="sample_rate must be between 0 and 1")
+        request_profiler.sample_rate = sample_rate
+    if enabled is not None:
+        request_profiler.enabled = enabled
+    return {"enabled": request_profiler.enabled, "sample_rate": request_profiler.sample_rate}
+
+@router.delete("/profiling/profiles", dependencies=_profiling_admin)
+async def clear_profiles():
+    """Discard captured profiles"""
+    request_profiler.profiles.clear()
+    return {"cleared": True}
+
+@router.get("/profiling/profiles/{profile_id}", dependencies=_profiling_admin)
+async def get_profile_top(profile_id: int, limit: int = 30, sort: str = "cumulative"):
+    """Top functions of a capture as a pstats table"""
+    capture = _get_profile(profile_id)
+    try:
+        return PlainTextResponse(capture.top(limit, sort))
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown sort key: {sort}")
+
+@router.get("/profiling/profiles/{profile_id}/pstats", dependencies=_profiling_admin)
+async def download_pstats(profile_id: int):
+    """Binary pstats dump (open with pstats.Stats or snakeviz)"""
+    capture = _get_profile(profile_id)
+    return Response(
+        capture.pstats_dump(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'}
+    )
+
+@router.get("/profiling/profiles/{profile_id}/collapsed", dependencies=_profiling_admin)
+async def download_collapsed(profile_id: int):
+    """Collapsed stacks for flamegraph.pl or speedscope"""
+    return PlainTextResponse(_get_profile(profile_id).collapsed())
+
+@router.post("/rollups/rebuild", dependencies=[Depends(require_admin)])
+async def rebuild_rollups(
+    hours: Optional[int] = None,
+    include_current_hour: bool = False,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Recompute hourly rollups from raw complaints (all history unless `hours` is given)"""
+    now = datetime.utcnow()
+    start = now - timedelta(hours=hours) if hours else None
+    end = now + timedelta(hours=1) if include_current_hour else now
+    try:
+        buckets = await RollupService(db).rebuild(start=start, end=end)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"rebuilt_buckets": buckets, "start": start, "end": end}
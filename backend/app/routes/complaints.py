@@ -3,15 +3,23 @@ API Routes for Complaints
 Endpoints for creating, retrieving, and managing complaints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from app.models import Complaint, Location
-from app.database import get_database
-from app.services.complaint_service import ComplaintService
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.models import Complaint, Location, CategoryEnum
+from app.database import get_database, get_read_database
+from app.responses import FastJSONResponse
+from app.services.complaint_service import ComplaintService, EXPORT_FIELDS
+from app.services.ingestion_service import BulkIngestionService
 from app.services.nlp_service import NLPService
-from typing import List
+from app.services.peer_sync import peer_sync
+from typing import AsyncIterator, List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import datetime
+import csv
+import io
+import json
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 nlp_service = NLPService()
 
 @router.post("/submit")
@@ -36,9 +44,10 @@ async def submit_complaint(
             area_name=area_name
         )
 
-        # Classify the complaint using NLP
-        category, confidence = nlp_service.classify_complaint(text)
-        urgency_score = nlp_service.extract_urgency_score(text)
+        # Classify the complaint using NLP (single keyword pass)
+        analysis = nlp_service.analyze(text)
+        category, confidence = analysis.category, analysis.confidence
+        urgency_score = analysis.urgency_score
 
         # Create complaint
         complaint = Complaint(
@@ -49,17 +58,35 @@ async def submit_complaint(
             voice_transcription=False
         )
 
-        # Save to database
+        # Save to database, or count it as a "+1" on a near-duplicate nearby
         complaint_service = ComplaintService(db)
-        complaint_id = await complaint_service.create_complaint(complaint)
+        complaint_id, corroborated = await complaint_service.submit_complaint(complaint)
 
-        return {
+        return FastJSONResponse({
             "complaint_id": complaint_id,
-            "status": "submitted",
+            "status": "corroborated" if corroborated else "submitted",
             "category": category,
             "urgency_score": urgency_score,
             "classification_confidence": confidence
-        }
+        })
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/bulk")
+async def bulk_submit_complaints(
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Bulk-submit complaints from partner channels
+    Body: NDJSON (one object per line) or a JSON array of objects with
+    text, latitude, longitude and optional ward, area_name, timestamp,
+    citizen_id, original_language, voice_transcription
+    """
+    try:
+        ingestion_service = BulkIngestionService(db, nlp_service)
+        summary = await ingestion_service.ingest(request.stream())
+        return FastJSONResponse({"status": "processed", **summary})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -67,16 +94,81 @@ async def submit_complaint(
 async def get_recent_complaints(
     hours: int = 24,
     limit: int = 100,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    cursor: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    read_db: AsyncIOMotorDatabase = Depends(get_read_database)
 ):
-    """Get recent complaints"""
+    """
+    Get recent complaints, newest first
+    Responses are paged; pass `next_cursor` back as `cursor` for the next page
+    """
     try:
-        complaint_service = ComplaintService(db)
-        complaints = await complaint_service.get_recent_complaints(hours, limit)
-        return {"complaints": [c.dict() for c in complaints]}
+        complaint_service = ComplaintService(db, read_db)
+        complaints, next_cursor = await complaint_service.get_recent_complaints(hours, limit, cursor)
+        return FastJSONResponse({
+            "complaints": [c.model_dump() for c in complaints],
+            "next_cursor": next_cursor
+        })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+def _export_value(value):
+    """JSON/CSV friendly scalar for export rows"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+async def _encode_ndjson(batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield "".join(
+            json.dumps({k: _export_value(v) for k, v in row.items()}, ensure_ascii=False) + "\n"
+            for row in batch
+        ).encode("utf-8")
+
+async def _encode_csv(batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    columns = [column for column, _ in EXPORT_FIELDS]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode("utf-8")
+
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_export_value(row[column]) for column in columns] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+
+@router.get("/export")
+async def export_complaints(
+    format: str = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    category: Optional[CategoryEnum] = None,
+    ward: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    read_db: AsyncIOMotorDatabase = Depends(get_read_database)
+):
+    """
+    Stream complaints as NDJSON or CSV for offline analysis
+    Filters: start/end (ISO timestamps), category, ward
+    """
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+
+    complaint_service = ComplaintService(db, read_db)
+    batches = complaint_service.iter_export_rows(start, end, category, ward)
+    if format == "csv":
+        body, media_type = _encode_csv(batches), "text/csv"
+    else:
+        body, media_type = _encode_ndjson(batches), "application/x-ndjson"
+
+    filename = f"complaints.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 @router.get("/{complaint_id}")
 async def get_complaint(
     complaint_id: str,
@@ -88,7 +180,7 @@ async def get_complaint(
         complaint = await complaint_service.get_complaint_by_id(complaint_id)
         if not complaint:
             raise HTTPException(status_code=404, detail="Complaint not found")
-        return complaint.dict()
+        return FastJSONResponse(complaint.model_dump())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -97,14 +189,37 @@ async def get_nearby_complaints(
     latitude: float,
     longitude: float,
     radius_km: float = 1.0,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    k: Optional[int] = None,
+    limit: int = 100,
+    hours: Optional[float] = None,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    read_db: AsyncIOMotorDatabase = Depends(get_read_database)
 ):
-    """Get complaints near a location"""
+    """
+    Get complaints near a location, nearest first
+    Pass `k` for the k nearest complaints regardless of distance;
+    otherwise returns up to `limit` complaints within `radius_km`.
+    Pass `hours` to only consider recent complaints (served from memory)
+    """
     try:
-        complaint_service = ComplaintService(db)
-        complaints = await complaint_service.get_complaints_by_location(
-            latitude, longitude, radius_km
-        )
-        return {"complaints": [c.dict() for c in complaints]}
+        complaint_service = ComplaintService(db, read_db)
+        if hours is not None:
+            # Other workers' writes reach the in-memory window through MongoDB
+            await peer_sync.sync(db)
+        if k is not None:
+            results = await complaint_service.get_complaints_by_location(
+                latitude, longitude, radius_km=None, limit=k, hours=hours
+            )
+        else:
+            results = await complaint_service.get_complaints_by_location(
+                latitude, longitude, radius_km=radius_km, limit=limit, hours=hours
+            )
+        return FastJSONResponse({
+            "complaints": [
+                {**c.model_dump(), "distance_km": round(distance_km, 3)}
+                for c, distance_km in results
+            ],
+            "mode": "nearest" if k is not None else "radius",
+        })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
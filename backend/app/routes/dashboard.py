@@ -3,186 +3,207 @@ API Routes for Dashboard and Analytics
 Endpoints for heat map data, trends, and authority insights
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from app.database import get_database
-from app.services.complaint_service import ComplaintService
-from app.services.clustering_service import ClusteringService
-from typing import List
-
-router = APIRouter()
-
-def clean_category_name(category) -> str:
-    """Convert enum category to clean string name"""
-    if not category:
-        return "Unknown"
-    cat_str = str(category)
-    if "CategoryEnum." in cat_str:
-        # Extract name after 'CategoryEnum.'
-        return cat_str.split("CategoryEnum.")[1].replace("_", " ").title()
-    return cat_str.replace("_", " ").title()
+from app import config
+from app.database import get_database, get_read_database
+from app.responses import FastJSONResponse
+from app.services.dashboard_service import (
+    category_label, clean_category_name, get_cluster_snapshot, heatmap_point, load_statistics, urgency_label
+)
+from app.services.live_updates import RESYNC, dashboard_publisher
+from app.services.peer_sync import peer_sync
+from app.services.rollup_service import RollupService
+from app.services.tile_index import tile_index
+import asyncio
+
+router = APIRouter(default_response_class=FastJSONResponse)
 
 @router.get("/heatmap")
 async def get_heatmap_data(
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    read_db: AsyncIOMotorDatabase = Depends(get_read_database)
 ):
     """
     Get heat map data: clusters with priority scores and colors
     Story C: Authority insight - heat map endpoint
     """
     try:
-        complaint_service = ComplaintService(db)
-        clustering_service = ClusteringService()
-
-        # Get recent complaints
-        complaints = await complaint_service.get_recent_complaints(hours=72, limit=1000)
+        snapshot = await get_cluster_snapshot(db, read_db=read_db)
 
-        if not complaints:
-            return {
+        if not snapshot.total_complaints:
+            return FastJSONResponse({
                 "heatmap_points": [],
                 "summary": "No complaints in the last 72 hours"
-            }
-
-        # Cluster by location
-        clusters = clustering_service.cluster_complaints(complaints)
-
-        # Build heat map response
-        heatmap_points = []
-        for cluster_id, cluster_complaints in clusters.items():
-            if cluster_id == -1:  # Skip noise points from DBSCAN
-                continue
-
-            avg_lat = sum(c.location.latitude for c in cluster_complaints) / len(cluster_complaints)
-            avg_long = sum(c.location.longitude for c in cluster_complaints) / len(cluster_complaints)
-            frequency = len(cluster_complaints)
-            avg_urgency = sum(c.urgency_score or 0 for c in cluster_complaints) / frequency
-
-            # Calculate priority score
-            duration_hours = 24  # Placeholder
-            priority_score = clustering_service.calculate_priority_score(
-                frequency=frequency,
-                sentiment=avg_urgency,
-                duration_hours=duration_hours
-            )
-
-            # Determine intensity (1-10)
-            if priority_score >= 8:
-                intensity = "critical"
-                color = "red"
-            elif priority_score >= 5:
-                intensity = "warning"
-                color = "yellow"
-            else:
-                intensity = "low"
-                color = "green"
-
-            # Get categories
-            categories = set(clean_category_name(c.category) for c in cluster_complaints if c.category)
-
-            heatmap_points.append({
-                "id": str(cluster_id),
-                "latitude": avg_lat,
-                "longitude": avg_long,
-                "complaint_count": frequency,
-                "priority_score": round(priority_score, 1),
-                "intensity": intensity,
-                "color": color,
-                "categories": sorted(list(categories)),
-                "summary": clustering_service.generate_cluster_summary(cluster_complaints)
             })
 
-        # Sort by priority score
-        heatmap_points.sort(key=lambda x: x["priority_score"], reverse=True)
+        # Build heat map response (snapshot is already sorted by priority)
+        heatmap_points = [heatmap_point(cluster) for cluster in snapshot.clusters]
 
-        return {
+        return FastJSONResponse({
             "heatmap_points": heatmap_points,
             "total_clusters": len(heatmap_points),
-            "total_complaints": len(complaints)
-        }
+            "total_complaints": snapshot.total_complaints
+        })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/top-issues")
 async def get_top_issues(
     limit: int = 3,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    read_db: AsyncIOMotorDatabase = Depends(get_read_database)
 ):
     """
     Get top 3 critical issues for authority
     """
     try:
-        complaint_service = ComplaintService(db)
-        clustering_service = ClusteringService()
+        snapshot = await get_cluster_snapshot(db, read_db=read_db)
 
-        # Get recent complaints
-        complaints = await complaint_service.get_recent_complaints(hours=72, limit=1000)
+        if not snapshot.total_complaints:
+            return FastJSONResponse({"top_issues": []})
 
-        if not complaints:
-            return {"top_issues": []}
-
-        # Cluster
-        clusters = clustering_service.cluster_complaints(complaints)
-
-        # Calculate priorities
+        # Snapshot clusters are already ranked by priority
         issues = []
-        for cluster_id, cluster_complaints in clusters.items():
-            if cluster_id == -1:
-                continue
-
-            frequency = len(cluster_complaints)
-            avg_urgency = sum(c.urgency_score or 0 for c in cluster_complaints) / frequency
-            priority_score = clustering_service.calculate_priority_score(
-                frequency=frequency,
-                sentiment=avg_urgency,
-                duration_hours=24
-            )
-
-            avg_lat = sum(c.location.latitude for c in cluster_complaints) / frequency
-            avg_long = sum(c.location.longitude for c in cluster_complaints) / frequency
+        for idx, cluster in enumerate(snapshot.clusters[:limit]):
+            priority_score = cluster.priority_score
 
             issues.append({
-                "rank": None,  # Will be set after sorting
-                "cluster_id": str(cluster_id),
-                "category": clean_category_name(cluster_complaints[0].category),
-                "location": f"{cluster_complaints[0].location.area_name or 'Area'}",
-                "latitude": avg_lat,
-                "longitude": avg_long,
-                "complaint_count": frequency,
+                "rank": idx + 1,
+                "cluster_id": cluster.id,
+                "category": clean_category_name(cluster.category),
+                "location": f"{cluster.location.area_name or 'Area'}",
+                "latitude": cluster.location.latitude,
+                "longitude": cluster.location.longitude,
+                "complaint_count": cluster.frequency_count,
                 "priority_score": round(priority_score, 1),
-                "urgency": "Critical" if priority_score >= 8 else "High" if priority_score >= 5 else "Medium"
+                "urgency": urgency_label(priority_score)
             })
 
-        # Sort and rank
-        issues.sort(key=lambda x: x["priority_score"], reverse=True)
-        for idx, issue in enumerate(issues[:limit]):
-            issue["rank"] = idx + 1
-
-        return {
-            "top_issues": issues[:limit],
+        return FastJSONResponse({
+            "top_issues": issues,
             "timestamp": "2026-01-10"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/statistics")
 async def get_statistics(
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    read_db: AsyncIOMotorDatabase = Depends(get_read_database)
 ):
     """Get dashboard statistics"""
     try:
-        complaint_service = ComplaintService(db)
-        complaints = await complaint_service.get_recent_complaints(hours=72, limit=10000)
+        stats = await load_statistics(db, hours=72, read_db=read_db)
+        trend = None
+        if config.ROLLUPS_ENABLED:
+            trend = (await RollupService(db, read_db).get_trends(hours=72))["trend_direction"]
 
-        total = len(complaints)
         by_category = {}
-        for complaint in complaints:
-            cat = clean_category_name(complaint.category)
-            by_category[cat] = by_category.get(cat, 0) + 1
-
-        return {
-            "total_complaints": total,
+        for category, count in stats["by_category"].items():
+            cat = category_label(category)
+            by_category[cat] = by_category.get(cat, 0) + count
+
+        # Missing (None) and empty ward names share the "Unknown" bucket
+        by_ward = {}
+        for ward, count in stats["by_ward"].items():
+            ward = ward or "Unknown"
+            by_ward[ward] = by_ward.get(ward, 0) + count
+
+        return FastJSONResponse({
+            "total_complaints": stats["total_complaints"],
             "by_category": by_category,
+            "by_ward": by_ward,
+            "by_urgency": stats["by_urgency"],
+            "by_hour": stats["by_hour"],
+            "trend_direction": trend,
             "time_range": "72_hours"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/trends")
+async def get_trends(
+    hours: int = 24,
+    by: str = "category",
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    read_db: AsyncIOMotorDatabase = Depends(get_read_database)
+):
+    """
+    Report volume of the last `hours` complete hours against the window before
+    Overall and per category (or `by=ward`): "up", "down" or "stable"
+    """
+    if not config.ROLLUPS_ENABLED:
+        raise HTTPException(status_code=404, detail="Rollups are disabled")
+    if by not in ("category", "ward"):
+        raise HTTPException(status_code=400, detail="by must be 'category' or 'ward'")
+    try:
+        trends = await RollupService(db, read_db).get_trends(hours=hours, group_by=by)
+        name = category_label if by == "category" else (lambda ward: ward or "Unknown")
+        trends[f"by_{by}"] = {name(key): value for key, value in trends[f"by_{by}"].items()}
+        return FastJSONResponse(trends)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/tiles/{z}/{x}/{y}")
+async def get_heatmap_tile(
+    z: int,
+    x: int,
+    y: int,
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Pre-aggregated heat map cells for one slippy-map tile
+    Each cell carries its complaint count, urgency sum and dominant category
+    """
+    if not tile_index.in_range(z, x, y):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tile out of range (zoom {tile_index.min_zoom}-{tile_index.max_zoom})"
+        )
+    try:
+        await tile_index.ensure_ready(db)
+        await peer_sync.sync(db)
+
+        # Content-derived, so the tag is the same whichever worker answers
+        etag, payload = tile_index.get_tile(z, x, y)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        return FastJSONResponse(
+            payload,
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/stream")
+async def stream_dashboard_updates(request: Request):
+    """
+    Server-Sent Events stream of dashboard changes
+    Sends a `snapshot` event first, then `clusters` deltas (added, changed,
+    removed) and `counters` as complaints arrive
+    """
+    subscription = dashboard_publisher.subscribe()
+
+    async def events():
+        try:
+            yield dashboard_publisher.snapshot_event()
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=config.LIVE_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    message = b": keepalive\n\n"
+                yield dashboard_publisher.snapshot_event() if message is RESYNC else message
+        finally:
+            dashboard_publisher.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
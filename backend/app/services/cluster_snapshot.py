@@ -0,0 +1,120 @@
+"""
+Cluster Snapshot Cache
+One shared, versioned cluster computation served to every dashboard endpoint,
+and to every worker process when SHARED_STATE_DIR is set
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app import config
+from app.models import IncidentCluster
+from app.services.shared_state import shared_state
+
+SnapshotKey = Tuple[int, float, int, bool]  # (window_hours, eps_km, min_samples, by_category)
+
+
+class ClusterSnapshot:
+    """Immutable result of one clustering pass"""
+    __slots__ = ("key", "version", "clusters", "total_complaints", "computed_at", "_created")
+
+    def __init__(self, key: SnapshotKey, version: int, clusters: List[IncidentCluster], total_complaints: int):
+        self.key = key
+        self.version = version
+        # Highest priority first, shared by heatmap and top-issues
+        self.clusters = sorted(clusters, key=lambda c: c.priority_score, reverse=True)
+        self.total_complaints = total_complaints
+        self.computed_at = datetime.utcnow()
+        # Wall clock, so the age stays meaningful in the worker that unpickles it
+        self._created = time.time()
+
+    def age_seconds(self) -> float:
+        return time.time() - self._created
+
+
+class ClusterSnapshotCache:
+    """
+    TTL cache of cluster snapshots keyed by window and clustering parameters.
+
+    Concurrent misses for the same key share a single in-flight computation,
+    and invalidate() marks every cached snapshot stale after a write.
+    """
+
+    def __init__(self, ttl_seconds: float = config.SNAPSHOT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._entries: Dict[SnapshotKey, ClusterSnapshot] = {}
+        self._inflight: Dict[SnapshotKey, asyncio.Future] = {}
+        self._listeners: List[Callable[[], None]] = []
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Call back (synchronously) after every invalidation"""
+        self._listeners.append(callback)
+
+    def invalidate(self):
+        """Mark all snapshots stale; called whenever complaints are written"""
+        self.version += 1
+        if shared_state is not None:
+            shared_state.bump_version()
+        for callback in self._listeners:
+            callback()
+
+    def current_version(self) -> int:
+        """Write version across all workers when state is shared, else this process's"""
+        return shared_state.read_version() if shared_state is not None else self.version
+
+    def peek(self, key: SnapshotKey) -> Optional[ClusterSnapshot]:
+        """Cached snapshot if it is still fresh"""
+        entry = self._entries.get(key)
+        if entry is None or entry.version != self.current_version() or entry.age_seconds() > self.ttl_seconds:
+            return None
+        return entry
+
+    async def get(
+        self,
+        key: SnapshotKey,
+        compute: Callable[[], Awaitable[Tuple[List[IncidentCluster], int]]]
+    ) -> ClusterSnapshot:
+        """Return a fresh snapshot, computing it at most once per key at a time"""
+        entry = self.peek(key)
+        if entry is not None:
+            return entry
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled request does not abort the shared computation
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: SnapshotKey, compute) -> ClusterSnapshot:
+        version = self.current_version()
+
+        async def build() -> ClusterSnapshot:
+            clusters, total_complaints = await compute()
+            return ClusterSnapshot(key, version, clusters, total_complaints)
+
+        try:
+            if shared_state is None:
+                snapshot = await build()
+            else:
+                # The leader computes for every worker; followers read its blob
+                name = "clusters-{}-{}-{}-{}".format(*key)
+                snapshot = await shared_state.get_or_compute(
+                    name, version, self.ttl_seconds, build, may_publish=shared_state.is_leader
+                )
+        except asyncio.TimeoutError:
+            # An overdue recompute serves the previous snapshot rather than an error
+            stale = self._entries.get(key)
+            if stale is None:
+                raise
+            print(f"[!] Cluster recompute timed out, serving snapshot from {stale.computed_at}")
+            return stale
+        self._entries[key] = snapshot
+        return snapshot
+
+
+snapshot_cache = ClusterSnapshotCache()
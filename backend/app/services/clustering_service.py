@@ -4,21 +4,292 @@ Groups similar complaints using DBSCAN on geographic coordinates
 """
 
 from sklearn.cluster import DBSCAN
+import math
 import numpy as np
-from typing import List, Dict
-from app.models import Complaint, IncidentCluster, CategoryEnum
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from typing import List, Dict, Optional, Tuple
+from app import config
+from app.metrics import DBSCAN_LATENCY, DBSCAN_POINTS
+from app.models import Complaint, IncidentCluster, CategoryEnum, Location
+from app.services.complaint_frame import CATEGORIES, ComplaintFrame, category_code, to_datetime
+from app.services.compute_executor import ComputeCancelled, check_cancelled
 from datetime import datetime
 
+EARTH_RADIUS_KM = 6371.0
+# On the same sphere as the haversine distances, so degree boxes agree with them
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Shared worker pool for partitioned clustering"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=config.CLUSTER_WORKERS)
+    return _process_pool
+
+def _dbscan_haversine(
+    coordinates_rad: np.ndarray,
+    eps_rad: float,
+    min_samples: int,
+    weights: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    DBSCAN over [lat, lng] radians with a haversine ball tree
+    A point with weight w counts as w reports towards min_samples
+    Returns (labels, core_mask)
+    """
+    clustering = DBSCAN(
+        eps=eps_rad,
+        min_samples=min_samples,
+        metric="haversine",
+        algorithm="ball_tree"
+    )
+    labels = clustering.fit_predict(coordinates_rad, sample_weight=weights)
+    core_mask = np.zeros(len(labels), dtype=bool)
+    core_mask[clustering.core_sample_indices_] = True
+    return labels, core_mask
+
+def _cluster_tiles(tasks: List[tuple]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Process pool entry point: cluster a chunk of tiles, each including its overlap margin"""
+    return [_dbscan_haversine(*task) for task in tasks]
+
+def _pool_map(chunks: List[List[tuple]]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Cluster chunks of tiles in the process pool, results in input order.
+    Polls for cancellation so an abandoned computation stops queueing work.
+    """
+    pool = _get_process_pool()
+    futures = [pool.submit(_cluster_tiles, chunk) for chunk in chunks]
+    pending = set(futures)
+    try:
+        while pending:
+            _, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            check_cancelled()
+    except ComputeCancelled:
+        for future in pending:
+            future.cancel()
+        raise
+    return [result for future in futures for result in future.result()]
+
 class ClusteringService:
-    def __init__(self, eps_km: float = 1.0, min_samples: int = 2):
+    def __init__(
+        self,
+        eps_km: float = config.DBSCAN_EPS_KM,
+        min_samples: int = config.DBSCAN_MIN_SAMPLES,
+        partition_threshold: int = config.CLUSTER_PARTITION_THRESHOLD,
+        tile_km: float = config.CLUSTER_TILE_KM,
+        by_category: bool = config.CLUSTER_BY_CATEGORY,
+        category_params: Dict[str, Tuple[float, int]] = config.DBSCAN_CATEGORY_PARAMS
+    ):
         """
         Initialize DBSCAN clustering
-        eps_km: epsilon distance in kilometers
+        eps_km: epsilon distance in kilometers (great-circle)
         min_samples: minimum complaints to form a cluster
+        partition_threshold: point count above which tiles are clustered in parallel
+        tile_km: edge length of partition tiles in kilometers
+        by_category: cluster each category separately so incidents never mix categories
+        category_params: CategoryEnum name -> (eps_km, min_samples) overriding the defaults
         """
-        # Convert km to degrees (approx: 1 km ≈ 0.009 degrees)
-        self.eps = eps_km * 0.009
+        self.eps_km = eps_km
+        self.eps_rad = eps_km / EARTH_RADIUS_KM
         self.min_samples = min_samples
+        self.partition_threshold = partition_threshold
+        self.tile_km = tile_km
+        # Tiles must be wider than two overlap margins
+        self.tile_deg = max(tile_km, 4 * eps_km) / KM_PER_DEGREE_LAT
+        self.by_category = by_category
+        self.category_params: Dict[CategoryEnum, Tuple[float, int]] = {}
+        for name, params in category_params.items():
+            if name not in CategoryEnum.__members__:
+                raise ValueError(f"Unknown category in DBSCAN_CATEGORY_PARAMS: {name}")
+            self.category_params[CategoryEnum[name]] = params
+
+    def params_for(self, category: Optional[CategoryEnum]) -> Tuple[float, int]:
+        """(eps_km, min_samples) for one category's partition"""
+        return self.category_params.get(category, (self.eps_km, self.min_samples))
+
+    def cluster_coordinates(self, coordinates: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Label an (n, 2) array of [latitude, longitude] degrees
+        weights: optional reports per point (corroborated complaints count more)
+        Returns DBSCAN labels, -1 for noise
+        """
+        mode = "partitioned" if config.CLUSTER_WORKERS > 1 and len(coordinates) >= self.partition_threshold else "single"
+        check_cancelled()
+        DBSCAN_POINTS.observe(len(coordinates), mode)
+        with DBSCAN_LATENCY.time(mode):
+            if mode == "partitioned":
+                return self.cluster_partitioned(coordinates, weights)
+
+            task = (np.radians(coordinates), self.eps_rad, self.min_samples, weights)
+            if len(coordinates) >= config.CLUSTER_PROCESS_THRESHOLD:
+                # sklearn holds the GIL for long stretches; a worker process keeps the caller's threads responsive
+                (labels, _), = _pool_map([[task]])
+            else:
+                labels, _ = _dbscan_haversine(*task)
+            return labels
+
+    def _tile_memberships(self, coordinates: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Assign every point to its home tile and to each neighbouring tile
+        whose overlap margin it falls in.
+        Returns (tile_ids, point_indices, is_home) sorted by tile
+        """
+        lat = coordinates[:, 0]
+        lng = coordinates[:, 1]
+        rows = np.floor(lat / self.tile_deg).astype(np.int64)
+        cols = np.floor(lng / self.tile_deg).astype(np.int64)
+
+        # Margins in degrees, widened slightly; longitude degrees shrink with latitude
+        margin_lat = self.eps_km / KM_PER_DEGREE_LAT * 1.01
+        cos_lat = np.cos(np.radians(np.minimum(np.abs(lat) + margin_lat, 89.9)))
+        margin_lng = margin_lat / cos_lat
+
+        lat_offset = lat - rows * self.tile_deg
+        lng_offset = lng - cols * self.tile_deg
+        near = {
+            "row": {-1: lat_offset <= margin_lat, 0: np.ones(len(lat), dtype=bool), 1: self.tile_deg - lat_offset <= margin_lat},
+            "col": {-1: lng_offset <= margin_lng, 0: np.ones(len(lng), dtype=bool), 1: self.tile_deg - lng_offset <= margin_lng},
+        }
+
+        tile_rows, tile_cols, indices, homes = [], [], [], []
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                mask = near["row"][dr] & near["col"][dc]
+                idx = np.nonzero(mask)[0]
+                tile_rows.append(rows[idx] + dr)
+                tile_cols.append(cols[idx] + dc)
+                indices.append(idx)
+                homes.append(np.full(len(idx), dr == 0 and dc == 0))
+
+        tile_rows = np.concatenate(tile_rows)
+        tile_cols = np.concatenate(tile_cols)
+        indices = np.concatenate(indices)
+        homes = np.concatenate(homes)
+
+        order = np.lexsort((tile_cols, tile_rows))
+        tile_keys = np.stack([tile_rows[order], tile_cols[order]], axis=1)
+        _, tile_ids = np.unique(tile_keys, axis=0, return_inverse=True)
+        return tile_ids.ravel(), indices[order], homes[order]
+
+    def cluster_partitioned(self, coordinates: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Geo-partitioned DBSCAN: cluster overlapping tiles in a process pool,
+        then stitch clusters that share core points across tile edges.
+        Produces the same partition as a single DBSCAN pass (border points
+        reachable from two clusters may land in either, as with DBSCAN itself).
+        """
+        n = len(coordinates)
+        coordinates_rad = np.radians(coordinates)
+        tile_ids, indices, homes = self._tile_memberships(coordinates)
+
+        bounds = np.flatnonzero(np.diff(tile_ids)) + 1
+        tile_slices = np.split(np.arange(len(indices)), bounds)
+        tasks = [
+            (coordinates_rad[indices[s]], self.eps_rad, self.min_samples, None if weights is None else weights[indices[s]])
+            for s in tile_slices
+        ]
+        chunksize = max(1, len(tasks) // (4 * config.CLUSTER_WORKERS))
+        results = _pool_map([tasks[start:start + chunksize] for start in range(0, len(tasks), chunksize)])
+
+        # Give every (tile, local label) pair a global node id
+        member_node = np.empty(len(indices), dtype=np.int64)
+        member_core = np.empty(len(indices), dtype=bool)
+        offset = 0
+        for s, (labels, core_mask) in zip(tile_slices, results):
+            member_node[s] = np.where(labels >= 0, labels + offset, -1)
+            member_core[s] = core_mask
+            offset += labels.max() + 1 if len(labels) else 0
+
+        if offset == 0:
+            return np.full(n, -1, dtype=np.int64)
+
+        # Core status is exact in the home tile, whose margin holds every neighbour
+        home_node = np.full(n, -1, dtype=np.int64)
+        home_core = np.zeros(n, dtype=bool)
+        home_node[indices[homes]] = member_node[homes]
+        home_core[indices[homes]] = member_core[homes]
+
+        # A true core point links every tile cluster it appears in
+        link = (member_node >= 0) & home_core[indices]
+        graph = coo_matrix(
+            (np.ones(link.sum()), (member_node[link], home_node[indices[link]])),
+            shape=(offset, offset)
+        )
+        _, component = connected_components(graph, directed=False)
+
+        node = home_node.copy()
+        # Border points may only be reached from a neighbouring tile
+        orphan = (node < 0) & ~home_core
+        labelled = member_node >= 0
+        candidates = labelled & orphan[indices]
+        node[indices[candidates]] = member_node[candidates]
+
+        labels = np.full(n, -1, dtype=np.int64)
+        assigned = node >= 0
+        _, labels[assigned] = np.unique(component[node[assigned]], return_inverse=True)
+        return labels
+
+    def cluster_by_category(
+        self,
+        coordinates: np.ndarray,
+        categories: np.ndarray,
+        weights: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Cluster each category's points separately, with that category's
+        eps/min_samples. Above CLUSTER_PROCESS_THRESHOLD points the category
+        partitions run side by side in the process pool; a category above
+        the partition threshold is itself tiled.
+        categories: codes into CATEGORIES, -1 for uncategorised
+        Returns labels unique across categories, -1 for noise
+        """
+        n = len(coordinates)
+        codes, inverse = np.unique(categories, return_inverse=True)
+        partitions = []
+        for position, code in enumerate(codes):
+            eps_km, min_samples = self.params_for(CATEGORIES[code] if code >= 0 else None)
+            partitions.append((np.flatnonzero(inverse == position), eps_km, min_samples))
+
+        parallel = config.CLUSTER_WORKERS > 1 and n >= config.CLUSTER_PROCESS_THRESHOLD
+        check_cancelled()
+        DBSCAN_POINTS.observe(n, "category")
+        with DBSCAN_LATENCY.time("category"):
+            results: Dict[int, np.ndarray] = {}
+            tasks = {}
+            for i, (members, eps_km, min_samples) in enumerate(partitions):
+                member_weights = None if weights is None else weights[members]
+                if parallel and len(members) >= self.partition_threshold:
+                    tiled = ClusteringService(
+                        eps_km, min_samples, self.partition_threshold, self.tile_km, by_category=False, category_params={}
+                    )
+                    results[i] = tiled.cluster_partitioned(coordinates[members], member_weights)
+                else:
+                    tasks[i] = (np.radians(coordinates[members]), eps_km / EARTH_RADIUS_KM, min_samples, member_weights)
+
+            if parallel:
+                # One chunk per category so the pool clusters them concurrently
+                outputs = _pool_map([[task] for task in tasks.values()])
+            else:
+                outputs = []
+                for task in tasks.values():
+                    check_cancelled()
+                    outputs.append(_dbscan_haversine(*task))
+            for i, (partition_labels, _) in zip(tasks, outputs):
+                results[i] = partition_labels
+
+        labels = np.full(n, -1, dtype=np.int64)
+        offset = 0
+        for i, (members, _, _) in enumerate(partitions):
+            partition_labels = results[i]
+            clustered = partition_labels >= 0
+            labels[members[clustered]] = partition_labels[clustered] + offset
+            offset += int(partition_labels.max()) + 1 if clustered.any() else 0
+        return labels
 
     def cluster_complaints(
         self,
@@ -27,10 +298,16 @@ class ClusteringService:
     ) -> Dict[int, List[Complaint]]:
         """
         Cluster complaints by geographic proximity
+        category: only cluster complaints of this category, with its parameters
         Returns dict: {cluster_id: [complaints]}
         """
-        if len(complaints) < self.min_samples:
+        if category is not None:
+            complaints = [c for c in complaints if c.category == category]
+        by_category = self.by_category or category is not None
+        if not by_category and len(complaints) < self.min_samples:
             return {0: complaints}
+        if not complaints:
+            return {}
 
         # Extract coordinates
         coordinates = np.array([
@@ -39,8 +316,11 @@ class ClusteringService:
         ])
 
         # Apply DBSCAN
-        clustering = DBSCAN(eps=self.eps, min_samples=self.min_samples)
-        labels = clustering.fit_predict(coordinates)
+        if by_category:
+            codes = np.array([category_code(c.category) for c in complaints], dtype=np.int16)
+            labels = self.cluster_by_category(coordinates, codes)
+        else:
+            labels = self.cluster_coordinates(coordinates)
 
         # Group complaints by cluster
         clusters = {}
@@ -51,31 +331,145 @@ class ClusteringService:
 
         return clusters
 
+    def cluster_frame(self, frame: ComplaintFrame) -> np.ndarray:
+        """Cluster a columnar frame; returns one label per row"""
+        if self.by_category:
+            return self.cluster_by_category(frame.coordinates(), frame.category, frame.weight)
+        if len(frame) < self.min_samples:
+            return np.zeros(len(frame), dtype=np.int64)
+        return self.cluster_coordinates(frame.coordinates(), frame.weight)
+
+    def build_incident_clusters_from_frame(self, frame: ComplaintFrame, labels: np.ndarray) -> List[IncidentCluster]:
+        """
+        Aggregate every non-noise cluster of a frame in vectorised passes
+        Only the final IncidentCluster construction is per cluster
+        """
+        keep = labels >= 0
+        if not keep.any():
+            return []
+        rows = frame.take(keep)
+        label = labels[keep]
+        n = int(label.max()) + 1
+
+        # Complaint documents per cluster, and reports including corroborations
+        members = np.bincount(label, minlength=n)
+        counts = np.bincount(label, weights=rows.weight, minlength=n).round().astype(np.int64)
+        reports = np.maximum(counts, 1)
+        mean_lat = np.bincount(label, weights=rows.latitude * rows.weight, minlength=n) / reports
+        mean_lng = np.bincount(label, weights=rows.longitude * rows.weight, minlength=n) / reports
+        mean_urgency = np.bincount(label, weights=rows.urgency * rows.weight, minlength=n) / reports
+
+        ts = rows.timestamp.astype(np.int64)
+        first = np.full(n, np.iinfo(np.int64).max)
+        np.minimum.at(first, label, ts)
+        last = np.full(n, np.iinfo(np.int64).min)
+        np.maximum.at(last, label, ts)
+        priorities = self.score_priorities(
+            counts, mean_urgency, first.astype("datetime64[ms]"), last.astype("datetime64[ms]")
+        )
+
+        # Per-cluster category histogram and most frequent category
+        categorised = rows.category >= 0
+        histogram = np.zeros((n, len(CATEGORIES)), dtype=np.float64)
+        np.add.at(histogram, (label[categorised], rows.category[categorised]), rows.weight[categorised])
+        dominant = histogram.argmax(axis=1)
+
+        # Latest complaint of each cluster supplies ward and area name
+        order = np.lexsort((ts, label))
+        latest = order[np.searchsorted(label[order], np.arange(n), side="right") - 1]
+
+        # Member ids grouped by cluster
+        by_label = np.argsort(label, kind="stable")
+        member_ids = np.split(rows.ids[by_label], np.cumsum(members)[:-1])
+
+        incidents = []
+        for cid in np.flatnonzero(members):
+            if len(incidents) % 1000 == 0:
+                check_cancelled()
+            frequency = int(counts[cid])
+            avg_urgency = float(mean_urgency[cid])
+            present = np.flatnonzero(histogram[cid])
+            category = CATEGORIES[dominant[cid]] if len(present) else CategoryEnum.OTHERS
+            incidents.append(IncidentCluster(
+                _id=str(cid),
+                category=category,
+                categories=[CATEGORIES[code] for code in present],
+                location=Location(
+                    latitude=float(mean_lat[cid]),
+                    longitude=float(mean_lng[cid]),
+                    ward=rows.ward[latest[cid]],
+                    area_name=rows.area_name[latest[cid]]
+                ),
+                complaint_ids=member_ids[cid].tolist(),
+                frequency_count=frequency,
+                average_urgency_score=avg_urgency,
+                priority_score=float(priorities[cid]),
+                cluster_summary=self.format_cluster_summary(frequency, category, avg_urgency),
+                first_report_time=to_datetime(np.datetime64(int(first[cid]), "ms")),
+                last_report_time=to_datetime(rows.timestamp[latest[cid]])
+            ))
+        return incidents
+
     def generate_cluster_summary(self, complaints: List[Complaint]) -> str:
         """Generate text summary of cluster"""
         if not complaints:
             return "Empty cluster"
 
-        category = complaints[0].category or "Unknown"
+        count = len(complaints)
+        avg_urgency = sum(c.urgency_score or 0 for c in complaints) / count
+        return self.format_cluster_summary(count, complaints[0].category, avg_urgency)
+
+    def format_cluster_summary(self, count: int, category, avg_urgency: float) -> str:
+        """Format cluster summary text from aggregate values"""
+        category = category or "Unknown"
         # Clean category name if it's an enum
         if "CategoryEnum." in str(category):
             category = str(category).split("CategoryEnum.")[1].replace("_", " ").title()
         else:
             category = str(category).replace("_", " ").title()
-        
-        count = len(complaints)
-        avg_urgency = sum(c.urgency_score or 0 for c in complaints) / count
 
         return f"{count} reports of {category} in this area (Avg urgency: {avg_urgency:.1f}/10)"
 
+    def build_incident_cluster(self, cluster_id: str, complaints: List[Complaint]) -> IncidentCluster:
+        """Aggregate a group of clustered complaints into an IncidentCluster"""
+        frequency = len(complaints)
+        avg_urgency = sum(c.urgency_score or 0 for c in complaints) / frequency
+        category_counts = Counter(c.category for c in complaints if c.category)
+        category = category_counts.most_common(1)[0][0] if category_counts else CategoryEnum.OTHERS
+        latest = max(complaints, key=lambda c: c.timestamp)
+        timestamps = [c.timestamp for c in complaints]
+
+        return IncidentCluster(
+            _id=cluster_id,
+            category=category,
+            categories=sorted(category_counts),
+            location=Location(
+                latitude=sum(c.location.latitude for c in complaints) / frequency,
+                longitude=sum(c.location.longitude for c in complaints) / frequency,
+                ward=latest.location.ward,
+                area_name=latest.location.area_name
+            ),
+            complaint_ids=[c.id for c in complaints if c.id],
+            frequency_count=frequency,
+            average_urgency_score=avg_urgency,
+            priority_score=self.calculate_priority_score(
+                frequency=frequency,
+                sentiment=avg_urgency,
+                duration_hours=(max(timestamps) - min(timestamps)).total_seconds() / 3600
+            ),
+            cluster_summary=self.format_cluster_summary(frequency, category, avg_urgency),
+            first_report_time=min(timestamps),
+            last_report_time=max(timestamps)
+        )
+
     def calculate_priority_score(
         self,
         frequency: int,
         sentiment: float,
-        duration_hours: int,
-        wf: float = 0.5,
-        ws: float = 0.3,
-        wd: float = 0.2
+        duration_hours: float,
+        wf: float = config.PRIORITY_WEIGHT_FREQUENCY,
+        ws: float = config.PRIORITY_WEIGHT_SENTIMENT,
+        wd: float = config.PRIORITY_WEIGHT_DURATION
     ) -> float:
         """
         Calculate priority score using weighted formula
@@ -93,3 +487,31 @@ class ClusteringService:
         )
 
         return min(priority, 10)  # Cap at 10
+
+    def score_priorities(
+        self,
+        frequency: np.ndarray,
+        mean_urgency: np.ndarray,
+        first_report: np.ndarray,
+        last_report: np.ndarray,
+        weights: Optional[Tuple[float, float, float]] = None
+    ) -> np.ndarray:
+        """
+        Vectorised calculate_priority_score for many clusters at once
+        Duration is the span between each cluster's first and last report
+        weights: (wf, ws, wd), defaulting to the configured weights
+        """
+        wf, ws, wd = weights or (
+            config.PRIORITY_WEIGHT_FREQUENCY,
+            config.PRIORITY_WEIGHT_SENTIMENT,
+            config.PRIORITY_WEIGHT_DURATION
+        )
+        span = np.asarray(last_report, dtype="datetime64[ms]") - np.asarray(first_report, dtype="datetime64[ms]")
+        duration_hours = span.astype(np.int64) / 3_600_000
+
+        priority = (
+            np.minimum(np.asarray(frequency, dtype=np.float64) / 10, 10) * wf +
+            np.asarray(mean_urgency, dtype=np.float64) * ws +
+            np.minimum(duration_hours / 24, 10) * wd
+        )
+        return np.minimum(priority, 10)
@@ -0,0 +1,109 @@
+"""
+Columnar Complaint Frame
+Lightweight NumPy column store for dashboard computations, decoded
+straight from projected MongoDB documents without pydantic models
+"""
+
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from app.models import CategoryEnum
+
+# Category codes index into this list; -1 means uncategorised
+CATEGORIES: List[CategoryEnum] = list(CategoryEnum)
+_CATEGORY_CODES = {category.value: code for code, category in enumerate(CATEGORIES)}
+
+
+def category_code(category) -> int:
+    """Code of a category (enum member or value), -1 if missing or unknown"""
+    return _CATEGORY_CODES.get(category, -1)
+
+
+# Projection covering every column of the frame
+FRAME_PROJECTION = {
+    "location.latitude": 1,
+    "location.longitude": 1,
+    "location.ward": 1,
+    "location.area_name": 1,
+    "category": 1,
+    "urgency_score": 1,
+    "timestamp": 1,
+    "corroborations": 1,
+}
+
+
+class ComplaintFrame:
+    """Parallel arrays, one row per complaint"""
+    __slots__ = ("ids", "latitude", "longitude", "category", "urgency", "timestamp", "ward", "area_name", "weight")
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        category: np.ndarray,
+        urgency: np.ndarray,
+        timestamp: np.ndarray,
+        ward: np.ndarray,
+        area_name: np.ndarray,
+        weight: np.ndarray
+    ):
+        self.ids = ids                # object (str)
+        self.latitude = latitude      # float64 degrees
+        self.longitude = longitude    # float64 degrees
+        self.category = category      # int16 code into CATEGORIES, -1 if missing
+        self.urgency = urgency        # float64, 0 if missing
+        self.timestamp = timestamp    # datetime64[ms], UTC
+        self.ward = ward              # object (str or None)
+        self.area_name = area_name    # object (str or None)
+        self.weight = weight          # float64 reports per row: 1 + corroborations
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[dict]) -> "ComplaintFrame":
+        """Decode projected complaint documents column by column"""
+        ids, lat, lng, cat, urg, ts, ward, area, weight = [], [], [], [], [], [], [], [], []
+        codes = _CATEGORY_CODES
+        for document in documents:
+            location = document.get("location") or {}
+            ids.append(str(document["_id"]))
+            lat.append(location.get("latitude", np.nan))
+            lng.append(location.get("longitude", np.nan))
+            ward.append(location.get("ward"))
+            area.append(location.get("area_name"))
+            cat.append(codes.get(document.get("category"), -1))
+            urg.append(document.get("urgency_score") or 0)
+            ts.append(document.get("timestamp"))
+            weight.append(1 + (document.get("corroborations") or 0))
+
+        return cls(
+            ids=np.array(ids, dtype=object),
+            latitude=np.array(lat, dtype=np.float64),
+            longitude=np.array(lng, dtype=np.float64),
+            category=np.array(cat, dtype=np.int16),
+            urgency=np.array(urg, dtype=np.float64),
+            timestamp=np.array(ts, dtype="datetime64[ms]"),
+            ward=np.array(ward, dtype=object),
+            area_name=np.array(area, dtype=object),
+            weight=np.array(weight, dtype=np.float64),
+        )
+
+    def coordinates(self) -> np.ndarray:
+        """(n, 2) array of [latitude, longitude]"""
+        return np.column_stack([self.latitude, self.longitude])
+
+    def take(self, mask: np.ndarray) -> "ComplaintFrame":
+        """Rows selected by a boolean mask or index array"""
+        return ComplaintFrame(*(getattr(self, column)[mask] for column in self.__slots__))
+
+    def category_at(self, code: int) -> Optional[CategoryEnum]:
+        return CATEGORIES[code] if code >= 0 else None
+
+
+def to_datetime(value: np.datetime64) -> datetime:
+    """Naive UTC datetime from a datetime64 scalar"""
+    return value.astype("datetime64[us]").astype(datetime)
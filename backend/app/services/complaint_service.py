@@ -4,21 +4,240 @@ CRUD operations and geospatial queries
 """
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from app.models import Complaint, CategoryEnum
-from typing import List, Optional
+from app import config
+from app.models import Complaint, CategoryEnum, UrgencyLevel
+from app.services.cluster_snapshot import snapshot_cache
+from app.services.complaint_frame import FRAME_PROJECTION, ComplaintFrame
+from app.services.compute_executor import compute_executor
+from app.services.duplicate_index import duplicate_index
+from app.services.incremental_clustering import clustering_engine
+from app.services.tile_index import tile_index
+from app.services.window_store import window_store
+from app.services.write_behind import write_behind_queue
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from datetime import datetime, timedelta
+import base64
+import json
+
+# Urgency score (1-10) bands, checked from the top down
+URGENCY_BANDS = [
+    (9, UrgencyLevel.CRITICAL),
+    (7, UrgencyLevel.HIGH),
+    (4, UrgencyLevel.MEDIUM),
+]
+
+HOUR_FORMAT = "%Y-%m-%dT%H:00:00Z"
+
+
+class WriteFailure(str):
+    """Per-document write error message, carrying the server's error code"""
+
+    def __new__(cls, message: str, code: Optional[int] = None):
+        failure = super().__new__(cls, message)
+        failure.code = code
+        return failure
+
+
+# Indexes ensured at startup
+COMPLAINT_INDEXES = [
+    IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+    # Keyset pagination order; its timestamp prefix serves time-window scans
+    IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)], name="timestamp_id_desc"),
+    IndexModel([("category", ASCENDING), ("timestamp", DESCENDING)], name="category_timestamp"),
+    # Lets other workers pick up corroborations of complaints they already hold
+    IndexModel([("last_corroborated_at", DESCENDING)], name="last_corroborated_at", sparse=True),
+]
+
+# Reports a complaint document stands for: itself plus folded-in duplicates
+REPORTS_EXPR = {"$add": [1, {"$ifNull": ["$corroborations", 0]}]}
+
+# location_2dsphere treated {latitude, longitude} as a coordinate pair in the
+# wrong order; timestamp_desc is a prefix of timestamp_id_desc
+LEGACY_INDEXES = ["location_2dsphere", "timestamp_desc"]
+
+# Flat column layout for exports: (column name, dotted document path)
+EXPORT_FIELDS = [
+    ("id", "_id"),
+    ("timestamp", "timestamp"),
+    ("category", "category"),
+    ("urgency_score", "urgency_score"),
+    ("sentiment_score", "sentiment_score"),
+    ("latitude", "location.latitude"),
+    ("longitude", "location.longitude"),
+    ("ward", "location.ward"),
+    ("area_name", "location.area_name"),
+    ("text", "text"),
+    ("original_language", "original_language"),
+    ("citizen_id", "citizen_id"),
+    ("voice_transcription", "voice_transcription"),
+    ("corroborations", "corroborations"),
+]
+
+def geo_point(latitude: float, longitude: float) -> Optional[dict]:
+    """GeoJSON point for a location, or None if the coordinates are out of range"""
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+def _to_millis(value: datetime) -> int:
+    return int((value - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+
+def _from_millis(value: int) -> datetime:
+    return datetime(1970, 1, 1) + timedelta(milliseconds=value)
+
+
+def encode_cursor(timestamp: datetime, complaint_id: ObjectId, cutoff: datetime) -> str:
+    """Opaque continuation token after (timestamp, _id) within a fixed window"""
+    payload = json.dumps([_to_millis(timestamp), str(complaint_id), _to_millis(cutoff)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, ObjectId, datetime]:
+    """Inverse of encode_cursor; raises ValueError on a malformed token"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        timestamp, complaint_id, cutoff = json.loads(base64.urlsafe_b64decode(padded))
+        return _from_millis(timestamp), ObjectId(complaint_id), _from_millis(cutoff)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
 
 class ComplaintService:
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: AsyncIOMotorDatabase, read_db: Optional[AsyncIOMotorDatabase] = None):
         self.db = db
         self.collection = db.complaints
+        # Listings, exports and aggregations may be served by secondaries;
+        # writes and by-id lookups (read-your-writes) stay on the primary
+        self.read_collection = (read_db if read_db is not None else db).complaints
+
+    def _to_document(self, complaint: Complaint) -> dict:
+        """MongoDB document for a complaint"""
+        # Persist full document including generated timestamp
+        document = complaint.model_dump(by_alias=True, exclude_none=True)
+        if "_id" in document:
+            document["_id"] = ObjectId(document["_id"])
+        # GeoJSON copy of the location for the 2dsphere index
+        geo = geo_point(complaint.location.latitude, complaint.location.longitude)
+        if geo:
+            document["geo"] = geo
+        return document
+
+    async def _after_insert(self, stored: List[Tuple[str, Complaint]]):
+        """
+        Propagate newly stored complaints to derived state. The complaints are
+        already committed, so a failure here is logged rather than raised:
+        callers must not report (and clients must not retry) a stored write.
+        """
+        if not stored:
+            return
+        snapshot_cache.invalidate()
+
+        try:
+            # Count into heat map tiles; ids already loaded by warm-up are skipped
+            for complaint_id, complaint in stored:
+                tile_index.add_complaint(complaint_id, complaint)
+                duplicate_index.add(complaint_id, complaint)
+                window_store.add(complaint_id, complaint)
+
+            # Keep live incident clusters current
+            if clustering_engine.ready:
+                await clustering_engine.add_complaints(self.db, stored)
+        except Exception as e:
+            print(f"[!] Derived state update failed for {len(stored)} complaints: {e}")
+
+        await self._record_rollups([complaint for _, complaint in stored])
+
+    async def _record_rollups(self, complaints: List[Complaint]):
+        """Count reports into hourly rollups; a failure only skews them until the next rebuild"""
+        if not config.ROLLUPS_ENABLED:
+            return
+        from app.services.rollup_service import RollupService
+
+        try:
+            await RollupService(self.db).record(RollupService.rows_for(complaints))
+        except Exception as e:
+            print(f"[!] Rollup update failed: {e}")
+
+    async def submit_complaint(self, complaint: Complaint) -> Tuple[str, bool]:
+        """
+        Store a citizen report, or fold it into a near-duplicate filed nearby
+        Returns (complaint id, whether it corroborated an existing complaint)
+        """
+        match = duplicate_index.find(complaint)
+        if match is not None and await self.corroborate(match, complaint):
+            return match, True
+        return await self.create_complaint(complaint), False
+
+    async def corroborate(self, complaint_id: str, report: Complaint) -> bool:
+        """Count a duplicate report against an existing complaint; False if it no longer exists"""
+        document = await self.collection.find_one_and_update(
+            {"_id": ObjectId(complaint_id)},
+            {"$inc": {"corroborations": 1}, "$max": {"last_corroborated_at": report.timestamp}},
+            projection={"corroborations": 1, "text": 1, "timestamp": 1, "location": 1, "category": 1, "urgency_score": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if document is None:
+            duplicate_index.remove(complaint_id)
+            return False
+
+        weight = 1 + document["corroborations"]
+        snapshot_cache.invalidate()
+        tile_index.set_weight(complaint_id, weight)
+        window_store.set_weight(complaint_id, document["corroborations"])
+        if clustering_engine.ready:
+            await clustering_engine.set_weight(self.db, complaint_id, weight)
+
+        # One more report in the original complaint's bucket, as a rebuild would count it
+        document["_id"] = complaint_id
+        original = Complaint(**document).model_copy(update={"corroborations": 0})
+        await self._record_rollups([original])
+        return True
 
     async def create_complaint(self, complaint: Complaint) -> str:
         """Create new complaint"""
-        # Persist full document including generated timestamp
-        complaint_dict = complaint.model_dump(by_alias=True, exclude_none=True)
-        result = await self.collection.insert_one(complaint_dict)
-        return str(result.inserted_id)
+        if write_behind_queue.running:
+            # Stored by the next batched flush; the id is final already
+            return await write_behind_queue.enqueue(complaint)
+
+        result = await self.collection.insert_one(self._to_document(complaint))
+        complaint_id = str(result.inserted_id)
+        await self._after_insert([(complaint_id, complaint)])
+        return complaint_id
+
+    async def create_complaints(self, complaints: List[Complaint]) -> Tuple[List[Optional[str]], Dict[int, str]]:
+        """
+        Insert a batch of complaints with one unordered insert_many
+        Returns (ids aligned with input, None where rejected), {index: error}
+        """
+        if not complaints:
+            return [], {}
+
+        documents = [self._to_document(c) for c in complaints]
+        errors: Dict[int, str] = {}
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                errors[write_error["index"]] = WriteFailure(
+                    write_error.get("errmsg", "write failed"), write_error.get("code")
+                )
+
+        # insert_many assigns _id to each document before sending
+        ids = [
+            None if idx in errors else str(document["_id"])
+            for idx, document in enumerate(documents)
+        ]
+        await self._after_insert([
+            (complaint_id, complaint)
+            for complaint_id, complaint in zip(ids, complaints)
+            if complaint_id is not None
+        ])
+        return ids, errors
 
     async def get_complaint_by_id(self, complaint_id: str) -> Optional[Complaint]:
         """Get complaint by ID"""
@@ -32,29 +251,36 @@ class ComplaintService:
         self,
         latitude: float,
         longitude: float,
-        radius_km: float = 1.0
-    ) -> List[Complaint]:
+        radius_km: Optional[float] = 1.0,
+        limit: int = 100,
+        hours: Optional[float] = None
+    ) -> List[Tuple[Complaint, float]]:
         """
-        Get complaints within radius of location (in km)
-        Uses geospatial query
-        """
-        # Convert km to radians (Earth radius = 6371 km)
-        radius_radians = radius_km / 6371.0
-
-        complaints = await self.collection.find({
-            "location": {
-                "$near": {
-                    "$geometry": {
-                        "type": "Point",
-                        "coordinates": [longitude, latitude]
-                    },
-                    "$maxDistance": radius_radians
-                }
-            }
-        }).to_list(length=100)
+        Get complaints near a location, nearest first, with distance in km
+        Radius mode when radius_km is set, otherwise the `limit` nearest
+        hours: only complaints this recent; served from memory when the window store covers it
+        """
+        if hours is not None and window_store.covers(hours):
+            return window_store.nearby(latitude, longitude, radius_km, limit, hours)
+
+        geo_near = {
+            "near": {"type": "Point", "coordinates": [longitude, latitude]},
+            "key": "geo",
+            "distanceField": "distance_m",
+            "spherical": True,
+        }
+        if radius_km is not None:
+            geo_near["maxDistance"] = radius_km * 1000  # metres for GeoJSON points
+        if hours is not None:
+            geo_near["query"] = {"timestamp": {"$gte": datetime.utcnow() - timedelta(hours=hours)}}
+
+        complaints = await self.read_collection.aggregate([
+            {"$geoNear": geo_near},
+            {"$limit": limit},
+        ]).to_list(length=limit)
 
         return [
-            Complaint(**{**c, "_id": str(c.get("_id"))})
+            (Complaint(**{**c, "_id": str(c.get("_id"))}), c["distance_m"] / 1000)
             for c in complaints
         ]
 
@@ -64,7 +290,7 @@ class ComplaintService:
         limit: int = 50
     ) -> List[Complaint]:
         """Get complaints by category"""
-        complaints = await self.collection.find({
+        complaints = await self.read_collection.find({
             "category": category
         }).limit(limit).to_list(length=limit)
 
@@ -73,28 +299,250 @@ class ComplaintService:
             for c in complaints
         ]
 
-    async def get_recent_complaints(self, hours: int = 24, limit: int = 100) -> List[Complaint]:
-        """Get recent complaints"""
-        from datetime import datetime, timedelta
+    async def get_recent_complaints(
+        self,
+        hours: int = 24,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Complaint], Optional[str]]:
+        """
+        Get recent complaints, newest first, one page at a time
+        Keyset pagination on (timestamp, _id): pass the returned cursor to
+        continue; the time window is fixed by the first page
+        """
+        limit = max(1, min(limit, config.COMPLAINTS_PAGE_MAX))
+        if cursor:
+            last_timestamp, last_id, cutoff_time = decode_cursor(cursor)
+            query = {
+                "timestamp": {"$gte": cutoff_time},
+                "$or": [
+                    {"timestamp": {"$lt": last_timestamp}},
+                    {"timestamp": last_timestamp, "_id": {"$lt": last_id}},
+                ],
+            }
+        else:
+            # Truncate to BSON's millisecond precision so the token round-trips
+            cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+            cutoff_time = cutoff_time.replace(microsecond=cutoff_time.microsecond // 1000 * 1000)
+            query = {"timestamp": {"$gte": cutoff_time}}
 
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        complaints = await self.collection.find({
-            "timestamp": {"$gte": cutoff_time}
-        }).sort("timestamp", -1).limit(limit).to_list(length=limit)
+        # One extra row tells whether another page exists
+        complaints = await self.read_collection.find(query).sort(
+            [("timestamp", DESCENDING), ("_id", DESCENDING)]
+        ).limit(limit + 1).to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(complaints) > limit:
+            complaints = complaints[:limit]
+            last = complaints[-1]
+            next_cursor = encode_cursor(last["timestamp"], last["_id"], cutoff_time)
 
         return [
             Complaint(**{**c, "_id": str(c.get("_id"))})
             for c in complaints
+        ], next_cursor
+
+    async def iter_export_rows(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        category: Optional[CategoryEnum] = None,
+        ward: Optional[str] = None,
+        batch_size: int = 2000
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Stream flat export rows in batches straight from the cursor
+        Projected to EXPORT_FIELDS; no sort so the first batch returns immediately
+        """
+        query = {}
+        if start or end:
+            query["timestamp"] = {}
+            if start:
+                query["timestamp"]["$gte"] = start
+            if end:
+                query["timestamp"]["$lt"] = end
+        if category:
+            query["category"] = category.value
+        if ward:
+            query["location.ward"] = ward
+
+        projection = {path: 1 for _, path in EXPORT_FIELDS}
+        cursor = self.read_collection.find(query, projection, batch_size=batch_size)
+
+        batch = []
+        async for document in cursor:
+            row = {}
+            for column, path in EXPORT_FIELDS:
+                value = document
+                for part in path.split("."):
+                    value = value.get(part) if isinstance(value, dict) else None
+                row[column] = value
+            row["id"] = str(row["id"])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _window_match(self, hours: int) -> dict:
+        """$match stage selecting complaints from the last `hours` hours"""
+        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+        return {"$match": {"timestamp": {"$gte": cutoff_time}}}
+
+    def _group_counts(self, key) -> List[dict]:
+        """Pipeline stages counting reports (complaints plus corroborations) per key expression"""
+        return [
+            {"$group": {"_id": key, "count": {"$sum": REPORTS_EXPR}}},
+            {"$sort": {"_id": 1}},
         ]
 
+    def _urgency_band_expr(self) -> dict:
+        """Aggregation expression mapping urgency_score to an UrgencyLevel band"""
+        return {
+            "$switch": {
+                "branches": [
+                    {"case": {"$gte": [{"$ifNull": ["$urgency_score", 0]}, floor]}, "then": level.value}
+                    for floor, level in URGENCY_BANDS
+                ],
+                "default": UrgencyLevel.LOW.value
+            }
+        }
+
+    async def _aggregate_counts(self, hours: int, key) -> Dict[str, int]:
+        pipeline = [self._window_match(hours), *self._group_counts(key)]
+        rows = await self.read_collection.aggregate(pipeline).to_list(length=None)
+        return {row["_id"]: row["count"] for row in rows}
+
+    async def count_by_category(self, hours: int = 24) -> Dict[str, int]:
+        """Complaint counts per category"""
+        return await self._aggregate_counts(hours, "$category")
+
+    async def count_by_ward(self, hours: int = 24) -> Dict[str, int]:
+        """Complaint counts per ward"""
+        return await self._aggregate_counts(hours, "$location.ward")
+
+    async def count_by_urgency_band(self, hours: int = 24) -> Dict[str, int]:
+        """Complaint counts per urgency band (Low/Medium/High/Critical)"""
+        return await self._aggregate_counts(hours, self._urgency_band_expr())
+
+    async def count_by_hour(self, hours: int = 24) -> Dict[str, int]:
+        """Complaint counts per UTC hour bucket"""
+        return await self._aggregate_counts(
+            hours, {"$dateToString": {"format": HOUR_FORMAT, "date": "$timestamp"}}
+        )
+
+    async def get_statistics(self, hours: int = 24) -> dict:
+        """
+        All dashboard counters in one round-trip using $facet
+        Only the grouped counts leave the database
+        """
+        pipeline = [
+            self._window_match(hours),
+            {"$facet": {
+                "total": [{"$group": {"_id": None, "count": {"$sum": REPORTS_EXPR}}}],
+                "by_category": self._group_counts("$category"),
+                "by_ward": self._group_counts("$location.ward"),
+                "by_urgency": self._group_counts(self._urgency_band_expr()),
+                "by_hour": self._group_counts(
+                    {"$dateToString": {"format": HOUR_FORMAT, "date": "$timestamp"}}
+                ),
+            }},
+        ]
+        result = await self.read_collection.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
+
+        total = facets.get("total") or [{"count": 0}]
+        return {
+            "total_complaints": total[0]["count"],
+            **{
+                name: {row["_id"]: row["count"] for row in facets.get(name, [])}
+                for name in ("by_category", "by_ward", "by_urgency", "by_hour")
+            }
+        }
+
+    async def get_recent_frame(self, hours: int = 24, limit: Optional[int] = None) -> ComplaintFrame:
+        """Recent complaints as a columnar frame (projected, no pydantic decoding)"""
+        if window_store.covers(hours):
+            return window_store.frame(hours, limit)
+        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+        cursor = self.read_collection.find(
+            {"timestamp": {"$gte": cutoff_time}}, FRAME_PROJECTION
+        ).sort("timestamp", -1)
+        if limit:
+            cursor = cursor.limit(limit)
+        documents = await cursor.to_list(length=limit)
+        # Decoding tens of thousands of rows is CPU work; keep it off the event loop
+        return await compute_executor.run(ComplaintFrame.from_documents, documents)
+
     async def update_complaint(self, complaint_id: str, update_data: dict) -> bool:
         """Update complaint"""
-        result = await self.collection.update_one(
-            {"_id": ObjectId(complaint_id)},
-            {"$set": update_data}
-        )
-        return result.modified_count > 0
+        update = {"$set": update_data}
+        location = update_data.get("location")
+        if location is not None:
+            # Keep the GeoJSON copy in step with a replaced location; without a
+            # valid point the old one must go, or geo queries find the old spot
+            location = location if isinstance(location, dict) else location.model_dump()
+            geo = geo_point(location["latitude"], location["longitude"])
+            update["$set"] = {**update_data, "location": location}
+            if geo:
+                update["$set"]["geo"] = geo
+            else:
+                update["$unset"] = {"geo": ""}
+        result = await self.collection.update_one({"_id": ObjectId(complaint_id)}, update)
+        modified = result.modified_count > 0
+        if modified:
+            snapshot_cache.invalidate()
+            complaint = await self.get_complaint_by_id(complaint_id)
+            tile_index.refresh_complaint(complaint_id, complaint)
+            duplicate_index.refresh_complaint(complaint_id, complaint)
+            window_store.refresh_complaint(complaint_id, complaint)
+            if clustering_engine.ready:
+                await clustering_engine.refresh_complaint(self.db, complaint_id, complaint)
+        return modified
+
+    async def ensure_indexes(self):
+        """Create the indexes queries rely on (no-op when they exist)"""
+        existing = await self.collection.index_information()
+        for name in LEGACY_INDEXES:
+            if name in existing:
+                await self.collection.drop_index(name)
+        await self.collection.create_indexes(COMPLAINT_INDEXES)
+
+    async def backfill_geo(self, batch_size: int = 1000) -> int:
+        """
+        Add the GeoJSON `geo` field to complaints stored without it
+        Walks _id in ascending batches so it runs online alongside writes
+        """
+        updated = 0
+        last_id = None
+        while True:
+            query = {"geo": {"$exists": False}}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            documents = await self.collection.find(
+                query, {"location.latitude": 1, "location.longitude": 1}
+            ).sort("_id", ASCENDING).limit(batch_size).to_list(length=batch_size)
+            if not documents:
+                return updated
+            last_id = documents[-1]["_id"]
 
-    async def create_geospatial_index(self):
-        """Create geospatial index for location queries"""
-        await self.collection.create_index([("location", "2dsphere")])
+            updates = []
+            for document in documents:
+                location = document.get("location") or {}
+                try:
+                    geo = geo_point(float(location["latitude"]), float(location["longitude"]))
+                except (KeyError, TypeError, ValueError):
+                    geo = None
+                if geo:
+                    # Guard against a concurrent write that already set it
+                    updates.append(UpdateOne(
+                        {"_id": document["_id"], "geo": {"$exists": False}},
+                        {"$set": {"geo": geo}}
+                    ))
+            if updates:
+                try:
+                    result = await self.collection.bulk_write(updates, ordered=False)
+                    updated += result.modified_count
+                except BulkWriteError as e:
+                    updated += e.details.get("nModified", 0)
@@ -0,0 +1,90 @@
+"""
+Off-Loop Compute Executor
+Runs CPU-bound dashboard work (frame decoding, DBSCAN, cluster
+aggregation) in a bounded thread pool so the event loop keeps serving
+submissions while it runs
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app import config
+
+_local = threading.local()
+
+
+class ComputeCancelled(Exception):
+    """Raised inside a worker thread once its caller gave up"""
+
+
+def check_cancelled():
+    """Checkpoint for long computations; a no-op outside the executor"""
+    event = getattr(_local, "cancelled", None)
+    if event is not None and event.is_set():
+        raise ComputeCancelled()
+
+
+class ComputeExecutor:
+    """
+    Thread pool with a bounded number of admitted jobs and a per-job timeout.
+
+    NumPy, SciPy and scikit-learn's ball tree release the GIL for their heavy
+    loops, so threads avoid pickling whole frames into a process pool. A
+    thread cannot be killed: on timeout or cancellation the job's flag is set
+    and it stops at its next check_cancelled(); its slot is only freed once
+    the thread has actually returned.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = config.COMPUTE_THREADS,
+        max_pending: int = config.COMPUTE_MAX_PENDING,
+        timeout_seconds: float = config.COMPUTE_TIMEOUT_SECONDS
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compute")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: float = None) -> Any:
+        """Await fn(*args) on a worker thread; raises asyncio.TimeoutError past the timeout"""
+        timeout = self.timeout_seconds if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        # Wait for a slot without blocking the loop; waiting counts against the timeout
+        while not self._slots.acquire(blocking=False):
+            if loop.time() >= deadline:
+                raise asyncio.TimeoutError()
+            await asyncio.sleep(0.01)
+
+        cancelled = threading.Event()
+
+        def call():
+            _local.cancelled = cancelled
+            try:
+                check_cancelled()
+                return fn(*args)
+            finally:
+                _local.cancelled = None
+                self._slots.release()
+
+        try:
+            future = loop.run_in_executor(self._pool, call)
+        except BaseException:
+            self._slots.release()
+            raise
+        try:
+            return await asyncio.wait_for(future, max(deadline - loop.time(), 0))
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            cancelled.set()
+            raise
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+compute_executor = ComputeExecutor()
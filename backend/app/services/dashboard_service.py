@@ -0,0 +1,141 @@
+"""
+Dashboard Computations
+Shared cluster snapshot loading and rendering for dashboard endpoints
+and live update streams
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app import config
+from app.models import CategoryEnum, IncidentCluster
+from app.services.complaint_service import ComplaintService
+from app.services.cluster_snapshot import ClusterSnapshot, snapshot_cache
+from app.services.clustering_service import ClusteringService
+from app.services.compute_executor import compute_executor
+from app.services.incremental_clustering import clustering_engine
+from app.services.peer_sync import peer_sync
+from app.services.rollup_service import RollupService
+from app.services.shared_state import shared_state
+from typing import List, Optional, Tuple
+
+def clean_category_name(category) -> str:
+    """Convert enum category to clean string name"""
+    if not category:
+        return "Unknown"
+    cat_str = str(category)
+    if "CategoryEnum." in cat_str:
+        # Extract name after 'CategoryEnum.'
+        return cat_str.split("CategoryEnum.")[1].replace("_", " ").title()
+    return cat_str.replace("_", " ").title()
+
+def category_label(value) -> str:
+    """Clean name of a stored category value, matching the cluster endpoints"""
+    try:
+        return clean_category_name(CategoryEnum(value))
+    except ValueError:
+        return clean_category_name(value)
+
+def cluster_window(clustering_service: ClusteringService, frame) -> List[IncidentCluster]:
+    """Batch DBSCAN and aggregation of a frame; blocking, so run on a compute thread"""
+    labels = clustering_service.cluster_frame(frame)
+    return clustering_service.build_incident_clusters_from_frame(frame, labels)
+
+async def load_clusters(
+    db: AsyncIOMotorDatabase,
+    clustering_service: ClusteringService,
+    window_hours: int,
+    read_db: Optional[AsyncIOMotorDatabase] = None
+) -> Tuple[List[IncidentCluster], int]:
+    """
+    Current incident clusters and the number of reports (complaints plus
+    corroborations) they were built from.
+    Served from the incremental engine when its parameters match; otherwise
+    falls back to a full DBSCAN pass.
+    """
+    if clustering_engine.ready and (
+        clustering_engine.window_hours == window_hours
+        and clustering_engine.eps_km == clustering_service.eps_km
+        and clustering_engine.min_samples == clustering_service.min_samples
+        and clustering_engine.by_category == clustering_service.by_category
+    ):
+        # Other workers' writes reach this engine only through MongoDB
+        await peer_sync.sync(db)
+        clusters = await clustering_engine.get_clusters(db)
+        return clusters, clustering_engine.total_reports
+
+    complaint_service = ComplaintService(db, read_db)
+    frame = await complaint_service.get_recent_frame(hours=window_hours)
+    if not len(frame):
+        return [], 0
+
+    incidents = await compute_executor.run(cluster_window, clustering_service, frame)
+    return incidents, int(frame.weight.sum())
+
+async def get_cluster_snapshot(
+    db: AsyncIOMotorDatabase,
+    window_hours: int = config.CLUSTER_WINDOW_HOURS,
+    read_db: Optional[AsyncIOMotorDatabase] = None
+) -> ClusterSnapshot:
+    """Shared cluster snapshot for the heatmap and top-issues endpoints"""
+    clustering_service = ClusteringService()
+    key = (window_hours, clustering_service.eps_km, clustering_service.min_samples, clustering_service.by_category)
+    return await snapshot_cache.get(
+        key, lambda: load_clusters(db, clustering_service, window_hours, read_db)
+    )
+
+async def load_statistics(
+    db: AsyncIOMotorDatabase,
+    hours: int,
+    read_db: Optional[AsyncIOMotorDatabase] = None
+) -> dict:
+    """
+    Dashboard statistics from hourly rollups (raw complaints when rollups are off),
+    computed once per write version across workers when state is shared
+    """
+    async def compute() -> dict:
+        if config.ROLLUPS_ENABLED:
+            return await RollupService(db, read_db).get_statistics(hours=hours)
+        return await ComplaintService(db, read_db).get_statistics(hours=hours)
+
+    if shared_state is None:
+        return await compute()
+    return await shared_state.get_or_compute(
+        f"statistics-{hours}",
+        snapshot_cache.current_version(),
+        snapshot_cache.ttl_seconds,
+        compute
+    )
+
+def urgency_label(priority_score: float) -> str:
+    """Top-issue urgency badge for a priority score"""
+    if priority_score >= config.PRIORITY_CRITICAL_THRESHOLD:
+        return "Critical"
+    if priority_score >= config.PRIORITY_WARNING_THRESHOLD:
+        return "High"
+    return "Medium"
+
+def heatmap_point(cluster: IncidentCluster) -> dict:
+    """Heat map marker for one cluster"""
+    priority_score = cluster.priority_score
+
+    # Determine intensity (1-10)
+    if priority_score >= config.PRIORITY_CRITICAL_THRESHOLD:
+        intensity = "critical"
+        color = "red"
+    elif priority_score >= config.PRIORITY_WARNING_THRESHOLD:
+        intensity = "warning"
+        color = "yellow"
+    else:
+        intensity = "low"
+        color = "green"
+
+    return {
+        "id": cluster.id,
+        "latitude": cluster.location.latitude,
+        "longitude": cluster.location.longitude,
+        "complaint_count": cluster.frequency_count,
+        "priority_score": round(priority_score, 1),
+        "intensity": intensity,
+        "color": color,
+        "categories": sorted(clean_category_name(c) for c in cluster.categories),
+        "summary": cluster.cluster_summary
+    }
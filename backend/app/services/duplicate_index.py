@@ -0,0 +1,206 @@
+"""
+Near-Duplicate Complaint Index
+MinHash signatures of recent complaint texts in locality-sensitive hash
+buckets keyed by map cell, so a new report is only compared with similar
+texts filed nearby
+"""
+
+import heapq
+import itertools
+import math
+import re
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app import config
+from app.models import Complaint
+from app.services.clustering_service import KM_PER_DEGREE_LAT
+from app.services.incremental_clustering import haversine_km
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_WORD = re.compile(r"\w+")
+
+
+class _Entry:
+    __slots__ = ("complaint_id", "signature", "latitude", "longitude", "category", "buckets")
+
+    def __init__(self, complaint_id: str, signature: np.ndarray, complaint: Complaint):
+        self.complaint_id = complaint_id
+        self.signature = signature
+        self.latitude = complaint.location.latitude
+        self.longitude = complaint.location.longitude
+        self.category = complaint.category
+        self.buckets: List[tuple] = []
+
+
+class DuplicateIndex:
+    """
+    Character-shingle MinHash with banded LSH. Bucket keys include the
+    complaint's grid cell (radius-sized), so a lookup probes only the
+    surrounding cells and verifies a handful of candidates: estimated
+    Jaccard similarity, same category, within DUPLICATE_RADIUS_M.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = config.DUPLICATE_DETECTION_ENABLED,
+        radius_m: float = config.DUPLICATE_RADIUS_M,
+        similarity: float = config.DUPLICATE_SIMILARITY,
+        window_hours: float = config.DUPLICATE_WINDOW_HOURS,
+        num_perm: int = config.DUPLICATE_NUM_PERM,
+        bands: int = config.DUPLICATE_BANDS,
+        shingle_size: int = 3
+    ):
+        if num_perm % bands:
+            raise ValueError("DUPLICATE_NUM_PERM must be a multiple of DUPLICATE_BANDS")
+        self.enabled = enabled
+        self.radius_km = radius_m / 1000
+        self.similarity = similarity
+        self.window_hours = window_hours
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.cell_deg = self.radius_km / KM_PER_DEGREE_LAT
+        self.ready = False
+
+        # Fixed seed: every worker must compute identical signatures
+        rng = np.random.RandomState(1)
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+        self._entries: Dict[str, _Entry] = {}
+        self._buckets: Dict[tuple, Set[_Entry]] = {}
+        self._expiry: list = []
+        self._seq = itertools.count()
+
+    # ---- Signatures ----------------------------------------------------
+
+    def shingles(self, text: str) -> Set[str]:
+        normalised = " ".join(_WORD.findall(text.lower()))
+        k = self.shingle_size
+        if len(normalised) <= k:
+            return {normalised}
+        return {normalised[i:i + k] for i in range(len(normalised) - k + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash over (a * h + b) mod p for each permutation"""
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in self.shingles(text)), dtype=np.uint64
+        )
+        # a < 2**31 and h < 2**32 keep the product below 2**63
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray, cell: tuple) -> List[tuple]:
+        return [
+            (cell, band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    # ---- Geometry ------------------------------------------------------
+
+    def _cell(self, latitude: float, longitude: float) -> tuple:
+        return (math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg))
+
+    def _nearby_cells(self, latitude: float, cell: tuple) -> List[tuple]:
+        # A degree of longitude shrinks with latitude, so widen the column search
+        cos_lat = max(math.cos(math.radians(abs(latitude) + self.cell_deg)), 1e-6)
+        col_span = math.ceil(1 / cos_lat)
+        return [
+            (cell[0] + dr, cell[1] + dc)
+            for dr in (-1, 0, 1)
+            for dc in range(-col_span, col_span + 1)
+        ]
+
+    # ---- Lookup and maintenance ----------------------------------------
+
+    def find(self, complaint: Complaint, signature: Optional[np.ndarray] = None) -> Optional[str]:
+        """Id of the most similar recent complaint nearby, if any passes the thresholds"""
+        if not self.enabled or not self._entries:
+            return None
+        self._evict()
+        if signature is None:
+            signature = self.signature(complaint.text)
+        latitude, longitude = complaint.location.latitude, complaint.location.longitude
+
+        candidates: Set[_Entry] = set()
+        for cell in self._nearby_cells(latitude, self._cell(latitude, longitude)):
+            for key in self._band_keys(signature, cell):
+                candidates.update(self._buckets.get(key, ()))
+
+        best: Optional[Tuple[float, float, str]] = None
+        for entry in candidates:
+            if complaint.category and entry.category and complaint.category != entry.category:
+                continue
+            similarity = float(np.count_nonzero(entry.signature == signature)) / len(signature)
+            if similarity < self.similarity:
+                continue
+            distance = haversine_km(latitude, longitude, entry.latitude, entry.longitude)
+            if distance > self.radius_km:
+                continue
+            if best is None or (similarity, -distance) > best[:2]:
+                best = (similarity, -distance, entry.complaint_id)
+        return best[2] if best else None
+
+    def add(self, complaint_id: str, complaint: Complaint, signature: Optional[np.ndarray] = None):
+        """Index a stored complaint so later reports can corroborate it"""
+        if not self.enabled or complaint_id in self._entries:
+            return
+        if complaint.timestamp < datetime.utcnow() - timedelta(hours=self.window_hours):
+            return
+        if signature is None:
+            signature = self.signature(complaint.text)
+        cell = self._cell(complaint.location.latitude, complaint.location.longitude)
+        entry = _Entry(complaint_id, signature, complaint)
+        entry.buckets = self._band_keys(signature, cell)
+        for key in entry.buckets:
+            self._buckets.setdefault(key, set()).add(entry)
+        self._entries[complaint_id] = entry
+        heapq.heappush(self._expiry, (complaint.timestamp, next(self._seq), entry))
+
+    def remove(self, complaint_id: str):
+        entry = self._entries.pop(complaint_id, None)
+        if entry is None:
+            return
+        for key in entry.buckets:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry)
+                if not bucket:
+                    del self._buckets[key]
+
+    def refresh_complaint(self, complaint_id: str, complaint: Optional[Complaint]):
+        """Re-index a complaint after its text, location or category changed"""
+        self.remove(complaint_id)
+        if complaint is not None:
+            self.add(complaint_id, complaint)
+
+    def _evict(self):
+        cutoff = datetime.utcnow() - timedelta(hours=self.window_hours)
+        while self._expiry and self._expiry[0][0] < cutoff:
+            _, _, entry = heapq.heappop(self._expiry)
+            if self._entries.get(entry.complaint_id) is entry:
+                self.remove(entry.complaint_id)
+
+    async def warm_up(self, db: AsyncIOMotorDatabase):
+        """Index complaints from the duplicate window"""
+        if not self.enabled:
+            return
+        cutoff = datetime.utcnow() - timedelta(hours=self.window_hours)
+        cursor = db.complaints.find(
+            {"timestamp": {"$gte": cutoff}},
+            {"text": 1, "location": 1, "category": 1, "timestamp": 1}
+        )
+        async for document in cursor:
+            complaint_id = str(document.pop("_id"))
+            self.add(complaint_id, Complaint(**document))
+        self.ready = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+duplicate_index = DuplicateIndex()
@@ -0,0 +1,481 @@
+"""
+Incremental Clustering Engine
+Keeps live incident clusters up to date as complaints arrive, instead of
+re-running DBSCAN over the whole window on every dashboard request
+"""
+
+import heapq
+import itertools
+import math
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+
+from app import config
+from app.models import CategoryEnum, Complaint, IncidentCluster, Location
+from app.services.clustering_service import EARTH_RADIUS_KM, KM_PER_DEGREE_LAT, ClusteringService
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometers"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class _Point:
+    """A complaint held in the live window"""
+    __slots__ = (
+        "complaint_id", "latitude", "longitude", "urgency", "timestamp",
+        "category", "ward", "area_name", "weight", "cell", "cluster"
+    )
+
+    def __init__(self, complaint_id: str, complaint: Complaint):
+        self.complaint_id = complaint_id
+        self.latitude = complaint.location.latitude
+        self.longitude = complaint.location.longitude
+        self.urgency = complaint.urgency_score or 0
+        self.timestamp = complaint.timestamp
+        self.category = complaint.category
+        self.ward = complaint.location.ward
+        self.area_name = complaint.location.area_name
+        self.weight = 1 + (complaint.corroborations or 0)
+        self.cell = None
+        self.cluster = None
+
+
+class _LiveCluster:
+    """
+    Running aggregates for one connected group of points, weighted by reports.
+    Once its document is stored, membership changes are tracked as joined
+    and left ids so a persist only sends the difference.
+    """
+    __slots__ = (
+        "id", "min_samples", "points", "reports", "sum_lat", "sum_lng", "sum_urgency",
+        "category_counts", "created_at", "view", "stored", "joined", "left"
+    )
+
+    def __init__(self, cluster_id: str, min_samples: int):
+        self.id = cluster_id
+        self.min_samples = min_samples
+        self.points: Set[_Point] = set()
+        self.reports = 0
+        self.sum_lat = 0.0
+        self.sum_lng = 0.0
+        self.sum_urgency = 0.0
+        self.category_counts: Counter = Counter()
+        self.created_at = datetime.utcnow()
+        self.view: Optional[IncidentCluster] = None
+        self.stored = False
+        self.joined: Set[str] = set()
+        self.left: Set[str] = set()
+
+    def add(self, point: _Point):
+        if self.stored:
+            if point.complaint_id in self.left:
+                self.left.discard(point.complaint_id)
+            else:
+                self.joined.add(point.complaint_id)
+        self.points.add(point)
+        self.reports += point.weight
+        self.sum_lat += point.weight * point.latitude
+        self.sum_lng += point.weight * point.longitude
+        self.sum_urgency += point.weight * point.urgency
+        if point.category:
+            self.category_counts[point.category] += point.weight
+        point.cluster = self
+        self.view = None
+
+    def discard(self, point: _Point):
+        if self.stored:
+            if point.complaint_id in self.joined:
+                self.joined.discard(point.complaint_id)
+            else:
+                self.left.add(point.complaint_id)
+        self.points.discard(point)
+        self.reports -= point.weight
+        self.sum_lat -= point.weight * point.latitude
+        self.sum_lng -= point.weight * point.longitude
+        self.sum_urgency -= point.weight * point.urgency
+        if point.category:
+            self.category_counts[point.category] -= point.weight
+            if self.category_counts[point.category] <= 0:
+                del self.category_counts[point.category]
+        self.view = None
+
+
+class IncrementalClusteringEngine:
+    """
+    Connected-component clustering over the eps-neighbourhood graph,
+    maintained incrementally inside a sliding time window.
+
+    With min_samples <= 2 the components are exactly the non-noise DBSCAN
+    clusters; for larger values components with fewer than min_samples
+    reports are held back as pending, which approximates DBSCAN noise
+    handling. A corroborated complaint counts once per report.
+
+    With by_category, points only connect to points of the same category,
+    using that category's eps_km and min_samples, so every cluster holds a
+    single category.
+    """
+
+    def __init__(
+        self,
+        eps_km: float = config.DBSCAN_EPS_KM,
+        min_samples: int = config.DBSCAN_MIN_SAMPLES,
+        window_hours: int = config.CLUSTER_WINDOW_HOURS,
+        by_category: bool = config.CLUSTER_BY_CATEGORY
+    ):
+        self.eps_km = eps_km
+        self.min_samples = min_samples
+        self.window_hours = window_hours
+        self.by_category = by_category
+        self.scorer = ClusteringService(eps_km=eps_km, min_samples=min_samples, by_category=by_category)
+        self.ready = False
+        self.version = 0
+        # Only one engine writes incident_clusters when several workers run
+        self.persist = True
+
+        self._points: Dict[str, _Point] = {}
+        self._grid: Dict[tuple, Set[_Point]] = {}
+        self._clusters: Dict[str, _LiveCluster] = {}
+        self._expiry: list = []
+        self._seq = itertools.count()
+        self._preferred_ids: Dict[str, str] = {}
+        self._dirty: Set[str] = set()
+        self._removed: Set[str] = set()
+
+    @property
+    def total_reports(self) -> int:
+        """Reports behind the window's complaints, corroborations included"""
+        return sum(point.weight for point in self._points.values())
+
+    # ---- Spatial index -------------------------------------------------
+
+    def _partition(self, point: _Point) -> Optional[CategoryEnum]:
+        """Points only connect within a partition: their category, or everything"""
+        return point.category if self.by_category else None
+
+    def _params(self, partition: Optional[CategoryEnum]) -> Tuple[float, int]:
+        return self.scorer.params_for(partition)
+
+    def _cell_deg(self, partition: Optional[CategoryEnum]) -> float:
+        """Grid cell size: eps_km in degrees, padded so eps never spans two rows"""
+        return self._params(partition)[0] / KM_PER_DEGREE_LAT * 1.01
+
+    def _cell(self, point: _Point) -> tuple:
+        partition = self._partition(point)
+        cell_deg = self._cell_deg(partition)
+        return (partition, math.floor(point.latitude / cell_deg), math.floor(point.longitude / cell_deg))
+
+    def _neighbours(self, point: _Point) -> List[_Point]:
+        """Points of the same partition within its eps_km of the given point"""
+        partition, row, col = point.cell
+        eps_km = self._params(partition)[0]
+        cell_deg = self._cell_deg(partition)
+        # A degree of longitude shrinks with latitude, so widen the column search
+        cos_lat = max(math.cos(math.radians(min(abs(point.latitude) + cell_deg, 89.9))), 1e-6)
+        col_span = math.ceil(1 / cos_lat)
+        found = []
+        for dr in (-1, 0, 1):
+            for dc in range(-col_span, col_span + 1):
+                for other in self._grid.get((partition, row + dr, col + dc), ()):
+                    if other is point:
+                        continue
+                    if haversine_km(point.latitude, point.longitude, other.latitude, other.longitude) <= eps_km:
+                        found.append(other)
+        return found
+
+    # ---- Mutation ------------------------------------------------------
+
+    def _new_cluster(self, min_samples: int, seed: Optional[_Point] = None) -> _LiveCluster:
+        cluster_id = None
+        if seed is not None:
+            preferred = self._preferred_ids.pop(seed.complaint_id, None)
+            if preferred and preferred not in self._clusters:
+                cluster_id = preferred
+        cluster = _LiveCluster(cluster_id or str(ObjectId()), min_samples)
+        self._clusters[cluster.id] = cluster
+        self._removed.discard(cluster.id)
+        return cluster
+
+    def _drop_cluster(self, cluster: _LiveCluster):
+        self._clusters.pop(cluster.id, None)
+        self._dirty.discard(cluster.id)
+        self._removed.add(cluster.id)
+
+    def _add(self, complaint_id: str, complaint: Complaint):
+        if complaint_id in self._points:
+            return
+        point = _Point(complaint_id, complaint)
+        point.cell = self._cell(point)
+
+        touching = {n.cluster for n in self._neighbours(point)}
+        if not touching:
+            cluster = self._new_cluster(self._params(self._partition(point))[1], point)
+        else:
+            # Merge into the oldest cluster so its id stays stable
+            cluster = min(touching, key=lambda c: c.created_at)
+            for other in touching:
+                if other is cluster:
+                    continue
+                for moved in list(other.points):
+                    cluster.add(moved)
+                self._drop_cluster(other)
+        cluster.add(point)
+
+        self._points[complaint_id] = point
+        self._grid.setdefault(point.cell, set()).add(point)
+        heapq.heappush(self._expiry, (point.timestamp, next(self._seq), point))
+        self._dirty.add(cluster.id)
+        self.version += 1
+
+    def _remove(self, point: _Point) -> Optional[_LiveCluster]:
+        if self._points.get(point.complaint_id) is not point:
+            return None
+        del self._points[point.complaint_id]
+        cell_points = self._grid.get(point.cell)
+        if cell_points is not None:
+            cell_points.discard(point)
+            if not cell_points:
+                del self._grid[point.cell]
+        cluster = point.cluster
+        cluster.discard(point)
+        self.version += 1
+        return cluster
+
+    def _resplit(self, cluster: _LiveCluster):
+        """Split a cluster whose members are no longer connected"""
+        if not cluster.points:
+            self._drop_cluster(cluster)
+            return
+
+        remaining = set(cluster.points)
+        components = []
+        while remaining:
+            start = remaining.pop()
+            component = [start]
+            frontier = [start]
+            while frontier:
+                current = frontier.pop()
+                for other in self._neighbours(current):
+                    if other in remaining:
+                        remaining.discard(other)
+                        component.append(other)
+                        frontier.append(other)
+            components.append(component)
+
+        self._dirty.add(cluster.id)
+        if len(components) == 1:
+            return
+
+        # Largest component keeps the existing id
+        components.sort(key=len, reverse=True)
+        for component in components[1:]:
+            split = self._new_cluster(cluster.min_samples)
+            for moved in component:
+                cluster.discard(moved)
+                split.add(moved)
+            self._dirty.add(split.id)
+
+    def _evict(self, now: Optional[datetime] = None):
+        """Age points out of the window"""
+        cutoff = (now or datetime.utcnow()) - timedelta(hours=self.window_hours)
+        touched = set()
+        while self._expiry and self._expiry[0][0] < cutoff:
+            _, _, point = heapq.heappop(self._expiry)
+            cluster = self._remove(point)
+            if cluster is not None:
+                touched.add(cluster)
+        for cluster in touched:
+            if cluster.id in self._clusters:
+                self._resplit(cluster)
+
+    # ---- Views ---------------------------------------------------------
+
+    def _view(self, cluster: _LiveCluster) -> IncidentCluster:
+        if cluster.view is None:
+            frequency = cluster.reports
+            avg_urgency = cluster.sum_urgency / frequency
+            category = (
+                cluster.category_counts.most_common(1)[0][0]
+                if cluster.category_counts else CategoryEnum.OTHERS
+            )
+            latest = max(cluster.points, key=lambda p: p.timestamp)
+            first_report = min(p.timestamp for p in cluster.points)
+            cluster.view = IncidentCluster(
+                _id=cluster.id,
+                category=category,
+                categories=sorted(cluster.category_counts),
+                location=Location(
+                    latitude=cluster.sum_lat / frequency,
+                    longitude=cluster.sum_lng / frequency,
+                    ward=latest.ward,
+                    area_name=latest.area_name
+                ),
+                complaint_ids=[p.complaint_id for p in cluster.points],
+                frequency_count=frequency,
+                average_urgency_score=avg_urgency,
+                priority_score=self.scorer.calculate_priority_score(
+                    frequency=frequency,
+                    sentiment=avg_urgency,
+                    duration_hours=(latest.timestamp - first_report).total_seconds() / 3600
+                ),
+                cluster_summary=self.scorer.format_cluster_summary(frequency, category, avg_urgency),
+                first_report_time=first_report,
+                last_report_time=latest.timestamp,
+                status="active" if frequency >= cluster.min_samples else "pending",
+                created_at=cluster.created_at
+            )
+        return cluster.view
+
+    def active_clusters(self) -> List[IncidentCluster]:
+        """Clusters large enough to report, O(#clusters) once views are cached"""
+        return [
+            self._view(cluster)
+            for cluster in self._clusters.values()
+            if cluster.reports >= cluster.min_samples
+        ]
+
+    # ---- Persistence ---------------------------------------------------
+
+    async def _persist(self, db: AsyncIOMotorDatabase):
+        """
+        Write changed clusters to the incident_clusters collection. A new
+        cluster is written whole; a stored one gets its aggregates with $set
+        and membership changes with $addToSet/$pull, so a write costs the
+        change rather than the cluster's size. Live state is already current,
+        so a failed write is logged and its clusters are queued again, to be
+        rewritten whole on the next persist, instead of being raised.
+        """
+        if not self.persist:
+            self._dirty.clear()
+            self._removed.clear()
+            return
+
+        # Take the pending ids; changes made during the write queue up afresh
+        dirty, self._dirty = self._dirty, set()
+        removed, self._removed = self._removed, set()
+        operations = []
+        for cluster_id in dirty:
+            cluster = self._clusters.get(cluster_id)
+            if cluster is None:
+                continue
+            document = self._view(cluster).model_dump(by_alias=True)
+            document["_id"] = ObjectId(cluster_id)
+            if not cluster.stored:
+                operations.append(ReplaceOne({"_id": document["_id"]}, document, upsert=True))
+                # Changes from here on are relative to the document just sent
+                cluster.stored = True
+                continue
+            key = {"_id": document.pop("_id")}
+            del document["complaint_ids"]
+            update = {"$set": document}
+            if cluster.joined:
+                update["$addToSet"] = {"complaint_ids": {"$each": list(cluster.joined)}}
+            operations.append(UpdateOne(key, update))
+            if cluster.left:
+                # $pull cannot share an update with $addToSet on the same field
+                operations.append(UpdateOne(key, {"$pull": {"complaint_ids": {"$in": list(cluster.left)}}}))
+            cluster.joined, cluster.left = set(), set()
+        for cluster_id in removed:
+            operations.append(DeleteOne({"_id": ObjectId(cluster_id)}))
+        if not operations:
+            return
+
+        try:
+            await db.incident_clusters.bulk_write(operations, ordered=False)
+        except Exception as e:
+            print(f"[!] Incident cluster write failed, will retry on the next change: {e}")
+            for cluster_id in dirty:
+                cluster = self._clusters.get(cluster_id)
+                if cluster is not None:
+                    cluster.stored = False
+                    cluster.joined, cluster.left = set(), set()
+                    self._dirty.add(cluster_id)
+            self._removed |= {cluster_id for cluster_id in removed if cluster_id not in self._clusters}
+
+    async def warm_up(self, db: AsyncIOMotorDatabase):
+        """Rebuild live state from the complaints window, reusing persisted cluster ids"""
+        async for document in db.incident_clusters.find({}, {"complaint_ids": 1}):
+            for complaint_id in document.get("complaint_ids", []):
+                self._preferred_ids[complaint_id] = str(document["_id"])
+
+        cutoff = datetime.utcnow() - timedelta(hours=self.window_hours)
+        cursor = db.complaints.find({"timestamp": {"$gte": cutoff}}).sort("timestamp", 1)
+        async for document in cursor:
+            complaint_id = str(document.pop("_id"))
+            self._add(complaint_id, Complaint(**document))
+        self._preferred_ids.clear()
+
+        if self.persist:
+            await self.take_over(db)
+        self.ready = True
+
+    async def take_over(self, db: AsyncIOMotorDatabase):
+        """Make incident_clusters mirror this engine's live clusters"""
+        self.persist = True
+        live_ids = [ObjectId(cluster_id) for cluster_id in self._clusters]
+        await db.incident_clusters.delete_many({"_id": {"$nin": live_ids}})
+        self._removed.clear()
+        self._dirty = set(self._clusters)
+        for cluster in self._clusters.values():
+            cluster.stored = False
+            cluster.joined, cluster.left = set(), set()
+        await self._persist(db)
+
+    async def add_complaint(self, db: AsyncIOMotorDatabase, complaint_id: str, complaint: Complaint):
+        """Assign a newly stored complaint to a cluster"""
+        await self.add_complaints(db, [(complaint_id, complaint)])
+
+    async def add_complaints(self, db: AsyncIOMotorDatabase, items: List[Tuple[str, Complaint]]):
+        """Assign a batch of newly stored complaints, persisting once"""
+        self._evict()
+        cutoff = datetime.utcnow() - timedelta(hours=self.window_hours)
+        for complaint_id, complaint in items:
+            if complaint.timestamp >= cutoff:
+                self._add(complaint_id, complaint)
+        await self._persist(db)
+
+    async def refresh_complaint(self, db: AsyncIOMotorDatabase, complaint_id: str, complaint: Optional[Complaint]):
+        """Re-place a complaint after its stored fields changed"""
+        point = self._points.get(complaint_id)
+        if point is not None:
+            cluster = self._remove(point)
+            if cluster is not None:
+                self._resplit(cluster)
+        if complaint is not None:
+            cutoff = datetime.utcnow() - timedelta(hours=self.window_hours)
+            if complaint.timestamp >= cutoff:
+                self._add(complaint_id, complaint)
+        await self._persist(db)
+
+    async def set_weight(self, db: AsyncIOMotorDatabase, complaint_id: str, weight: int):
+        """Update a held complaint's report count after corroborations"""
+        point = self._points.get(complaint_id)
+        if point is None or point.weight == weight:
+            return
+        # Weights do not affect connectivity, only the cluster's aggregates
+        cluster = point.cluster
+        cluster.discard(point)
+        point.weight = weight
+        cluster.add(point)
+        self._dirty.add(cluster.id)
+        self.version += 1
+        await self._persist(db)
+
+    async def get_clusters(self, db: AsyncIOMotorDatabase) -> List[IncidentCluster]:
+        """Current reportable clusters after ageing out expired complaints"""
+        self._evict()
+        if self._dirty or self._removed:
+            await self._persist(db)
+        return self.active_clusters()
+
+
+clustering_engine = IncrementalClusteringEngine()
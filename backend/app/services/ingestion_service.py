@@ -0,0 +1,222 @@
+"""
+Bulk Complaint Ingestion
+Streams NDJSON or JSON-array uploads, classifies records in chunks and
+stores them with unordered insert_many
+"""
+
+import codecs
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Tuple, Union
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app import config
+from app.models import Complaint, Location
+from app.services.complaint_service import ComplaintService
+from app.services.nlp_service import NLPService
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class RecordTooLarge(ValueError):
+    """A record longer than BULK_MAX_RECORD_BYTES"""
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Stored timestamps are naive UTC; convert offset-aware ones"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def iter_json_records(
+    chunks: AsyncIterator[bytes],
+    max_record_bytes: int = config.BULK_MAX_RECORD_BYTES
+) -> AsyncIterator[Tuple[int, Union[dict, Exception]]]:
+    """
+    Incrementally parse an NDJSON stream or a single JSON array of objects.
+    Yields (record_index, record or error). The buffer holds the current
+    chunk plus at most max_record_bytes of an unfinished record.
+    Oversize or malformed records are yielded as errors: NDJSON resumes at
+    the next line, while a JSON array cannot be resynchronised and ends there.
+    """
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+    buffer = ""
+    mode = None  # "array" or "ndjson", detected from the first character
+    index = 0
+    skipping = False  # inside an oversize NDJSON line, dropping until its newline
+
+    async def more() -> bool:
+        """Append the next chunk to the buffer; False once the stream is exhausted"""
+        nonlocal buffer
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            buffer += decode(b"", final=True)
+            return False
+        buffer += decode(chunk)
+        return True
+
+    streaming = True
+    while True:
+        if mode is None:
+            buffer = buffer.lstrip(_WHITESPACE + "\ufeff")
+            if not buffer:
+                if streaming and await more():
+                    continue
+                return
+            mode = "array" if buffer[0] == "[" else "ndjson"
+            if mode == "array":
+                buffer = buffer[1:]
+
+        if mode == "ndjson":
+            newline = buffer.find("\n")
+            if newline == -1 and streaming:
+                if len(buffer) > max_record_bytes:
+                    if not skipping:
+                        yield index, RecordTooLarge(f"Record {index} exceeds {max_record_bytes} bytes")
+                        index += 1
+                        skipping = True
+                    buffer = ""
+                streaming = await more()
+                continue
+            line, buffer = (buffer[:newline], buffer[newline + 1:]) if newline != -1 else (buffer, "")
+            if skipping:
+                # Tail of the oversize record
+                skipping = False
+            elif len(line) > max_record_bytes:
+                yield index, RecordTooLarge(f"Record {index} exceeds {max_record_bytes} bytes")
+                index += 1
+            elif line.strip():
+                try:
+                    yield index, json.loads(line)
+                except ValueError as e:
+                    yield index, e
+                index += 1
+            if newline == -1 and not streaming:
+                return
+            continue
+
+        # JSON array: skip separators, then decode one value at a time
+        buffer = buffer.lstrip(_WHITESPACE + ",")
+        if buffer.startswith("]"):
+            return
+        if not buffer and streaming:
+            streaming = await more()
+            continue
+        try:
+            record, end = _decoder.raw_decode(buffer)
+        except ValueError as e:
+            if streaming and len(buffer) <= max_record_bytes:
+                streaming = await more()
+                continue
+            if streaming:
+                yield index, RecordTooLarge(
+                    f"Record {index} is malformed or exceeds {max_record_bytes} bytes; rest of the array skipped"
+                )
+            else:
+                yield index, ValueError(f"Malformed JSON array near record {index}: {e}; rest of the array skipped")
+            return
+        buffer = buffer[end:]
+        if end > max_record_bytes:
+            yield index, RecordTooLarge(f"Record {index} exceeds {max_record_bytes} bytes")
+        else:
+            yield index, record
+        index += 1
+
+
+class BulkIngestionService:
+    def __init__(self, db: AsyncIOMotorDatabase, nlp_service: NLPService):
+        self.complaint_service = ComplaintService(db)
+        self.nlp_service = nlp_service
+
+    def _build_complaints(self, records: List[dict]) -> List[Complaint]:
+        """Classify a chunk of records and build Complaint models"""
+        analyses = self.nlp_service.analyze_batch(record["text"] for record in records)
+        complaints = [
+            Complaint(
+                text=record["text"],
+                original_language=record.get("original_language", "en"),
+                category=analysis.category,
+                location=Location(
+                    latitude=record["latitude"],
+                    longitude=record["longitude"],
+                    ward=record.get("ward"),
+                    area_name=record.get("area_name")
+                ),
+                urgency_score=analysis.urgency_score,
+                citizen_id=record.get("citizen_id"),
+                voice_transcription=bool(record.get("voice_transcription", False)),
+                **({"timestamp": record["timestamp"]} if record.get("timestamp") else {})
+            )
+            for record, analysis in zip(records, analyses)
+        ]
+        for complaint in complaints:
+            complaint.timestamp = naive_utc(complaint.timestamp)
+        return complaints
+
+    def _validate(self, record) -> str:
+        """Return an error message for records missing required fields"""
+        if not isinstance(record, dict):
+            return "Record must be a JSON object"
+        if not isinstance(record.get("text"), str) or not record["text"].strip():
+            return "Field 'text' is required"
+        for field in ("latitude", "longitude"):
+            if not isinstance(record.get(field), (int, float)) or isinstance(record.get(field), bool):
+                return f"Field '{field}' must be a number"
+        return ""
+
+    async def _flush(self, indexes: List[int], records: List[dict], summary: dict):
+        try:
+            complaints = self._build_complaints(records)
+        except Exception:
+            # Fall back to per-record construction to pinpoint invalid rows
+            complaints, kept = [], []
+            for idx, record in zip(indexes, records):
+                try:
+                    complaints.extend(self._build_complaints([record]))
+                    kept.append(idx)
+                except Exception as e:
+                    self._reject(summary, idx, str(e))
+            indexes = kept
+
+        _, errors = await self.complaint_service.create_complaints(complaints)
+        summary["accepted"] += len(complaints) - len(errors)
+        for position, message in errors.items():
+            self._reject(summary, indexes[position], message)
+
+    def _reject(self, summary: dict, index: int, message: str):
+        summary["rejected"] += 1
+        if len(summary["errors"]) < config.BULK_MAX_REPORTED_ERRORS:
+            summary["errors"].append({"index": index, "error": message})
+        else:
+            summary["errors_truncated"] = True
+
+    async def ingest(self, chunks: AsyncIterator[bytes]) -> Dict:
+        """Consume an upload stream, holding at most one chunk of records"""
+        summary = {"accepted": 0, "rejected": 0, "errors": [], "errors_truncated": False}
+        indexes: List[int] = []
+        records: List[dict] = []
+
+        async for index, record in iter_json_records(chunks):
+            if isinstance(record, RecordTooLarge):
+                self._reject(summary, index, str(record))
+                continue
+            if isinstance(record, Exception):
+                self._reject(summary, index, f"Invalid JSON: {record}")
+                continue
+            error = self._validate(record)
+            if error:
+                self._reject(summary, index, error)
+                continue
+            indexes.append(index)
+            records.append(record)
+            if len(records) >= config.BULK_CHUNK_SIZE:
+                await self._flush(indexes, records, summary)
+                indexes, records = [], []
+
+        if records:
+            await self._flush(indexes, records, summary)
+        return summary
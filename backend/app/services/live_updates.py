@@ -0,0 +1,162 @@
+"""
+Live Dashboard Updates
+In-process pub/sub (a stand-in for a MongoDB change stream) that pushes
+cluster deltas and counters to every connected dashboard
+"""
+
+import asyncio
+import json
+from typing import Dict, Optional, Set
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app import config
+from app.services.cluster_snapshot import snapshot_cache
+from app.services.dashboard_service import get_cluster_snapshot, heatmap_point
+from app.services.shared_state import shared_state
+
+# Queued in place of a dropped backlog; the stream answers it with a full snapshot
+RESYNC = b"resync"
+
+
+def format_event(event: str, data: dict) -> bytes:
+    """Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """One connected client's bounded outbox"""
+    __slots__ = ("queue",)
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+
+class EventBroker:
+    """Fan out pre-encoded events to all subscribers without blocking the publisher"""
+
+    def __init__(self, queue_size: int = config.LIVE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def publish(self, message: bytes):
+        for subscription in self._subscribers:
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and have it resync instead
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(RESYNC)
+
+
+class DashboardPublisher:
+    """
+    Recomputes the shared cluster snapshot once per burst of writes and
+    publishes what changed since the previous publication.
+
+    Deltas carry whole heat map points, so applying one twice is harmless;
+    subscribers start from (and resync to) the publisher's current baseline.
+    """
+
+    def __init__(self, broker: EventBroker, debounce_ms: int = config.LIVE_DEBOUNCE_MS):
+        self.broker = broker
+        self.debounce = debounce_ms / 1000
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._read_db: Optional[AsyncIOMotorDatabase] = None
+        self._points: Dict[str, dict] = {}
+        self._counters: Dict[str, int] = {}
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, db: AsyncIOMotorDatabase, read_db: Optional[AsyncIOMotorDatabase] = None):
+        self._db = db
+        self._read_db = read_db
+        snapshot_cache.add_listener(self.notify)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self):
+        """Schedule a recompute; bursts of calls collapse into one"""
+        self._changed.set()
+
+    def subscribe(self) -> Subscription:
+        subscription = self.broker.subscribe()
+        self.notify()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.broker.unsubscribe(subscription)
+
+    def snapshot_event(self) -> bytes:
+        """Full current state for a new or resyncing subscriber"""
+        return format_event("snapshot", {
+            "heatmap_points": list(self._points.values()),
+            "counters": self._counters,
+        })
+
+    async def _run(self):
+        while True:
+            try:
+                # Time-based expiry changes clusters too, so refresh on the cache TTL;
+                # other workers' writes are only visible by polling the shared version
+                timeout = snapshot_cache.ttl_seconds if shared_state is None else shared_state.poll
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.sleep(self.debounce)
+            self._changed.clear()
+            if not self.broker.subscriber_count:
+                continue
+            try:
+                await self.publish_changes()
+            except Exception as e:
+                print(f"[!] Live update failed: {e}")
+
+    async def publish_changes(self):
+        snapshot = await get_cluster_snapshot(self._db, read_db=self._read_db)
+        points = {point["id"]: point for point in map(heatmap_point, snapshot.clusters)}
+
+        added = [point for cid, point in points.items() if cid not in self._points]
+        changed = [point for cid, point in points.items() if cid in self._points and self._points[cid] != point]
+        removed = [cid for cid in self._points if cid not in points]
+        counters = {
+            "total_complaints": snapshot.total_complaints,
+            "total_clusters": len(points),
+            "critical_clusters": sum(1 for point in points.values() if point["intensity"] == "critical"),
+        }
+
+        self._points = points
+        if added or changed or removed:
+            self.broker.publish(format_event("clusters", {
+                "added": added,
+                "changed": changed,
+                "removed": removed,
+            }))
+        if counters != self._counters:
+            self._counters = counters
+            self.broker.publish(format_event("counters", counters))
+
+
+dashboard_publisher = DashboardPublisher(EventBroker())
@@ -3,9 +3,19 @@ NLP Classification Service (lightweight)
 Rule-based classification and sentiment for hackathon demo
 """
 
+from app.metrics import NLP_LATENCY
 from app.models import CategoryEnum
-from typing import Tuple
+from typing import Dict, Iterable, List, NamedTuple, Tuple
 import re
+import time
+
+class TextAnalysis(NamedTuple):
+    """Combined result of one keyword pass over a complaint"""
+    category: CategoryEnum
+    confidence: float
+    sentiment_label: str
+    sentiment_score: float
+    urgency_score: int
 
 class NLPService:
     def __init__(self):
@@ -36,39 +46,11 @@ class NLPService:
                 "park", "garden", "green space", "vegetation", "trees", "landscaping", "maintenance"
             ],
         }
-
-    def classify_complaint(self, text: str) -> Tuple[CategoryEnum, float]:
-        """Classify text into a category using keyword matching"""
-        text_lower = text.lower()
-        scores = {}
-        for category, keywords in self.category_keywords.items():
-            scores[category] = sum(1 for kw in keywords if kw in text_lower)
-
-        # Choose category with highest score; fallback to Others if no matches
-        best_category = max(scores, key=scores.get)
-        confidence = min(1.0, scores[best_category] / 3.0) if scores[best_category] > 0 else 0.3
-        
-        # If no keywords matched, classify as Others
-        if scores[best_category] == 0:
-            best_category = CategoryEnum.OTHERS
-        
-        return best_category, confidence
-
-    def analyze_sentiment(self, text: str) -> Tuple[str, float]:
-        """Simple sentiment: detect severity keywords to estimate negativity"""
-        negative_markers = [
+        self.negative_markers = [
             "critical", "danger", "urgent", "emergency", "accident", "dark", "overflowing", "foul",
             "no water", "power cut", "not working"
         ]
-        text_lower = text.lower()
-        hits = sum(1 for kw in negative_markers if kw in text_lower)
-        score = 0.5 + min(hits, 3) * 0.15  # 0.5 to ~0.95
-        label = "NEGATIVE" if hits > 0 else "NEUTRAL"
-        return label, score
-
-    def extract_urgency_score(self, text: str) -> int:
-        """Extract urgency score (1-10) based on keywords and sentiment"""
-        urgency_keywords = {
+        self.urgency_keywords = {
             "critical": 10,
             "dangerous": 9,
             "emergency": 9,
@@ -83,19 +65,108 @@ class NLPService:
             "days": 5,
             "weeks": 4,
         }
+        self._compile_keywords()
+
+    def _compile_keywords(self):
+        """
+        Merge the category, sentiment and urgency tables into one vocabulary.
+        Each distinct keyword is searched for once per text and carries every
+        effect it has, so all three results come from a single hit set.
+        """
+        self._categories = list(self.category_keywords)
+        vocabulary = set(self.negative_markers) | set(self.urgency_keywords)
+        for keywords in self.category_keywords.values():
+            vocabulary.update(keywords)
+
+        self._vocabulary: Tuple[str, ...] = tuple(sorted(vocabulary))
+        # Per keyword: (category indexes it scores for, is negative marker, urgency)
+        self._effects: Dict[str, Tuple[Tuple[int, ...], bool, int]] = {
+            word: (
+                tuple(
+                    idx for idx, category in enumerate(self._categories)
+                    if word in self.category_keywords[category]
+                ),
+                word in self.negative_markers,
+                self.urgency_keywords.get(word, 0)
+            )
+            for word in vocabulary
+        }
 
+    def _match_keywords(self, text: str) -> List[str]:
+        """Distinct keywords occurring anywhere in text"""
         text_lower = text.lower()
+        return [word for word in self._vocabulary if word in text_lower]
+
+    def _score(self, found: List[str]) -> Tuple[List[int], int, int]:
+        """Category scores, negative marker hits and max urgency keyword score"""
+        scores = [0] * len(self._categories)
+        hits = 0
         max_score = 1
-        for keyword, score in urgency_keywords.items():
-            if keyword in text_lower:
-                max_score = max(max_score, score)
+        for word in found:
+            categories, negative, urgency = self._effects[word]
+            for idx in categories:
+                scores[idx] += 1
+            if negative:
+                hits += 1
+            if urgency > max_score:
+                max_score = urgency
+        return scores, hits, max_score
+
+    def _classify(self, scores: List[int]) -> Tuple[CategoryEnum, float]:
+        # Choose category with highest score (first wins ties); fallback to Others
+        best = max(scores)
+        if best == 0:
+            # If no keywords matched, classify as Others
+            return CategoryEnum.OTHERS, 0.3
+        return self._categories[scores.index(best)], min(1.0, best / 3.0)
 
+    def _sentiment(self, hits: int) -> Tuple[str, float]:
+        score = 0.5 + min(hits, 3) * 0.15  # 0.5 to ~0.95
+        label = "NEGATIVE" if hits > 0 else "NEUTRAL"
+        return label, score
+
+    def _urgency(self, max_score: int, sentiment_score: float) -> int:
         # Boost based on sentiment
-        _, sentiment_score = self.analyze_sentiment(text)
         if sentiment_score > 0.8:
             max_score = min(max_score + 2, 10)
         return max_score
 
+    def analyze(self, text: str) -> TextAnalysis:
+        """Category, sentiment and urgency from a single keyword scan"""
+        start = time.perf_counter()
+        scores, hits, max_score = self._score(self._match_keywords(text))
+        category, confidence = self._classify(scores)
+        label, sentiment_score = self._sentiment(hits)
+        analysis = TextAnalysis(
+            category=category,
+            confidence=confidence,
+            sentiment_label=label,
+            sentiment_score=sentiment_score,
+            urgency_score=self._urgency(max_score, sentiment_score)
+        )
+        NLP_LATENCY.observe(time.perf_counter() - start)
+        return analysis
+
+    def analyze_batch(self, texts: Iterable[str]) -> List[TextAnalysis]:
+        """Analyze many complaints for bulk ingestion paths"""
+        return [self.analyze(text) for text in texts]
+
+    def classify_complaint(self, text: str) -> Tuple[CategoryEnum, float]:
+        """Classify text into a category using keyword matching"""
+        scores, _, _ = self._score(self._match_keywords(text))
+        return self._classify(scores)
+
+    def analyze_sentiment(self, text: str) -> Tuple[str, float]:
+        """Simple sentiment: detect severity keywords to estimate negativity"""
+        _, hits, _ = self._score(self._match_keywords(text))
+        return self._sentiment(hits)
+
+    def extract_urgency_score(self, text: str) -> int:
+        """Extract urgency score (1-10) based on keywords and sentiment"""
+        _, hits, max_score = self._score(self._match_keywords(text))
+        _, sentiment_score = self._sentiment(hits)
+        return self._urgency(max_score, sentiment_score)
+
     def clean_text(self, text: str) -> str:
         """Clean and normalize text"""
         text = re.sub(r"\s+", " ", text).strip()
@@ -0,0 +1,75 @@
+"""
+Peer Write Catch-Up
+Feeds complaints stored or corroborated by other worker processes into
+this process's incremental clustering engine, tile index, duplicate index
+and resident complaint window
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app import config
+from app.models import Complaint
+from app.services.duplicate_index import duplicate_index
+from app.services.incremental_clustering import clustering_engine
+from app.services.shared_state import shared_state
+from app.services.tile_index import tile_index
+from app.services.window_store import window_store
+
+
+class PeerSync:
+    """
+    Whenever the shared write version moves, loads complaints whose ObjectId
+    was generated, or that were corroborated, since the previous catch-up
+    (minus a safety margin for in-flight writes). Consumers skip ids they
+    already hold; corroboration counts are applied as absolute weights.
+    """
+
+    def __init__(self, margin_seconds: float = config.SHARED_SYNC_MARGIN_SECONDS):
+        self.margin = timedelta(seconds=margin_seconds)
+        self._synced_at = datetime.utcnow()
+        self._seen_version = -1
+        self._lock = asyncio.Lock()
+
+    def mark(self):
+        """Record that local state is current, e.g. before a warm-up"""
+        self._synced_at = datetime.utcnow()
+        if shared_state is not None:
+            self._seen_version = shared_state.read_version()
+
+    async def sync(self, db: AsyncIOMotorDatabase):
+        if shared_state is None or shared_state.read_version() == self._seen_version:
+            return
+        async with self._lock:
+            version = shared_state.read_version()
+            if version == self._seen_version:
+                return
+            since = self._synced_at - self.margin
+            self._synced_at = datetime.utcnow()
+
+            stored = []
+            query = {"$or": [
+                {"_id": {"$gte": ObjectId.from_datetime(since)}},
+                {"last_corroborated_at": {"$gte": since}},
+            ]}
+            async for document in db.complaints.find(query):
+                complaint_id = str(document.pop("_id"))
+                stored.append((complaint_id, Complaint(**document)))
+
+            for complaint_id, complaint in stored:
+                tile_index.add_complaint(complaint_id, complaint)
+                tile_index.set_weight(complaint_id, 1 + complaint.corroborations)
+                duplicate_index.add(complaint_id, complaint)
+                window_store.add(complaint_id, complaint)
+                window_store.set_weight(complaint_id, complaint.corroborations)
+            if clustering_engine.ready and stored:
+                await clustering_engine.add_complaints(db, stored)
+                for complaint_id, complaint in stored:
+                    await clustering_engine.set_weight(db, complaint_id, 1 + complaint.corroborations)
+            self._seen_version = version
+
+
+peer_sync = PeerSync()
@@ -0,0 +1,242 @@
+"""
+Hourly Complaint Rollups
+Write-time counters per (hour, ward, category) so dashboard statistics
+and trends read a few hundred rollup rows instead of raw complaints
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app import config
+from app.models import Complaint, UrgencyLevel
+from app.services.complaint_service import (
+    HOUR_FORMAT, REPORTS_EXPR, URGENCY_BANDS, ComplaintService
+)
+
+ROLLUP_INDEXES = [
+    # Upsert key; its hour prefix serves every window query
+    IndexModel([("hour", ASCENDING), ("ward", ASCENDING), ("category", ASCENDING)], name="hour_ward_category", unique=True),
+]
+
+BANDS = [level.value for level in UrgencyLevel]
+
+# (timestamp, ward, category, urgency score, reports)
+RollupRow = Tuple[datetime, Optional[str], Optional[str], float, int]
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def urgency_band(score: float) -> str:
+    for floor, level in URGENCY_BANDS:
+        if score >= floor:
+            return level.value
+    return UrgencyLevel.LOW.value
+
+
+def trend_direction(current: float, previous: float, threshold: float = config.TREND_THRESHOLD) -> str:
+    """"up", "down" or "stable" for a window compared with the one before it"""
+    if previous <= 0:
+        return "up" if current > 0 else "stable"
+    change = (current - previous) / previous
+    if change > threshold:
+        return "up"
+    if change < -threshold:
+        return "down"
+    return "stable"
+
+
+class RollupService:
+    """Maintains and reads the complaint_rollups collection"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, read_db: Optional[AsyncIOMotorDatabase] = None):
+        self.db = db
+        self.collection = db.complaint_rollups
+        self.read_collection = (read_db if read_db is not None else db).complaint_rollups
+
+    # ---- Write path ----------------------------------------------------
+
+    @staticmethod
+    def rows_for(complaints: Iterable[Complaint]) -> List[RollupRow]:
+        return [
+            (
+                c.timestamp,
+                c.location.ward,
+                c.category.value if c.category else None,
+                c.urgency_score or 0,
+                1 + (c.corroborations or 0)
+            )
+            for c in complaints
+        ]
+
+    async def record(self, rows: List[RollupRow]):
+        """Add reports to their hourly buckets with one unordered bulk upsert"""
+        buckets: Dict[tuple, dict] = defaultdict(lambda: {"count": 0, "urgency_sum": 0.0, "urgency_max": 0, "bands": defaultdict(int)})
+        for timestamp, ward, category, urgency, reports in rows:
+            bucket = buckets[(floor_hour(timestamp), ward, category)]
+            bucket["count"] += reports
+            bucket["urgency_sum"] += urgency * reports
+            bucket["urgency_max"] = max(bucket["urgency_max"], urgency)
+            bucket["bands"][urgency_band(urgency)] += reports
+        if not buckets:
+            return
+
+        operations = []
+        for (hour, ward, category), bucket in buckets.items():
+            increments = {"count": bucket["count"], "urgency_sum": bucket["urgency_sum"]}
+            for band, reports in bucket["bands"].items():
+                increments[f"bands.{band}"] = reports
+            operations.append(UpdateOne(
+                {"hour": hour, "ward": ward, "category": category},
+                {"$inc": increments, "$max": {"urgency_max": bucket["urgency_max"]}},
+                upsert=True
+            ))
+
+        await self._upsert(operations)
+
+    async def _upsert(self, operations: List[UpdateOne]):
+        """Unordered bulk upsert of buckets"""
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Two writers upserting a new bucket at once: the loser retries as an update
+            retry = [operations[error["index"]] for error in e.details.get("writeErrors", []) if error.get("code") == 11000]
+            if len(retry) < len(e.details.get("writeErrors", [])):
+                raise
+            await self.collection.bulk_write(retry, ordered=False)
+
+    # ---- Maintenance ---------------------------------------------------
+
+    async def ensure_indexes(self):
+        await self.collection.create_indexes(ROLLUP_INDEXES)
+
+    async def rebuild(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+        """
+        Recompute rollups for [start, end) from raw complaints, in whole hours.
+        Defaults to all history up to the current hour, which live writes are
+        still filling; pass end explicitly to include it while writes are paused.
+        Each bucket is overwritten in place with an upsert, so live $inc upserts
+        into the same hours never collide with a delete-and-insert; buckets
+        that existed before the rebuild and no longer have complaints are removed.
+        """
+        end = floor_hour(end or datetime.utcnow())
+        match: dict = {"$lt": end}
+        if start is not None:
+            start = floor_hour(start)
+            match["$gte"] = start
+
+        hour_range = {"$lt": end, **({"$gte": start} if start is not None else {})}
+        existing = {
+            (document["hour"], document.get("ward"), document.get("category")): document["_id"]
+            async for document in self.collection.find({"hour": hour_range}, {"hour": 1, "ward": 1, "category": 1})
+        }
+
+        hour_expr = {"$subtract": ["$timestamp", {"$mod": [{"$toLong": "$timestamp"}, 3_600_000]}]}
+        band_expr = ComplaintService(self.db)._urgency_band_expr()
+        pipeline = [
+            {"$match": {"timestamp": match}},
+            {"$group": {
+                "_id": {"hour": hour_expr, "ward": "$location.ward", "category": "$category"},
+                "count": {"$sum": REPORTS_EXPR},
+                "urgency_sum": {"$sum": {"$multiply": [{"$ifNull": ["$urgency_score", 0]}, REPORTS_EXPR]}},
+                "urgency_max": {"$max": {"$ifNull": ["$urgency_score", 0]}},
+                **{
+                    f"band_{band}": {"$sum": {"$cond": [{"$eq": [band_expr, band]}, REPORTS_EXPR, 0]}}
+                    for band in BANDS
+                },
+            }},
+        ]
+        operations = []
+        async for row in self.db.complaints.aggregate(pipeline, allowDiskUse=True):
+            key = (row["_id"]["hour"], row["_id"].get("ward"), row["_id"].get("category"))
+            existing.pop(key, None)
+            operations.append(UpdateOne(
+                {"hour": key[0], "ward": key[1], "category": key[2]},
+                {"$set": {
+                    "count": row["count"],
+                    "urgency_sum": row["urgency_sum"],
+                    "urgency_max": row["urgency_max"],
+                    "bands": {band: row[f"band_{band}"] for band in BANDS if row[f"band_{band}"]},
+                }},
+                upsert=True
+            ))
+
+        if operations:
+            await self._upsert(operations)
+        if existing:
+            await self.collection.delete_many({"_id": {"$in": list(existing.values())}})
+        return len(operations)
+
+    # ---- Read path -----------------------------------------------------
+
+    async def get_statistics(self, hours: int = 24) -> dict:
+        """Same shape as ComplaintService.get_statistics, in whole-hour buckets"""
+        since = floor_hour(datetime.utcnow() - timedelta(hours=hours))
+        pipeline = [
+            {"$match": {"hour": {"$gte": since}}},
+            {"$facet": {
+                "total": [{"$group": {
+                    "_id": None,
+                    "count": {"$sum": "$count"},
+                    **{band: {"$sum": {"$ifNull": [f"$bands.{band}", 0]}} for band in BANDS},
+                }}],
+                "by_category": [{"$group": {"_id": "$category", "count": {"$sum": "$count"}}}, {"$sort": {"_id": 1}}],
+                "by_ward": [{"$group": {"_id": "$ward", "count": {"$sum": "$count"}}}, {"$sort": {"_id": 1}}],
+                "by_hour": [{"$group": {"_id": "$hour", "count": {"$sum": "$count"}}}, {"$sort": {"_id": 1}}],
+            }},
+        ]
+        result = await self.read_collection.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
+
+        total = (facets.get("total") or [{}])[0]
+        return {
+            "total_complaints": total.get("count", 0),
+            "by_category": {row["_id"]: row["count"] for row in facets.get("by_category", [])},
+            "by_ward": {row["_id"]: row["count"] for row in facets.get("by_ward", [])},
+            "by_urgency": {band: total[band] for band in BANDS if total.get(band)},
+            "by_hour": {row["_id"].strftime(HOUR_FORMAT): row["count"] for row in facets.get("by_hour", [])},
+        }
+
+    async def get_trends(self, hours: int = 24, group_by: str = "category") -> dict:
+        """
+        Reports in the last `hours` complete hours against the `hours` before,
+        overall and per category or ward
+        """
+        if group_by not in ("category", "ward"):
+            raise ValueError("group_by must be 'category' or 'ward'")
+        end = floor_hour(datetime.utcnow())
+        boundary = end - timedelta(hours=hours)
+        pipeline = [
+            {"$match": {"hour": {"$gte": boundary - timedelta(hours=hours), "$lt": end}}},
+            {"$group": {
+                "_id": {
+                    "key": f"${group_by}",
+                    "current": {"$gte": ["$hour", boundary]},
+                },
+                "count": {"$sum": "$count"},
+            }},
+        ]
+        groups: Dict[Optional[str], Dict[str, int]] = defaultdict(lambda: {"current": 0, "previous": 0})
+        async for row in self.read_collection.aggregate(pipeline):
+            window = "current" if row["_id"]["current"] else "previous"
+            groups[row["_id"].get("key")][window] += row["count"]
+
+        current = sum(group["current"] for group in groups.values())
+        previous = sum(group["previous"] for group in groups.values())
+        return {
+            "window_hours": hours,
+            "current": current,
+            "previous": previous,
+            "change": round((current - previous) / previous, 4) if previous else None,
+            "trend_direction": trend_direction(current, previous),
+            f"by_{group_by}": {
+                key: {**group, "trend_direction": trend_direction(group["current"], group["previous"])}
+                for key, group in sorted(groups.items(), key=lambda item: -item[1]["current"])
+            },
+        }
@@ -0,0 +1,194 @@
+"""
+Cross-Process Shared State
+Lets uvicorn workers share computed dashboard state through a directory
+(ideally on tmpfs): a memory-mapped write-version counter, versioned
+result blobs, and a flock-elected leader that computes for everyone
+"""
+
+import asyncio
+import fcntl
+import mmap
+import os
+import pickle
+import struct
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app import config
+
+_COUNTER = struct.Struct("<q")
+_BLOB_HEADER = struct.Struct("<qd")  # version, published_at (unix seconds)
+
+
+class SharedState:
+    """
+    Every complaint write in any worker bumps the shared version. Results
+    are published as `<name>.blob` files tagged with the version they were
+    computed at, so a reader knows whether a blob is current without
+    recomputing anything.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        poll_ms: int = config.SHARED_POLL_MS
+    ):
+        self.directory = directory
+        self.poll = poll_ms / 1000
+        os.makedirs(directory, exist_ok=True)
+
+        path = os.path.join(directory, "version")
+        self._counter_fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._counter_fd).st_size < _COUNTER.size:
+            os.ftruncate(self._counter_fd, _COUNTER.size)
+        self._counter = mmap.mmap(self._counter_fd, _COUNTER.size)
+
+        self._leader_fd: Optional[int] = None
+        self._blobs: Dict[str, Tuple[int, Tuple[int, float, Any]]] = {}  # name -> (inode, decoded blob)
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- Version counter -----------------------------------------------
+
+    def read_version(self) -> int:
+        return _COUNTER.unpack_from(self._counter)[0]
+
+    def bump_version(self) -> int:
+        """Atomically increment the version shared by all workers"""
+        fcntl.flock(self._counter_fd, fcntl.LOCK_EX)
+        try:
+            version = self.read_version() + 1
+            _COUNTER.pack_into(self._counter, 0, version)
+            return version
+        finally:
+            fcntl.flock(self._counter_fd, fcntl.LOCK_UN)
+
+    # ---- Leadership ----------------------------------------------------
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader_fd is not None
+
+    def try_lead(self) -> bool:
+        """Become leader if no live worker holds the lock; released when the process exits"""
+        if self._leader_fd is not None:
+            return True
+        fd = os.open(os.path.join(self.directory, "leader.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._leader_fd = fd
+        return True
+
+    # ---- Result blobs --------------------------------------------------
+
+    def _blob_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.blob")
+
+    def publish(self, name: str, version: int, value: Any):
+        """Atomically replace a named result"""
+        path = self._blob_path(name)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as blob:
+            blob.write(_BLOB_HEADER.pack(version, time.time()))
+            pickle.dump(value, blob, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    def load(self, name: str) -> Optional[Tuple[int, float, Any]]:
+        """(version, published_at, value) of a named result, decoded once per file"""
+        path = self._blob_path(name)
+        try:
+            inode = os.stat(path).st_ino
+        except FileNotFoundError:
+            return None
+        cached = self._blobs.get(name)
+        if cached is not None and cached[0] == inode:
+            return cached[1]
+        with open(path, "rb") as blob:
+            with mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                version, published_at = _BLOB_HEADER.unpack_from(data)
+                value = pickle.loads(data[_BLOB_HEADER.size:])
+        decoded = (version, published_at, value)
+        self._blobs[name] = (inode, decoded)
+        return decoded
+
+    async def get_or_compute(
+        self,
+        name: str,
+        version: int,
+        ttl_seconds: float,
+        compute: Callable[[], Awaitable[Any]],
+        may_publish: bool = True
+    ) -> Any:
+        """
+        Serve a current blob, else compute and publish it while holding the
+        name's lock. Workers that cannot publish, or find another worker
+        computing, never wait: they serve the last published blob (the
+        leader's refresh loop brings it current) and only compute locally
+        when nothing has been published yet.
+        """
+        def fresh(blob) -> bool:
+            return blob is not None and blob[0] >= version and time.time() - blob[1] <= ttl_seconds
+
+        blob = self.load(name)
+        if fresh(blob):
+            return blob[2]
+
+        if may_publish:
+            fd = os.open(os.path.join(self.directory, f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+            else:
+                try:
+                    blob = self.load(name)
+                    if fresh(blob):
+                        return blob[2]
+                    value = await compute()
+                    self.publish(name, version, value)
+                    return value
+                finally:
+                    os.close(fd)
+
+        if blob is not None:
+            return blob[2]
+        return await compute()
+
+    # ---- Leader loop ---------------------------------------------------
+
+    def start(
+        self,
+        refresh: Callable[[], Awaitable[None]],
+        promoted: Callable[[], Awaitable[None]]
+    ):
+        """Contend for leadership; the leader keeps shared results current"""
+        self._task = asyncio.create_task(self._run(refresh, promoted))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, refresh, promoted):
+        while True:
+            try:
+                if not self.is_leader and self.try_lead():
+                    print(f"[+] Worker {os.getpid()} is the shared state leader")
+                    await promoted()
+                if self.is_leader:
+                    await refresh()
+            except Exception as e:
+                print(f"[!] Shared state refresh failed: {e}")
+            await asyncio.sleep(self.poll)
+
+
+shared_state = SharedState(config.SHARED_STATE_DIR) if config.SHARED_STATE_DIR else None
@@ -0,0 +1,256 @@
+"""
+Heat Map Tile Index
+Pre-aggregated grid cells per zoom level, maintained incrementally on
+insert and served per slippy-map tile with version-based caching
+"""
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import math
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+import orjson
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app import config
+from app.models import Complaint
+from app.services.complaint_frame import CATEGORIES, FRAME_PROJECTION, ComplaintFrame, to_datetime
+
+MAX_MERCATOR_LAT = 85.05112878
+
+TileKey = Tuple[int, int, int]  # (z, x, y)
+
+
+def mercator_cell(latitude: float, longitude: float, level: int) -> Tuple[int, int]:
+    """Global Web Mercator grid coordinates at 2**level cells per axis"""
+    n = 1 << level
+    lat = math.radians(max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, latitude)))
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int((1.0 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def cell_center(x: int, y: int, level: int) -> Tuple[float, float]:
+    """(latitude, longitude) of a grid cell's centre"""
+    n = 1 << level
+    longitude = (x + 0.5) / n * 360.0 - 180.0
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 0.5) / n))))
+    return latitude, longitude
+
+
+class _Cell:
+    __slots__ = ("count", "urgency_sum", "categories")
+
+    def __init__(self):
+        self.count = 0
+        self.urgency_sum = 0.0
+        self.categories = [0] * len(CATEGORIES)
+
+
+class TileIndex:
+    """
+    Each served tile at zoom z is split into 2**TILE_GRID_BITS cells per
+    axis, i.e. the global grid at level z + TILE_GRID_BITS. A point's
+    finest cell is computed once; coarser levels are bit shifts of it.
+    """
+
+    def __init__(
+        self,
+        min_zoom: int = config.TILE_MIN_ZOOM,
+        max_zoom: int = config.TILE_MAX_ZOOM,
+        grid_bits: int = config.TILE_GRID_BITS,
+        window_hours: int = config.CLUSTER_WINDOW_HOURS,
+        cache_size: int = config.TILE_CACHE_SIZE
+    ):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.grid_bits = grid_bits
+        self.window_hours = window_hours
+        self.cache_size = cache_size
+        self.ready = False
+        self._warm_lock = asyncio.Lock()
+
+        self._finest = max_zoom + grid_bits
+        self._cells: Dict[Tuple[int, int, int], _Cell] = {}            # (level, cx, cy)
+        self._tile_cells: Dict[TileKey, set] = {}                       # tile -> cell keys
+        self._versions: Dict[TileKey, int] = {}                         # non-empty tiles only
+        self._rendered: OrderedDict = OrderedDict()                     # LRU tile -> (version, etag, payload)
+        self._points: Dict[str, tuple] = {}                             # id -> (cx, cy, urgency, category)
+        self._expiry: list = []
+        self._seq = itertools.count()
+
+    def _apply(self, cx: int, cy: int, urgency: float, category: int, weight: int, sign: int):
+        for z in range(self.min_zoom, self.max_zoom + 1):
+            shift = self.max_zoom - z
+            level = z + self.grid_bits
+            key = (level, cx >> shift, cy >> shift)
+            tile = (z, key[1] >> self.grid_bits, key[2] >> self.grid_bits)
+
+            cell = self._cells.get(key)
+            if cell is None:
+                cell = self._cells[key] = _Cell()
+                self._tile_cells.setdefault(tile, set()).add(key)
+            cell.count += sign * weight
+            cell.urgency_sum += sign * weight * urgency
+            if category >= 0:
+                cell.categories[category] += sign * weight
+            if cell.count <= 0:
+                del self._cells[key]
+                members = self._tile_cells[tile]
+                members.discard(key)
+                if not members:
+                    del self._tile_cells[tile]
+                    self._versions.pop(tile, None)
+                    self._rendered.pop(tile, None)
+                    continue
+            self._versions[tile] = self._versions.get(tile, 0) + 1
+
+    def _add(
+        self,
+        complaint_id: str,
+        latitude: float,
+        longitude: float,
+        urgency: float,
+        category: int,
+        timestamp: datetime,
+        weight: int = 1
+    ):
+        if complaint_id in self._points:
+            return
+        cx, cy = mercator_cell(latitude, longitude, self._finest)
+        # Mutable so a corroboration can reweigh it without a new expiry entry
+        record = [cx, cy, urgency, category, weight]
+        self._points[complaint_id] = record
+        heapq.heappush(self._expiry, (timestamp, next(self._seq), complaint_id, record))
+        self._apply(cx, cy, urgency, category, weight, 1)
+
+    def _remove(self, complaint_id: str, record: Optional[list] = None):
+        current = self._points.get(complaint_id)
+        if current is None or (record is not None and current is not record):
+            return
+        del self._points[complaint_id]
+        self._apply(*current, -1)
+
+    def _evict(self):
+        cutoff = datetime.utcnow() - timedelta(hours=self.window_hours)
+        while self._expiry and self._expiry[0][0] < cutoff:
+            _, _, complaint_id, record = heapq.heappop(self._expiry)
+            self._remove(complaint_id, record)
+
+    def add_complaint(self, complaint_id: str, complaint: Complaint):
+        """Count a newly stored complaint into every zoom level"""
+        self._evict()
+        if complaint.timestamp < datetime.utcnow() - timedelta(hours=self.window_hours):
+            return
+        category = CATEGORIES.index(complaint.category) if complaint.category else -1
+        self._add(
+            complaint_id,
+            complaint.location.latitude,
+            complaint.location.longitude,
+            complaint.urgency_score or 0,
+            category,
+            complaint.timestamp,
+            1 + (complaint.corroborations or 0)
+        )
+
+    def set_weight(self, complaint_id: str, weight: int):
+        """Count a complaint's corroborations into its cells"""
+        record = self._points.get(complaint_id)
+        if record is None or record[4] == weight:
+            return
+        cx, cy, urgency, category, current = record
+        self._apply(cx, cy, urgency, category, weight - current, 1)
+        record[4] = weight
+
+    def refresh_complaint(self, complaint_id: str, complaint: Optional[Complaint]):
+        """Re-place a complaint after its stored fields changed"""
+        self._remove(complaint_id)
+        if complaint is not None:
+            self.add_complaint(complaint_id, complaint)
+
+    async def warm_up(self, db: AsyncIOMotorDatabase):
+        """Load the current window from MongoDB (complaints already counted are skipped)"""
+        cutoff = datetime.utcnow() - timedelta(hours=self.window_hours)
+        documents = await db.complaints.find(
+            {"timestamp": {"$gte": cutoff}}, FRAME_PROJECTION
+        ).to_list(length=None)
+        frame = ComplaintFrame.from_documents(documents)
+        for i in range(len(frame)):
+            self._add(
+                frame.ids[i],
+                float(frame.latitude[i]),
+                float(frame.longitude[i]),
+                float(frame.urgency[i]),
+                int(frame.category[i]),
+                to_datetime(frame.timestamp[i]),
+                int(frame.weight[i])
+            )
+        self.ready = True
+
+    async def ensure_ready(self, db: AsyncIOMotorDatabase):
+        """Warm up on first use if startup did not"""
+        if self.ready:
+            return
+        async with self._warm_lock:
+            if not self.ready:
+                await self.warm_up(db)
+
+    def in_range(self, z: int, x: int, y: int) -> bool:
+        return self.min_zoom <= z <= self.max_zoom and 0 <= x < (1 << z) and 0 <= y < (1 << z)
+
+    def version(self, z: int, x: int, y: int) -> int:
+        self._evict()
+        return self._versions.get((z, x, y), 0)
+
+    def get_tile(self, z: int, x: int, y: int) -> Tuple[str, dict]:
+        """
+        (etag, payload) of one tile, cached until the tile's version changes.
+        The ETag hashes the cells rather than the version, which is counted
+        per process, so every worker gives the same tile the same tag.
+        """
+        tile = (z, x, y)
+        version = self.version(z, x, y)
+        cached = self._rendered.get(tile)
+        if cached is not None and cached[0] == version:
+            self._rendered.move_to_end(tile)
+            return cached[1], cached[2]
+
+        level = z + self.grid_bits
+        cells = []
+        for key in sorted(self._tile_cells.get(tile, ()), key=lambda key: (key[2], key[1])):
+            cell = self._cells[key]
+            latitude, longitude = cell_center(key[1], key[2], level)
+            top = max(range(len(CATEGORIES)), key=cell.categories.__getitem__)
+            cells.append({
+                "x": key[1] & ((1 << self.grid_bits) - 1),
+                "y": key[2] & ((1 << self.grid_bits) - 1),
+                "latitude": round(latitude, 6),
+                "longitude": round(longitude, 6),
+                "count": cell.count,
+                "urgency_sum": round(cell.urgency_sum, 4),
+                "avg_urgency": round(cell.urgency_sum / cell.count, 2),
+                "dominant_category": CATEGORIES[top].value if cell.categories[top] > 0 else None,
+            })
+
+        etag = '"{}"'.format(hashlib.blake2b(orjson.dumps(cells), digest_size=8).hexdigest())
+        payload = {
+            "z": z,
+            "x": x,
+            "y": y,
+            "grid_size": 1 << self.grid_bits,
+            "cells": cells,
+        }
+        # Empty tiles are cheap to render, and most of the map is empty
+        if cells:
+            self._rendered[tile] = (version, etag, payload)
+            self._rendered.move_to_end(tile)
+            while len(self._rendered) > self.cache_size:
+                self._rendered.popitem(last=False)
+        return etag, payload
+
+
+tile_index = TileIndex()
@@ -0,0 +1,388 @@
+"""
+Resident Complaint Window
+Recent complaints held in process as a structured NumPy array with a grid
+index, so nearby lookups and dashboard frames skip MongoDB for the
+working set the dashboard keeps asking for
+"""
+
+import math
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app import config
+from app.models import Complaint
+from app.services.clustering_service import EARTH_RADIUS_KM, KM_PER_DEGREE_LAT
+from app.services.complaint_frame import ComplaintFrame, category_code, to_datetime
+
+ROW_DTYPE = np.dtype([
+    ("latitude", np.float64),
+    ("longitude", np.float64),
+    ("timestamp", "datetime64[ms]"),
+    ("urgency", np.float64),
+    ("category", np.int16),
+    ("weight", np.float64),
+    ("payload", np.int32),    # estimated bytes of the row's Python objects
+    ("alive", np.bool_),
+])
+
+# Object columns kept parallel to the rows: id, ward, area name, model
+_OBJECT_COLUMNS = 4
+_SLOT_BYTES = ROW_DTYPE.itemsize + _OBJECT_COLUMNS * 8
+
+# Rows past the window are only dropped this often; queries filter by time anyway
+_EVICT_INTERVAL_SECONDS = 1.0
+
+# Degree-based prefilters are padded so rounding and the great circle's
+# poleward bow never exclude a row the exact distance test would keep
+_PREFILTER_MARGIN = 1.01
+
+
+def _payload_bytes(complaint: Complaint) -> int:
+    """Rough size of a complaint model and its field values"""
+    size = sys.getsizeof(complaint.__dict__) + sys.getsizeof(complaint.location.__dict__)
+    size += sum(sys.getsizeof(value) for value in complaint.__dict__.values())
+    size += sum(sys.getsizeof(value) for value in complaint.location.__dict__.values())
+    return size + 80  # id string
+
+
+class WindowStore:
+    """
+    Complaints of the last window_hours in fixed-width columns plus object
+    columns, appended in arrival order. Rows are marked dead when they age
+    out or are replaced, and the columns are compacted whenever they fill
+    up or dead rows dominate.
+
+    The grid index is a cell-sorted array of row numbers rebuilt on
+    compaction, plus per-cell lists for rows appended since.
+
+    Memory is capped at max_bytes (columns plus estimated model sizes).
+    Over budget the oldest rows are dropped and the store stops claiming
+    the hours they covered, so callers fall back to MongoDB for those.
+    The cap covers this store only: the tile index, duplicate index and
+    clustering engine keep their own state for the same complaints, so
+    the process holds more than max_bytes for the window.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = config.WINDOW_STORE_ENABLED,
+        window_hours: float = config.WINDOW_STORE_HOURS,
+        max_mb: float = config.WINDOW_STORE_MAX_MB,
+        cell_km: float = config.WINDOW_STORE_CELL_KM
+    ):
+        self.enabled = enabled
+        self.window_hours = window_hours
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.cell_km = cell_km
+        self.cell_deg = cell_km / KM_PER_DEGREE_LAT
+        self.ready = False
+        # Complaints at or before this time were dropped to stay within budget
+        self.floor: Optional[datetime] = None
+        self._evicted_at = 0.0
+        self._allocate(1024)
+        self._index: Dict[str, int] = {}
+        self._size = 0
+        self._payload = 0
+        self._cells: Dict[tuple, Tuple[int, int]] = {}
+        self._cell_rows = np.empty(0, dtype=np.int64)
+        self._tail: Dict[tuple, List[int]] = {}
+
+    def _allocate(self, capacity: int):
+        self._rows = np.zeros(capacity, dtype=ROW_DTYPE)
+        self._ids = np.empty(capacity, dtype=object)
+        self._wards = np.empty(capacity, dtype=object)
+        self._areas = np.empty(capacity, dtype=object)
+        self._complaints = np.empty(capacity, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._rows) * _SLOT_BYTES + self._cell_rows.nbytes + self._payload
+
+    # ---- Coverage ------------------------------------------------------
+
+    def _cutoff(self) -> datetime:
+        return datetime.utcnow() - timedelta(hours=self.window_hours)
+
+    def covers(self, hours: float) -> bool:
+        """Whether every complaint of the last `hours` is held here"""
+        if not (self.enabled and self.ready) or hours > self.window_hours:
+            return False
+        return self.floor is None or datetime.utcnow() - timedelta(hours=hours) > self.floor
+
+    # ---- Mutation ------------------------------------------------------
+
+    def _cell(self, latitude: float, longitude: float) -> tuple:
+        return (math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg))
+
+    def add(self, complaint_id: str, complaint: Complaint) -> bool:
+        """Hold a stored complaint if it falls in the window; False if skipped"""
+        if not self.enabled or complaint_id in self._index:
+            return False
+        if complaint.timestamp < self._cutoff() or (self.floor is not None and complaint.timestamp <= self.floor):
+            return False
+        if self._size == len(self._rows):
+            self._compact(grow=True)
+
+        row = self._size
+        payload = _payload_bytes(complaint)
+        location = complaint.location
+        self._rows[row] = (
+            location.latitude,
+            location.longitude,
+            np.datetime64(complaint.timestamp, "ms"),
+            complaint.urgency_score or 0,
+            category_code(complaint.category),
+            1 + (complaint.corroborations or 0),
+            payload,
+            True,
+        )
+        self._ids[row] = complaint_id
+        self._wards[row] = location.ward
+        self._areas[row] = location.area_name
+        self._complaints[row] = complaint.model_copy(update={"id": complaint_id})
+        self._index[complaint_id] = row
+        self._tail.setdefault(self._cell(location.latitude, location.longitude), []).append(row)
+        self._payload += payload
+        self._size += 1
+
+        if self.memory_bytes > self.max_bytes:
+            self._shed()
+        return True
+
+    def add_complaints(self, items: List[Tuple[str, Complaint]]):
+        for complaint_id, complaint in items:
+            self.add(complaint_id, complaint)
+
+    def _kill(self, rows: np.ndarray):
+        self._rows["alive"][rows] = False
+        self._payload -= int(self._rows["payload"][rows].sum())
+        for complaint_id in self._ids[rows].tolist():
+            del self._index[complaint_id]
+        self._complaints[rows] = None
+
+    def remove(self, complaint_id: str):
+        row = self._index.get(complaint_id)
+        if row is not None:
+            self._kill(np.array([row]))
+
+    def refresh_complaint(self, complaint_id: str, complaint: Optional[Complaint]):
+        """Replace a held complaint after its stored fields changed"""
+        self.remove(complaint_id)
+        if complaint is not None:
+            self.add(complaint_id, complaint)
+
+    def set_weight(self, complaint_id: str, corroborations: int):
+        row = self._index.get(complaint_id)
+        if row is None:
+            return
+        self._rows["weight"][row] = 1 + corroborations
+        self._complaints[row] = self._complaints[row].model_copy(update={"corroborations": corroborations})
+
+    def _evict(self):
+        """Age rows out of the window, at most once per interval"""
+        now = time.monotonic()
+        if now - self._evicted_at < _EVICT_INTERVAL_SECONDS:
+            return
+        self._evicted_at = now
+        rows = self._rows[:self._size]
+        expired = np.flatnonzero(rows["alive"] & (rows["timestamp"] < np.datetime64(self._cutoff(), "ms")))
+        if len(expired):
+            self._kill(expired)
+        if self._size > 1024 and len(self._index) < self._size // 2:
+            self._compact()
+
+    def _shed(self):
+        """Drop the oldest rows until the store is back under 90% of its budget"""
+        live = np.flatnonzero(self._rows["alive"][:self._size])
+        order = live[np.argsort(self._rows["timestamp"][live], kind="stable")]
+        # After compaction each live row costs its payload, a column slot with
+        # a quarter spare, and its entry in the cell index
+        row_bytes = self._rows["payload"][order] + _SLOT_BYTES * 5 // 4 + 8
+        excess = int(row_bytes.sum()) - int(self.max_bytes * 0.9)
+        if excess > 0 and len(order):
+            count = int(np.searchsorted(np.cumsum(row_bytes), excess)) + 1
+            last = self._rows["timestamp"][order[min(count, len(order)) - 1]]
+            # Drop whole timestamps so the floor is exact
+            self._kill(order[self._rows["timestamp"][order] <= last])
+            floor = to_datetime(last)
+            self.floor = floor if self.floor is None else max(self.floor, floor)
+            print(f"[!] Complaint window over its {self.max_bytes / (1024 * 1024):g} MB budget;"
+                  f" serving complaints after {self.floor} only")
+        self._compact()
+
+    def _compact(self, grow: bool = False):
+        """Rebuild columns and the cell index from live rows only"""
+        keep = np.flatnonzero(self._rows["alive"][:self._size])
+        n = len(keep)
+        capacity = max(1024, n + n // 4)
+        if grow and n + n // 8 >= len(self._rows):
+            # Mostly live rows: double instead of compacting again soon
+            capacity = max(capacity, 2 * len(self._rows))
+        rows, ids = self._rows[keep], self._ids[keep]
+        wards, areas, complaints = self._wards[keep], self._areas[keep], self._complaints[keep]
+
+        self._allocate(capacity)
+        self._rows[:n] = rows
+        self._ids[:n] = ids
+        self._wards[:n] = wards
+        self._areas[:n] = areas
+        self._complaints[:n] = complaints
+        self._size = n
+        self._index = dict(zip(ids.tolist(), range(n)))
+        self._payload = int(rows["payload"].sum())
+
+        cell_lat = np.floor(rows["latitude"] / self.cell_deg).astype(np.int64)
+        cell_lng = np.floor(rows["longitude"] / self.cell_deg).astype(np.int64)
+        order = np.lexsort((cell_lng, cell_lat))
+        cell_lat, cell_lng = cell_lat[order], cell_lng[order]
+        changed = (np.diff(cell_lat) != 0) | (np.diff(cell_lng) != 0)
+        starts = np.flatnonzero(np.r_[True, changed]) if n else np.empty(0, dtype=np.int64)
+        ends = np.r_[starts[1:], n].astype(np.int64)
+        self._cells = {
+            (lat, lng): (start, end)
+            for lat, lng, start, end in zip(
+                cell_lat[starts].tolist(), cell_lng[starts].tolist(), starts.tolist(), ends.tolist()
+            )
+        }
+        self._cell_rows = order
+        self._tail = {}
+
+    # ---- Queries -------------------------------------------------------
+
+    def _candidates(self, latitude: float, longitude: float, radius_km: Optional[float]) -> Optional[np.ndarray]:
+        """Rows in grid cells that may lie within radius_km; None when that is every row"""
+        if radius_km is None:
+            return None
+        span = math.ceil(radius_km * _PREFILTER_MARGIN / self.cell_km)
+        # A degree of longitude shrinks with latitude, so widen the column search
+        cos_lat = max(math.cos(math.radians(min(abs(latitude) + (span + 1) * self.cell_deg, 89.9))), 1e-6)
+        col_span = math.ceil(span / cos_lat)
+        if (2 * span + 1) * (2 * col_span + 1) >= len(self._cells) + len(self._tail):
+            return None
+
+        row, col = self._cell(latitude, longitude)
+        slices, tail = [], []
+        for dr in range(-span, span + 1):
+            for dc in range(-col_span, col_span + 1):
+                cell = (row + dr, col + dc)
+                bounds = self._cells.get(cell)
+                if bounds is not None:
+                    slices.append(self._cell_rows[bounds[0]:bounds[1]])
+                tail.extend(self._tail.get(cell, ()))
+        if tail:
+            slices.append(np.array(tail, dtype=np.int64))
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def _within(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: Optional[float],
+        since: np.datetime64
+    ) -> Tuple[Optional[np.ndarray], np.ndarray, np.ndarray]:
+        """(candidate rows or None for all, live rows within radius_km, their distances)"""
+        candidates = self._candidates(latitude, longitude, radius_km)
+        rows = np.arange(self._size) if candidates is None else candidates
+        columns = self._rows[:self._size]
+        live = columns["alive"][rows] & (columns["timestamp"][rows] >= since)
+        rows = rows[live]
+        lat2 = columns["latitude"][rows]
+        lng2 = columns["longitude"][rows]
+        if radius_km is not None:
+            # Cheap box test before the exact great-circle distance
+            dlat = radius_km * _PREFILTER_MARGIN / KM_PER_DEGREE_LAT
+            dlng = dlat / max(math.cos(math.radians(min(abs(latitude) + dlat, 89.9))), 1e-6)
+            box = (np.abs(lat2 - latitude) <= dlat) & (np.abs(lng2 - longitude) <= dlng)
+            rows, lat2, lng2 = rows[box], lat2[box], lng2[box]
+
+        lat1, lng1 = math.radians(latitude), math.radians(longitude)
+        lat2, lng2 = np.radians(lat2), np.radians(lng2)
+        a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+        if radius_km is not None:
+            within = distance <= radius_km
+            rows, distance = rows[within], distance[within]
+        return candidates, rows, distance
+
+    def nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: Optional[float],
+        limit: int,
+        hours: float
+    ) -> List[Tuple[Complaint, float]]:
+        """
+        Complaints of the last `hours` near a point, nearest first, with distance in km
+        Radius mode when radius_km is set, otherwise the `limit` nearest
+        """
+        self._evict()
+        since = np.datetime64(datetime.utcnow() - timedelta(hours=hours), "ms")
+        if radius_km is not None:
+            _, rows, distance = self._within(latitude, longitude, radius_km, since)
+        else:
+            # Widen a radius search until it holds `limit` rows: nothing outside can be nearer
+            search_km = self.cell_km
+            while True:
+                candidates, rows, distance = self._within(latitude, longitude, search_km, since)
+                if len(rows) >= limit or candidates is None:
+                    break
+                search_km *= 4
+            if candidates is None:
+                _, rows, distance = self._within(latitude, longitude, None, since)
+
+        if len(rows) > limit:
+            nearest = np.argpartition(distance, limit)[:limit]
+            rows, distance = rows[nearest], distance[nearest]
+        order = np.argsort(distance, kind="stable")
+        return list(zip(self._complaints[rows[order]].tolist(), distance[order].tolist()))
+
+    def frame(self, hours: float, limit: Optional[int] = None) -> ComplaintFrame:
+        """Complaints of the last `hours` as a frame, newest first"""
+        self._evict()
+        rows = self._rows[:self._size]
+        since = np.datetime64(datetime.utcnow() - timedelta(hours=hours), "ms")
+        selected = np.flatnonzero(rows["alive"] & (rows["timestamp"] >= since))
+        selected = selected[np.argsort(rows["timestamp"][selected], kind="stable")[::-1]]
+        if limit:
+            selected = selected[:limit]
+
+        picked = rows[selected]
+        return ComplaintFrame(
+            ids=self._ids[selected],
+            latitude=picked["latitude"],
+            longitude=picked["longitude"],
+            category=picked["category"],
+            urgency=picked["urgency"],
+            timestamp=picked["timestamp"],
+            ward=self._wards[selected],
+            area_name=self._areas[selected],
+            weight=picked["weight"]
+        )
+
+    # ---- Warm-up -------------------------------------------------------
+
+    async def warm_up(self, db: AsyncIOMotorDatabase):
+        """Load the window newest first, so a tight budget drops the oldest hours"""
+        if not self.enabled:
+            return
+        cursor = db.complaints.find({"timestamp": {"$gte": self._cutoff()}}).sort("timestamp", -1)
+        async for document in cursor:
+            if self.floor is not None:
+                # Over budget: everything older is left to MongoDB
+                break
+            complaint_id = str(document.pop("_id"))
+            self.add(complaint_id, Complaint(**document))
+        self._compact()
+        self.ready = True
+
+
+window_store = WindowStore()
@@ -0,0 +1,308 @@
+"""
+Write-Behind Complaint Queue
+Accepts submissions immediately with a client-generated ObjectId and
+batches them into insert_many, spilling to local files until stored
+"""
+
+import asyncio
+import fcntl
+import glob
+import json
+import os
+import time
+from typing import List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidDocument
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app import config
+from app.models import Complaint
+
+DUPLICATE_KEY = 11000
+
+# Per-document write errors worth retrying: the server was unreachable,
+# stepping down or shutting down. Anything else fails the same way again.
+TRANSIENT_WRITE_CODES = {
+    6,      # HostUnreachable
+    7,      # HostNotFound
+    89,     # NetworkTimeout
+    91,     # ShutdownInProgress
+    189,    # PrimarySteppedDown
+    262,    # ExceededTimeLimit
+    9001,   # SocketException
+    10107,  # NotWritablePrimary
+    11600,  # InterruptedAtShutdown
+    11602,  # InterruptedDueToReplStateChange
+    13435,  # NotPrimaryNoSecondaryOk
+    13436,  # NotPrimaryOrSecondary
+}
+
+
+class WriteBehindQueue:
+    """
+    In-process queue flushed when WRITE_BEHIND_MAX_BATCH complaints are
+    waiting or every WRITE_BEHIND_FLUSH_MS milliseconds.
+
+    Every accepted complaint is appended to the active spill segment before
+    its id is returned. Appends are group-committed: submissions arriving
+    while one write (and fsync, run in a thread) is in progress share the
+    next one. A flush seals the segment and deletes it only after every
+    complaint in it is stored, so a crash in between is recovered on next
+    start. Transient write errors are retried; complaints the database
+    rejects outright go to dead-letter.ndjson so their segments can go. Segments stay flock'ed by their process until deleted, so workers
+    sharing the spill directory only replay segments whose owner has exited.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = config.WRITE_BEHIND_ENABLED,
+        spill_dir: str = config.WRITE_BEHIND_SPILL_DIR,
+        max_batch: int = config.WRITE_BEHIND_MAX_BATCH,
+        flush_interval_ms: int = config.WRITE_BEHIND_FLUSH_MS,
+        fsync: bool = config.WRITE_BEHIND_FSYNC
+    ):
+        self.enabled = enabled
+        self.spill_dir = spill_dir
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval_ms / 1000
+        self.fsync = fsync
+
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._pending: List[Complaint] = []
+        self._segment = None
+        self._segment_path: Optional[str] = None
+        self._sealed: List[tuple] = []  # (path, locked handle)
+        self._spill_group: Optional[asyncio.Future] = None
+        self._spill_lines: List[str] = []
+        self._spill_complaints: List[Complaint] = []
+        self._spill_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    # ---- Spill segments ------------------------------------------------
+
+    def _open_segment(self):
+        self._segment_path = os.path.join(self.spill_dir, f"segment-{time.time_ns()}-{os.getpid()}.ndjson")
+        self._segment = open(self._segment_path, "a", encoding="utf-8")
+        fcntl.flock(self._segment.fileno(), fcntl.LOCK_EX)
+
+    def _seal_segment(self):
+        # Keep the handle (and its lock) until the segment is deleted
+        self._sealed.append((self._segment_path, self._segment))
+        self._open_segment()
+
+    def _claim_segments(self) -> List[tuple]:
+        """Leftover segments not owned by a running process, locked for replay"""
+        claimed = []
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, "segment-*.ndjson"))):
+            try:
+                handle = open(path, encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                continue
+            if not os.path.exists(path):
+                # Replayed and deleted by another worker between glob and lock
+                handle.close()
+                continue
+            claimed.append((path, handle))
+        return claimed
+
+    def _release_segments(self, segments: List[tuple]):
+        for path, handle in segments:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            handle.close()
+
+    async def _spill(self, complaint: Complaint):
+        """Append a complaint to the active segment with the next group commit"""
+        if self._spill_group is None:
+            self._spill_group = asyncio.get_running_loop().create_future()
+            asyncio.ensure_future(self._commit_spill())
+        group = self._spill_group
+        self._spill_lines.append(json.dumps(complaint.model_dump(mode="json", by_alias=True)) + "\n")
+        self._spill_complaints.append(complaint)
+        await asyncio.shield(group)
+
+    async def _commit_spill(self):
+        # One commit at a time; submissions arriving meanwhile form the next group
+        async with self._spill_lock:
+            group, self._spill_group = self._spill_group, None
+            lines, self._spill_lines = self._spill_lines, []
+            complaints, self._spill_complaints = self._spill_complaints, []
+            try:
+                self._segment.write("".join(lines))
+                self._segment.flush()
+                if self.fsync:
+                    await asyncio.to_thread(os.fsync, self._segment.fileno())
+            except Exception as e:
+                group.set_exception(e)
+                return
+            # Queued under the lock, so a flush never seals a segment holding
+            # complaints that are not yet pending
+            self._pending.extend(complaints)
+            if len(self._pending) >= self.max_batch:
+                self._wakeup.set()
+            group.set_result(None)
+
+    def _dead_letter(self, rejected: List[tuple]):
+        """Append permanently rejected complaints, with their errors, to the dead-letter file"""
+        path = os.path.join(self.spill_dir, "dead-letter.ndjson")
+        with open(path, "a", encoding="utf-8") as dead_letter:
+            for complaint, error in rejected:
+                record = {"error": str(error), "complaint": complaint.model_dump(mode="json", by_alias=True)}
+                dead_letter.write(json.dumps(record) + "\n")
+            dead_letter.flush()
+            if self.fsync:
+                os.fsync(dead_letter.fileno())
+        print(f"[!] Write-behind rejected {len(rejected)} complaints, kept in {path}: {rejected[0][1]}")
+
+    def _read_segments(self, segments: List[tuple]) -> List[Complaint]:
+        complaints = []
+        for _, handle in segments:
+            for line in handle:
+                if line.strip():
+                    complaints.append(Complaint(**json.loads(line)))
+        return complaints
+
+    # ---- Lifecycle -----------------------------------------------------
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        """Replay spill segments left by a previous process, then start flushing"""
+        self._db = db
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+        leftovers = self._claim_segments()
+        if leftovers:
+            recovered = self._read_segments(leftovers)
+            try:
+                failed = await self._store(recovered)
+            except Exception as e:
+                print(f"[!] Spill recovery failed, will retry: {e}")
+                failed = recovered
+            if failed:
+                # The flush loop retries them; the segments go once they are stored
+                self._pending = failed
+                self._sealed = leftovers
+            else:
+                self._release_segments(leftovers)
+            if len(failed) < len(recovered):
+                print(f"[+] Recovered {len(recovered) - len(failed)} spilled complaints")
+
+        self._open_segment()
+        self._task = asyncio.create_task(self._run())
+
+    async def drain(self):
+        """Stop the flusher and store everything still queued"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"[!] Write-behind drain failed: {e}")
+        if self._pending:
+            self._segment.close()
+            for _, handle in self._sealed:
+                handle.close()
+            print(f"[!] {len(self._pending)} complaints left in spill segments")
+        else:
+            self._release_segments([(self._segment_path, self._segment)])
+
+    # ---- Queueing ------------------------------------------------------
+
+    async def enqueue(self, complaint: Complaint) -> str:
+        """Accept a validated complaint and return its id before it is stored"""
+        complaint = complaint.model_copy(update={"id": complaint.id or str(ObjectId())})
+        await self._spill(complaint)
+        return complaint.id
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[!] Write-behind flush failed, will retry: {e}")
+
+    async def flush(self):
+        """Store every queued complaint with one unordered insert_many"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            async with self._spill_lock:
+                batch, self._pending = self._pending, []
+                self._seal_segment()
+            try:
+                failed = await self._store(batch)
+            except Exception:
+                # Keep the batch (and its sealed segments) for the next attempt
+                self._pending = batch + self._pending
+                raise
+            if failed:
+                # Sealed segments stay until these are stored (or dead-lettered) too
+                self._pending = failed + self._pending
+                return
+
+            self._release_segments(self._sealed)
+            self._sealed = []
+
+    async def _store(self, complaints: List[Complaint]) -> List[Complaint]:
+        """
+        Insert complaints; returns those hit by a transient error, to retry.
+        Permanent rejections go to the dead-letter file instead.
+        """
+        from app.services.complaint_service import ComplaintService
+
+        try:
+            _, errors = await ComplaintService(self._db).create_complaints(complaints)
+        except InvalidDocument as e:
+            # Encoding failed client-side (e.g. over the BSON size limit) before
+            # anything was sent; store one at a time to isolate the culprit
+            if len(complaints) == 1:
+                self._dead_letter([(complaints[0], e)])
+                return []
+            retry = []
+            for complaint in complaints:
+                retry.extend(await self._store([complaint]))
+            return retry
+
+        retry, rejected = [], []
+        for index in sorted(errors):
+            code = getattr(errors[index], "code", None)
+            if code == DUPLICATE_KEY:
+                # An earlier attempt already stored the complaint
+                continue
+            if code in TRANSIENT_WRITE_CODES:
+                retry.append((complaints[index], errors[index]))
+            else:
+                rejected.append((complaints[index], errors[index]))
+        if rejected:
+            self._dead_letter(rejected)
+        if retry:
+            print(f"[!] Write-behind could not store {len(retry)} complaints, will retry: {retry[0][1]}")
+        return [complaint for complaint, _ in retry]
+
+
+write_behind_queue = WriteBehindQueue()
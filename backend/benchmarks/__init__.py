@@ -0,0 +1,3 @@
+"""
+Microbenchmarks for backend hot paths
+"""
@@ -0,0 +1,84 @@
+"""
+Event Loop Responsiveness Benchmark
+Latency of a simulated /submit handler (NLP analysis) while a dashboard
+recompute runs inline on the event loop versus on the compute executor
+
+Run from backend/: python -m benchmarks.bench_event_loop
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from app.services.clustering_service import ClusteringService
+from app.services.complaint_frame import ComplaintFrame
+from app.services.compute_executor import compute_executor
+from app.services.dashboard_service import cluster_window
+from app.services.nlp_service import NLPService
+from demo_data_generator import generate_documents
+
+
+def recompute(documents, clustering):
+    """Frame decode + DBSCAN + aggregation, as the batch dashboard path does"""
+    return cluster_window(clustering, ComplaintFrame.from_documents(documents))
+
+
+async def submissions(nlp: NLPService, texts, interval: float, stop: asyncio.Event) -> list:
+    """Fire one analyze per interval and record how late each one completes"""
+    latencies = []
+    i = 0
+    while not stop.is_set():
+        arrival = time.perf_counter()
+        await asyncio.sleep(interval)
+        nlp.analyze(texts[i % len(texts)])
+        # Time beyond the nominal wait is time spent queued behind other work
+        latencies.append(time.perf_counter() - arrival - interval)
+        i += 1
+    return latencies
+
+
+async def scenario(mode: str, documents, clustering, nlp, texts, rounds: int, interval: float) -> list:
+    stop = asyncio.Event()
+    probe = asyncio.create_task(submissions(nlp, texts, interval, stop))
+    await asyncio.sleep(interval)
+    for _ in range(rounds):
+        if mode == "inline":
+            recompute(documents, clustering)
+            await asyncio.sleep(0)
+        elif mode == "executor":
+            await compute_executor.run(recompute, documents, clustering)
+        else:
+            await asyncio.sleep(0.5)
+    stop.set()
+    return await probe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Submit latency during dashboard recomputes")
+    parser.add_argument("--complaints", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--interval-ms", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    documents = [
+        {**document, "_id": f"{i:024x}"}
+        for i, document in enumerate(generate_documents(args.complaints, args.seed))
+    ]
+    texts = [document["text"] for document in documents[:1000]]
+    clustering = ClusteringService()
+    nlp = NLPService()
+
+    print(f"{args.complaints} complaints, one submission every {args.interval_ms} ms")
+    for mode in ("idle", "inline", "executor"):
+        latencies = asyncio.run(scenario(
+            mode, documents, clustering, nlp, texts, args.rounds, args.interval_ms / 1000
+        ))
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        print(f"  {mode:<9} submits {len(latencies):>6}  p50 {p50:>8.2f} ms  p99 {p99:>8.2f} ms  max {max(latencies) * 1000:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
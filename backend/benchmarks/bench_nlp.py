@@ -0,0 +1,82 @@
+"""
+NLP Keyword Matching Benchmark
+Compares the single-pass NLPService.analyze against the previous
+per-table scans and checks that both produce identical results
+
+Run from backend/: python -m benchmarks.bench_nlp
+"""
+
+import random
+import timeit
+
+from app.models import CategoryEnum
+from app.services.nlp_service import NLPService
+
+SAMPLE_TEXTS = [
+    "Water pipe burst on Main Street, no water for 3 days - urgent",
+    "Streetlight not working for days, very dark at night",
+    "Garbage overflowing at dump site with foul smell",
+    "Large pothole on main road - dangerous for vehicles",
+    "Exposed electrical wires sparking near the transformer, power cut since morning",
+    "Drain clogged and stagnant water logging after rain, sewage blockage",
+    "Park maintenance pending, trees not trimmed",
+    "Please look into this",
+]
+
+
+def legacy_analyze(service: NLPService, text: str) -> tuple:
+    """Previous behaviour: each table scanned separately, sentiment scanned twice"""
+    text_lower = text.lower()
+    scores = {}
+    for category, keywords in service.category_keywords.items():
+        scores[category] = sum(1 for kw in keywords if kw in text_lower)
+    best_category = max(scores, key=scores.get)
+    confidence = min(1.0, scores[best_category] / 3.0) if scores[best_category] > 0 else 0.3
+    if scores[best_category] == 0:
+        best_category = CategoryEnum.OTHERS
+
+    def sentiment():
+        hits = sum(1 for kw in service.negative_markers if kw in text.lower())
+        return ("NEGATIVE" if hits > 0 else "NEUTRAL"), 0.5 + min(hits, 3) * 0.15
+
+    label, sentiment_score = sentiment()
+    max_score = 1
+    for keyword, score in service.urgency_keywords.items():
+        if keyword in text.lower():
+            max_score = max(max_score, score)
+    if sentiment()[1] > 0.8:
+        max_score = min(max_score + 2, 10)
+    return best_category, confidence, label, sentiment_score, max_score
+
+
+def random_texts(service: NLPService, count: int, seed: int = 0) -> list:
+    """Texts stitched from keywords and filler, including run-together words"""
+    rng = random.Random(seed)
+    words = list(service._vocabulary) + ["the", "near", "very", "bad", "since", "ROAD", "Water"]
+    texts = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 25))) for _ in range(count)]
+    texts += ["".join(rng.choice(words) for _ in range(4)) for _ in range(count // 5)]
+    return texts + SAMPLE_TEXTS
+
+
+def main(number: int = 20000):
+    service = NLPService()
+
+    texts = random_texts(service, 20000)
+    mismatches = sum(1 for text in texts if tuple(service.analyze(text)) != legacy_analyze(service, text))
+    print(f"Equivalence: {len(texts)} texts, {mismatches} mismatches")
+
+    for text in SAMPLE_TEXTS[:3]:
+        before = min(timeit.repeat(lambda: legacy_analyze(service, text), number=number, repeat=5))
+        after = min(timeit.repeat(lambda: service.analyze(text), number=number, repeat=5))
+        print(
+            f"{len(text):4d} chars  before {before / number * 1e6:6.2f} us  "
+            f"after {after / number * 1e6:6.2f} us  speedup {before / after:.1f}x"
+        )
+
+    batch = texts[:10000]
+    elapsed = min(timeit.repeat(lambda: service.analyze_batch(batch), number=1, repeat=3))
+    print(f"analyze_batch: {len(batch) / elapsed:,.0f} texts/s")
+
+
+if __name__ == "__main__":
+    main()
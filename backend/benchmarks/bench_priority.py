@@ -0,0 +1,42 @@
+"""
+Priority Scoring Benchmark
+Rescoring throughput of the vectorised scorer against per-cluster calls
+
+Run from backend/: python -m benchmarks.bench_priority
+"""
+
+import time
+
+import numpy as np
+
+from app.services.clustering_service import ClusteringService
+
+
+def main(clusters: int = 50000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    service = ClusteringService()
+
+    frequency = rng.integers(2, 200, clusters)
+    mean_urgency = rng.uniform(1, 10, clusters)
+    last_report = np.datetime64("2026-01-10T00:00:00", "ms") - rng.integers(0, 72 * 3_600_000, clusters).astype("timedelta64[ms]")
+    first_report = last_report - rng.integers(0, 72 * 3_600_000, clusters).astype("timedelta64[ms]")
+    duration_hours = (last_report - first_report).astype(np.int64) / 3_600_000
+
+    start = time.perf_counter()
+    scalar = [
+        service.calculate_priority_score(int(f), float(u), float(d))
+        for f, u, d in zip(frequency, mean_urgency, duration_hours)
+    ]
+    scalar_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorised = service.score_priorities(frequency, mean_urgency, first_report, last_report)
+    vector_elapsed = time.perf_counter() - start
+
+    assert np.allclose(scalar, vectorised)
+    print(f"scalar:     {clusters / scalar_elapsed:>14,.0f} clusters/s")
+    print(f"vectorised: {clusters / vector_elapsed:>14,.0f} clusters/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+JSON Response Serialisation Benchmark
+Encoded bytes/sec of a complaint listing through FastAPI's default path
+(jsonable_encoder + JSONResponse) against FastJSONResponse
+
+Run from backend/: python -m benchmarks.bench_serialization
+"""
+
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models import Complaint
+from app.responses import FastJSONResponse
+from demo_data_generator import generate_documents
+
+
+def main(rows: int = 1000, repeat: int = 20, seed: int = 3):
+    complaints = [
+        Complaint(**{**document, "_id": f"{i:024x}"})
+        for i, document in enumerate(generate_documents(rows, seed))
+    ]
+
+    def default_path() -> bytes:
+        payload = {"complaints": [c.model_dump() for c in complaints], "next_cursor": None}
+        return JSONResponse(jsonable_encoder(payload)).body
+
+    def fast_path() -> bytes:
+        payload = {"complaints": [c.model_dump() for c in complaints], "next_cursor": None}
+        return FastJSONResponse(payload).body
+
+    assert json.loads(default_path()) == json.loads(fast_path())
+
+    for name, fn in [("jsonable_encoder + json", default_path), ("orjson", fast_path)]:
+        size = len(fn())
+        elapsed = min(timeit.repeat(fn, number=1, repeat=repeat))
+        print(f"{name:<25} {rows / elapsed:>12,.0f} rows/s  {size / elapsed / 1e6:>8.1f} MB/s  ({elapsed * 1000:.2f} ms per response)")
+
+
+if __name__ == "__main__":
+    main()
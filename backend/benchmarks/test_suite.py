@@ -0,0 +1,84 @@
+"""
+Microbenchmark Suite
+NLP throughput, DBSCAN clustering (all categories together and per
+category) at several sizes and dashboard aggregation on seeded synthetic
+data, as pytest-benchmark tests so runs can be saved and compared
+
+Run from backend/:
+    pytest benchmarks --benchmark-storage=benchmarks/results --benchmark-autosave
+    pytest benchmarks --benchmark-storage=benchmarks/results --benchmark-compare \\
+        --benchmark-compare-fail=min:10%
+
+BENCH_SIZES (comma-separated complaint counts), BENCH_NLP_TEXTS and
+BENCH_SEED override the synthetic data.
+"""
+
+import os
+from functools import lru_cache
+from typing import List, Tuple
+
+import pytest
+
+from app.models import Complaint
+from app.services.clustering_service import ClusteringService
+from app.services.complaint_frame import ComplaintFrame
+from app.services.dashboard_service import heatmap_point
+from app.services.nlp_service import NLPService
+from demo_data_generator import generate_documents
+
+SIZES = [int(size) for size in os.getenv("BENCH_SIZES", "1000,10000,50000").split(",")]
+NLP_TEXTS = int(os.getenv("BENCH_NLP_TEXTS", "20000"))
+SEED = int(os.getenv("BENCH_SEED", "7"))
+
+
+@lru_cache(maxsize=None)
+def dataset(size: int) -> Tuple[List[dict], List[Complaint], ComplaintFrame]:
+    """(documents with ids, complaint models, frame) for `size` complaints, built once per run"""
+    documents = [
+        {**document, "_id": f"{i:024x}"}
+        for i, document in enumerate(generate_documents(size, SEED))
+    ]
+    return documents, [Complaint(**document) for document in documents], ComplaintFrame.from_documents(documents)
+
+
+@pytest.mark.benchmark(group="nlp")
+def test_nlp_analyze_batch(benchmark):
+    nlp = NLPService()
+    texts = [document["text"] for document in generate_documents(NLP_TEXTS, SEED)]
+    benchmark(nlp.analyze_batch, texts)
+
+
+@pytest.mark.benchmark(group="clustering")
+@pytest.mark.parametrize("size", SIZES)
+def test_cluster_complaints(benchmark, size):
+    _, complaints, _ = dataset(size)
+    benchmark(ClusteringService().cluster_complaints, complaints)
+
+
+@pytest.mark.benchmark(group="clustering")
+@pytest.mark.parametrize("by_category", [False, True], ids=["all", "category"])
+@pytest.mark.parametrize("size", SIZES)
+def test_cluster_frame(benchmark, size, by_category):
+    _, _, frame = dataset(size)
+    benchmark(ClusteringService(by_category=by_category).cluster_frame, frame)
+
+
+@pytest.mark.benchmark(group="dashboard")
+@pytest.mark.parametrize("size", SIZES)
+def test_frame_decode(benchmark, size):
+    documents, _, _ = dataset(size)
+    benchmark(ComplaintFrame.from_documents, documents)
+
+
+@pytest.mark.benchmark(group="dashboard")
+@pytest.mark.parametrize("size", SIZES)
+def test_dashboard_aggregate(benchmark, size):
+    _, _, frame = dataset(size)
+    clustering = ClusteringService()
+
+    def aggregate():
+        labels = clustering.cluster_frame(frame)
+        clusters = clustering.build_incident_clusters_from_frame(frame, labels)
+        return [heatmap_point(cluster) for cluster in clusters]
+
+    benchmark(aggregate)
@@ -1,13 +1,25 @@
 """
 Demo Data Generator
-Generates 50+ realistic complaints to populate the heat map for hackathon demo
+Seeded synthetic complaints at demo or city scale (10k-10M): Zipf-weighted
+hotspots, a diurnal reporting pattern and template text, written to
+MongoDB or to NDJSON/Parquet files
+
+Usage (from backend/):
+    python demo_data_generator.py                                  # 60 demo complaints into MongoDB
+    python demo_data_generator.py --count 1000000 --output ndjson --path complaints.ndjson
+    python demo_data_generator.py --count 5000000 --output parquet --path complaints.parquet
 """
 
+import argparse
 import asyncio
-import random
+import json
+import math
+import os
 from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+import numpy as np
 from motor.motor_asyncio import AsyncIOMotorClient
-import os
 
 # Sample locations (lat, long) representing different wards in a city
 DEMO_LOCATIONS = [
@@ -62,66 +74,299 @@ COMPLAINT_TEMPLATES = {
         "Exposed electrical wires - safety hazard",
         "No electricity for 6 hours straight",
     ],
+    "Drainage": [
+        "Drain overflowing onto the road after rain",
+        "Sewage blockage causing water logging",
+        "Open drain without cover - dangerous for children",
+        "Stagnant water in drain breeding mosquitoes",
+    ],
+    "Garbage Collection": [
+        "Garbage van has not come for a week",
+        "Waste bins overflowing near the market",
+        "Door-to-door garbage collection stopped",
+        "Garbage dumped on the roadside",
+    ],
+    "Parks & Gardens": [
+        "Park maintenance pending, trees not trimmed",
+        "Broken swings in the children's park",
+        "Fallen tree blocking the park entrance",
+        "Park lights and benches damaged",
+    ],
 }
 
-async def generate_demo_data():
-    """Generate and insert demo complaints"""
-    mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-    database_name = os.getenv("DATABASE_NAME", "samadhansetu")
+# Relative report volume per hour of day (quiet overnight, morning and evening peaks)
+DIURNAL_PROFILE = [
+    0.3, 0.2, 0.15, 0.15, 0.2, 0.4, 0.8, 1.3, 1.8, 2.0, 1.9, 1.6,
+    1.4, 1.3, 1.3, 1.4, 1.5, 1.7, 1.9, 1.8, 1.5, 1.1, 0.8, 0.5,
+]
 
-    client = AsyncIOMotorClient(mongodb_url)
-    db = client[database_name]
-    complaints_collection = db.complaints
+URGENT_WORDS = ["dangerous", "sparking", "critical", "immediately", "hazard", "accidents"]
+CONCERN_WORDS = ["not", "no", "issue", "broken"]
 
-    # Clear existing complaints
-    await complaints_collection.delete_many({})
+CATEGORY_NAMES = list(COMPLAINT_TEMPLATES)
+TEMPLATES = [(category, text) for category in CATEGORY_NAMES for text in COMPLAINT_TEMPLATES[category]]
+_TEMPLATES_BY_CATEGORY = [
+    np.array([i for i, (category, _) in enumerate(TEMPLATES) if category == name])
+    for name in CATEGORY_NAMES
+]
 
-    demo_complaints = []
 
-    # Generate 50+ complaints
-    for i in range(60):
-        location = random.choice(DEMO_LOCATIONS)
-        category = random.choice(list(COMPLAINT_TEMPLATES.keys()))
-        template = random.choice(COMPLAINT_TEMPLATES[category])
+def _urgency_range(text: str) -> tuple:
+    """Urgency bounds implied by a template's wording"""
+    lowered = text.lower()
+    if any(word in lowered for word in URGENT_WORDS):
+        return 8, 10
+    if any(word in lowered.split() for word in CONCERN_WORDS):
+        return 5, 8
+    return 3, 10
 
-        # Vary urgency based on template keywords
-        urgency_score = random.randint(3, 10)
-        if any(word in template.lower() for word in ["dangerous", "sparking", "critical", "immediately"]):
-            urgency_score = random.randint(8, 10)
-        elif any(word in template.lower() for word in ["not", "no", "issue"]):
-            urgency_score = random.randint(5, 8)
 
-        # Add slight variation to location (cluster around the main location)
-        lat_variation = random.uniform(-0.005, 0.005)
-        lng_variation = random.uniform(-0.005, 0.005)
+_URGENCY_LOW, _URGENCY_HIGH = (np.array(bounds) for bounds in zip(*(_urgency_range(t) for _, t in TEMPLATES)))
 
-        complaint = {
-            "text": template,
+
+class Hotspots:
+    """Complaint sources around the demo locations, weighted by a Zipf law"""
+
+    def __init__(self, rng: np.random.Generator, count: int, zipf_exponent: float):
+        anchors = rng.integers(0, len(DEMO_LOCATIONS), count)
+        self.area = anchors
+        self.latitude = np.array([DEMO_LOCATIONS[a]["lat"] for a in anchors]) + rng.normal(0, 0.03, count)
+        self.longitude = np.array([DEMO_LOCATIONS[a]["lng"] for a in anchors]) + rng.normal(0, 0.03, count)
+        self.spread_deg = rng.uniform(0.0005, 0.004, count)
+        self.category = rng.integers(0, len(CATEGORY_NAMES), count)
+        self.ward = rng.integers(1, 13, count)
+
+        weights = 1.0 / np.arange(1, count + 1) ** zipf_exponent
+        self.weights = weights / weights.sum()
+
+
+def generate_columns(
+    rng: np.random.Generator,
+    hotspots: Hotspots,
+    size: int,
+    now: datetime,
+    hours: int
+) -> Dict[str, np.ndarray]:
+    """One batch of complaints as parallel columns"""
+    source = rng.choice(len(hotspots.weights), size=size, p=hotspots.weights)
+    latitude = hotspots.latitude[source] + rng.normal(0, 1, size) * hotspots.spread_deg[source]
+    longitude = hotspots.longitude[source] + rng.normal(0, 1, size) * hotspots.spread_deg[source]
+
+    # Most reports at a hotspot are about its dominant issue
+    category = np.where(
+        rng.random(size) < 0.7,
+        hotspots.category[source],
+        rng.integers(0, len(CATEGORY_NAMES), size)
+    )
+    template = np.empty(size, dtype=np.int64)
+    for code, choices in enumerate(_TEMPLATES_BY_CATEGORY):
+        rows = np.flatnonzero(category == code)
+        template[rows] = rng.choice(choices, size=len(rows))
+    urgency = rng.integers(_URGENCY_LOW[template], _URGENCY_HIGH[template] + 1)
+
+    # Day within the window, then hour by the diurnal profile; redraw what falls outside
+    day_start = np.datetime64(now.replace(hour=0, minute=0, second=0, microsecond=0), "s")
+    newest = np.datetime64(now, "s")
+    oldest = newest - np.timedelta64(hours * 3600, "s")
+    hour_weights = np.array(DIURNAL_PROFILE) / sum(DIURNAL_PROFILE)
+    days = math.ceil(hours / 24) + 1
+    timestamp = np.empty(size, dtype="datetime64[s]")
+    pending = np.arange(size)
+    while len(pending):
+        day = rng.integers(0, days, len(pending))
+        hour = rng.choice(24, size=len(pending), p=hour_weights)
+        seconds = day * -86400 + hour * 3600 + rng.integers(0, 3600, len(pending))
+        candidate = day_start + seconds.astype("timedelta64[s]")
+        valid = (candidate >= oldest) & (candidate <= newest)
+        timestamp[pending[valid]] = candidate[valid]
+        pending = pending[~valid]
+
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "category": category,
+        "template": template,
+        "urgency_score": urgency,
+        "sentiment_score": rng.uniform(0.6, 0.95, size),
+        "timestamp": timestamp,
+        "area": hotspots.area[source],
+        "ward": hotspots.ward[source],
+        "near_landmark": rng.random(size) < 0.4,
+        "voice_transcription": rng.random(size) < 0.2,
+        "citizen": rng.integers(0, max(size * 4, 1000), size),
+    }
+
+
+def columns_to_documents(columns: Dict[str, np.ndarray]) -> List[dict]:
+    """Complaint documents (MongoDB shape, without geo/_id) from a batch"""
+    documents = []
+    rows = zip(*(columns[key].tolist() for key in (
+        "latitude", "longitude", "category", "template", "urgency_score", "sentiment_score",
+        "timestamp", "area", "ward", "near_landmark", "voice_transcription", "citizen"
+    )))
+    for lat, lng, category, template, urgency, sentiment, timestamp, area, ward, landmark, voice, citizen in rows:
+        area_name = DEMO_LOCATIONS[area]["name"]
+        text = TEMPLATES[template][1]
+        documents.append({
+            "text": f"{text} near {area_name}" if landmark else text,
             "original_language": "en",
-            "category": category,
+            "category": CATEGORY_NAMES[category],
             "location": {
-                "latitude": location["lat"] + lat_variation,
-                "longitude": location["lng"] + lng_variation,
-                "ward": f"Ward {i % 12 + 1}",
-                "area_name": location["name"],
+                "latitude": lat,
+                "longitude": lng,
+                "ward": f"Ward {ward}",
+                "area_name": area_name,
             },
-            "sentiment_score": random.uniform(0.6, 0.95),  # Negative sentiment
-            "urgency_score": urgency_score,
-            "timestamp": datetime.utcnow() - timedelta(hours=random.randint(0, 72)),
-            "citizen_id": f"citizen_{i}",
-            "voice_transcription": random.choice([True, False]),
-        }
-        demo_complaints.append(complaint)
-
-    # Insert complaints
-    result = await complaints_collection.insert_many(demo_complaints)
-    print(f"✓ Inserted {len(result.inserted_ids)} demo complaints")
-
-    # Create geospatial index
-    await complaints_collection.create_index([("location", "2dsphere")])
-    print("✓ Created geospatial index")
+            "sentiment_score": sentiment,
+            "urgency_score": urgency,
+            "timestamp": timestamp,
+            "citizen_id": f"citizen_{citizen}",
+            "voice_transcription": voice,
+        })
+    return documents
+
+
+def generate_batches(
+    count: int,
+    seed: int = 42,
+    hours: int = 72,
+    hotspots: int = None,
+    zipf_exponent: float = 1.1,
+    batch_size: int = 50000,
+    now: datetime = None
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Column batches totalling `count` complaints; reproducible for a given seed and `now`"""
+    rng = np.random.default_rng(seed)
+    now = now or datetime.utcnow()
+    sources = Hotspots(rng, hotspots or max(len(DEMO_LOCATIONS), min(count // 200, 5000)), zipf_exponent)
+    for start in range(0, count, batch_size):
+        yield generate_columns(rng, sources, min(batch_size, count - start), now, hours)
+
+
+def generate_documents(count: int, seed: int = 42, **options) -> List[dict]:
+    """All generated complaints as documents (for in-memory use)"""
+    documents = []
+    for columns in generate_batches(count, seed, **options):
+        documents.extend(columns_to_documents(columns))
+    return documents
+
+
+# ---- Writers -----------------------------------------------------------
+
+async def write_mongo(batches: Iterator[Dict[str, np.ndarray]], append: bool) -> int:
+    """Insert into the configured MongoDB database"""
+    from app.services.complaint_service import COMPLAINT_INDEXES, geo_point
+
+    mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+    database_name = os.getenv("DATABASE_NAME", "samadhansetu")
+
+    client = AsyncIOMotorClient(mongodb_url)
+    complaints_collection = client[database_name].complaints
+
+    # Clear existing complaints
+    if not append:
+        await complaints_collection.delete_many({})
+
+    inserted = 0
+    for columns in batches:
+        documents = columns_to_documents(columns)
+        for document in documents:
+            document["geo"] = geo_point(document["location"]["latitude"], document["location"]["longitude"])
+        for start in range(0, len(documents), 5000):
+            result = await complaints_collection.insert_many(documents[start:start + 5000], ordered=False)
+            inserted += len(result.inserted_ids)
+        print(f"✓ Inserted {inserted} complaints")
+
+    # Create the indexes the API relies on
+    await complaints_collection.create_indexes(COMPLAINT_INDEXES)
+    print("✓ Created indexes")
 
     client.close()
+    return inserted
+
+
+def write_ndjson(batches: Iterator[Dict[str, np.ndarray]], path: str) -> int:
+    """One complaint per line, accepted as-is by POST /api/complaints/bulk"""
+    written = 0
+    with open(path, "w", encoding="utf-8") as output:
+        for columns in batches:
+            documents = columns_to_documents(columns)
+            output.writelines(json.dumps(document, default=datetime.isoformat) + "\n" for document in documents)
+            written += len(documents)
+            print(f"✓ Wrote {written} complaints")
+    return written
+
+
+def write_parquet(batches: Iterator[Dict[str, np.ndarray]], path: str) -> int:
+    """Flat columnar file; needs pyarrow"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+
+    area_names = np.array([location["name"] for location in DEMO_LOCATIONS], dtype=object)
+    template_texts = np.array([text for _, text in TEMPLATES], dtype=object)
+    categories = np.array(CATEGORY_NAMES, dtype=object)
+
+    written = 0
+    writer = None
+    for columns in batches:
+        area_name = area_names[columns["area"]]
+        text = template_texts[columns["template"]]
+        text = np.where(columns["near_landmark"], text + " near " + area_name, text)
+        table = pa.table({
+            "text": text.tolist(),
+            "category": categories[columns["category"]].tolist(),
+            "latitude": columns["latitude"],
+            "longitude": columns["longitude"],
+            "ward": [f"Ward {ward}" for ward in columns["ward"].tolist()],
+            "area_name": area_name.tolist(),
+            "sentiment_score": columns["sentiment_score"],
+            "urgency_score": columns["urgency_score"],
+            "timestamp": columns["timestamp"].astype("datetime64[ms]"),
+            "citizen_id": [f"citizen_{citizen}" for citizen in columns["citizen"].tolist()],
+            "voice_transcription": columns["voice_transcription"],
+        })
+        if writer is None:
+            writer = pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+        written += table.num_rows
+        print(f"✓ Wrote {written} complaints")
+    if writer is not None:
+        writer.close()
+    return written
+
+
+async def generate_demo_data(count: int = 60, seed: int = 42, append: bool = False):
+    """Generate and insert demo complaints"""
+    await write_mongo(generate_batches(count, seed), append)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic complaints")
+    parser.add_argument("--count", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--hours", type=int, default=72, help="spread reports over this many past hours")
+    parser.add_argument("--hotspots", type=int, default=None, help="number of complaint sources")
+    parser.add_argument("--zipf", type=float, default=1.1, help="hotspot popularity exponent")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--output", choices=["mongo", "ndjson", "parquet"], default="mongo")
+    parser.add_argument("--path", help="output file for ndjson/parquet")
+    parser.add_argument("--append", action="store_true", help="keep existing MongoDB complaints")
+    args = parser.parse_args()
+
+    batches = generate_batches(
+        args.count, args.seed,
+        hours=args.hours, hotspots=args.hotspots, zipf_exponent=args.zipf, batch_size=args.batch_size
+    )
+    if args.output == "mongo":
+        asyncio.run(write_mongo(batches, args.append))
+    elif args.output == "ndjson":
+        write_ndjson(batches, args.path or "complaints.ndjson")
+    else:
+        write_parquet(batches, args.path or "complaints.parquet")
+
 
 if __name__ == "__main__":
-    asyncio.run(generate_demo_data())
+    main()
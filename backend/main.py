@@ -5,6 +5,8 @@ FastAPI server for complaint aggregation, NLP classification, and geospatial ana
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -34,6 +36,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+from app import config
+from app.metrics import MetricsMiddleware, loop_lag_monitor, register_router, registry
+
+from app.profiling import ProfilingMiddleware
+
+if config.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Profiles requests carrying the admin X-Profile header, or a sampled share when enabled
+app.add_middleware(ProfilingMiddleware)
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -48,29 +61,165 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text-format metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Import and include routers
-from app.routes import complaints, dashboard
+from app.routes import admin, complaints, dashboard
 app.include_router(complaints.router, prefix="/api/complaints", tags=["complaints"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+register_router(complaints.router, "/api/complaints")
+register_router(dashboard.router, "/api/dashboard")
+register_router(admin.router, "/api/admin")
+
+async def backfill_geo(complaint_service):
+    """Add GeoJSON points to complaints stored before the `geo` field existed"""
+    try:
+        updated = await complaint_service.backfill_geo()
+        if updated:
+            print(f"[+] Backfilled GeoJSON location on {updated} complaints")
+    except Exception as e:
+        print(f"[!] GeoJSON backfill failed: {e}")
+
+async def bootstrap_rollups(db):
+    """Build hourly rollups once for a database that predates them"""
+    from app.services.rollup_service import RollupService
+    rollups = RollupService(db)
+    try:
+        await rollups.ensure_indexes()
+        if await db.complaint_rollups.find_one({}, {"_id": 1}) is None \
+                and await db.complaints.find_one({}, {"_id": 1}) is not None:
+            buckets = await rollups.rebuild()
+            print(f"[+] Built {buckets} hourly rollup buckets")
+    except Exception as e:
+        print(f"[!] Rollup bootstrap failed: {e}")
 
 # Database lifecycle events
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
-    from app.database import connect_to_mongo
+    from app.database import connect_to_mongo, mongodb
+    from app.services.incremental_clustering import clustering_engine
+    from app.services.peer_sync import peer_sync
+    from app.services.shared_state import shared_state
+    from app.services.write_behind import write_behind_queue
     await connect_to_mongo()
+    if config.METRICS_ENABLED:
+        loop_lag_monitor.start()
+
+    # Indexes first so the backfill and nearby queries are index-served
+    from app.services.complaint_service import ComplaintService
+    complaint_service = ComplaintService(mongodb.db)
+    try:
+        await complaint_service.ensure_indexes()
+        print("[+] Complaint indexes ready")
+    except Exception as e:
+        print(f"[!] Index creation failed: {e}")
+    app.state.geo_backfill = asyncio.create_task(backfill_geo(complaint_service))
+
+    # Replay any spilled submissions before building derived state
+    if write_behind_queue.enabled:
+        await write_behind_queue.start(mongodb.db)
+        print("[+] Write-behind submissions enabled")
+
+    # With several workers only the leader writes incident_clusters;
+    # writes stored from here on reach the others through peer catch-up
+    if shared_state is not None:
+        clustering_engine.persist = shared_state.try_lead()
+    peer_sync.mark()
+
+    # Dashboard statistics read hourly rollups; one worker builds them if missing
+    if config.ROLLUPS_ENABLED and (shared_state is None or shared_state.is_leader):
+        app.state.rollup_bootstrap = asyncio.create_task(bootstrap_rollups(mongodb.db))
+
+    # Build live incident clusters from the recent window
+    try:
+        await clustering_engine.warm_up(mongodb.db)
+        print(f"[+] Clustering engine ready ({clustering_engine.total_reports} reports)")
+    except Exception as e:
+        print(f"[!] Clustering engine warm-up failed, using batch clustering: {e}")
+
+    # Pre-aggregate heat map tiles for the same window
+    from app.services.tile_index import tile_index
+    try:
+        await tile_index.warm_up(mongodb.db)
+        print("[+] Heat map tiles ready")
+    except Exception as e:
+        print(f"[!] Heat map tile warm-up failed, will retry on first request: {e}")
+
+    # Recent complaint texts that new reports may corroborate
+    from app.services.duplicate_index import duplicate_index
+    try:
+        await duplicate_index.warm_up(mongodb.db)
+        if duplicate_index.enabled:
+            print(f"[+] Duplicate index ready ({len(duplicate_index)} complaints)")
+    except Exception as e:
+        print(f"[!] Duplicate index warm-up failed: {e}")
+
+    # Recent complaints resident in memory for nearby lookups and dashboard frames
+    from app.services.window_store import window_store
+    try:
+        await window_store.warm_up(mongodb.db)
+        if window_store.enabled:
+            print(f"[+] Complaint window ready ({len(window_store)} complaints,"
+                  f" {window_store.memory_bytes / (1024 * 1024):.1f} MB)")
+    except Exception as e:
+        print(f"[!] Complaint window warm-up failed, reading from MongoDB: {e}")
+
+    # Push dashboard changes to stream subscribers
+    from app.services.live_updates import dashboard_publisher
+    dashboard_publisher.start(mongodb.db, mongodb.read_db)
+
+    # The leader worker keeps shared cluster snapshots current for all workers
+    if shared_state is not None:
+        from app.services.dashboard_service import get_cluster_snapshot
+
+        async def refresh_shared_snapshot():
+            await get_cluster_snapshot(mongodb.db, read_db=mongodb.read_db)
+
+        async def take_over_clusters():
+            await peer_sync.sync(mongodb.db)
+            if clustering_engine.ready:
+                await clustering_engine.take_over(mongodb.db)
+
+        shared_state.start(refresh_shared_snapshot, take_over_clusters)
+        print(f"[+] Sharing dashboard state via {shared_state.directory}"
+              f" ({'leader' if shared_state.is_leader else 'follower'})")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Close database connection on shutdown"""
+    """Drain queued submissions, then close database connection on shutdown"""
     from app.database import close_mongo_connection
+    from app.services.compute_executor import compute_executor
+    from app.services.live_updates import dashboard_publisher
+    from app.services.shared_state import shared_state
+    from app.services.write_behind import write_behind_queue
+    if shared_state is not None:
+        await shared_state.stop()
+    await dashboard_publisher.stop()
+    await loop_lag_monitor.stop()
+    await write_behind_queue.drain()
+    compute_executor.shutdown()
     await close_mongo_connection()
 
+def shared_state_dir() -> str:
+    """Fresh directory for worker-shared state, in memory when /dev/shm exists"""
+    import tempfile
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    return tempfile.mkdtemp(prefix="samadhan-setu-", dir=base)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        app,
-        host=os.getenv("API_HOST", "0.0.0.0"),
-        port=int(os.getenv("API_PORT", 8000)),
-        reload=True
-    )
+    host = os.getenv("API_HOST", "0.0.0.0")
+    port = int(os.getenv("API_PORT", 8000))
+
+    if config.APP_ENV == "production":
+        # Workers import the app anew and read the directory from the environment
+        if config.API_WORKERS > 1 and not config.SHARED_STATE_DIR:
+            os.environ["SHARED_STATE_DIR"] = shared_state_dir()
+        uvicorn.run("main:app", host=host, port=port, workers=config.API_WORKERS)
+    else:
+        uvicorn.run("main:app", host=host, port=port, reload=True)
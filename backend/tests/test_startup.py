@@ -0,0 +1,42 @@
+"""
+Startup Smoke Test
+Runs the application's startup and shutdown hooks against an in-memory
+MongoDB (mongomock-motor) and fails on any warm-up that reports an error
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import main
+from app import database
+
+
+def test_startup_warms_up_without_errors(monkeypatch, capsys):
+    client = mongomock_motor.AsyncMongoMockClient()
+
+    async def connect_to_mongo():
+        database.mongodb.client = database.mongodb.read_client = client
+        database.mongodb.db = database.mongodb.read_db = client["samadhansetu_test"]
+
+    monkeypatch.setattr(database, "connect_to_mongo", connect_to_mongo)
+
+    async def run():
+        await connect_to_mongo()
+        await database.mongodb.db.complaints.insert_one({
+            "text": "Water pipe burst near the market",
+            "category": "Water Supply",
+            "location": {"latitude": 28.61, "longitude": 77.20, "ward": "Ward 1"},
+            "urgency_score": 7,
+            "timestamp": datetime.utcnow() - timedelta(hours=1),
+        })
+        await main.startup_event()
+        await main.shutdown_event()
+
+    asyncio.run(run())
+    output = capsys.readouterr().out
+    assert "[+] Clustering engine ready (1 reports)" in output
+    assert "warm-up failed" not in output